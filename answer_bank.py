@@ -0,0 +1,344 @@
+"""
+Precomputed answers for the example questions and the most common query
+clusters.
+
+Build offline (reads historical queries from the telemetry spans):
+
+    python answer_bank.py build [--clusters 40] [--top 20] [--if-stale]
+
+At query time, match() returns a stored answer when the question is a
+close lexical match for a banked question from the current corpus
+version. A bank built against an older corpus is ignored until rebuilt;
+the app starts that rebuild in the background when it first sees the
+corpus version change (set CPF_ANSWER_BANK_AUTO_REBUILD=0 to leave it to
+the build command).
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+import numpy as np
+
+ANSWER_BANK_PATH = os.getenv("CPF_ANSWER_BANK_PATH", os.path.join("answer_bank", "answer_bank.json"))
+
+# Cosine similarity (TF-IDF) needed to serve a banked answer
+MIN_SIMILARITY = float(os.getenv("CPF_ANSWER_BANK_MIN_SIMILARITY", "0.8"))
+
+# Historical queries kept as aliases of each banked cluster question
+MAX_ALIASES = 20
+
+# Rebuild a stale bank in the background from the app
+AUTO_REBUILD = os.getenv("CPF_ANSWER_BANK_AUTO_REBUILD", "1") != "0"
+
+# A rebuild lock older than this is assumed to belong to a dead process
+REBUILD_LOCK_TIMEOUT_SECONDS = 3600
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "how", "i", "if", "in", "is", "it", "me", "my", "of", "on", "or",
+    "the", "to", "what", "when", "which", "with", "you", "your",
+}
+
+def tokenize(text):
+    """Lowercased content words plus adjacent-word bigrams"""
+    words = [w for w in TOKEN_RE.findall(text.lower()) if w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+class TfidfVectorizer:
+    """
+    Minimal TF-IDF with L2-normalised dense rows. Terms outside the
+    vocabulary have no column but still count towards a row's norm, at the
+    weight of a term seen in no document, so extra words in a query lower
+    its similarity to a fitted question instead of being ignored.
+    """
+
+    def __init__(self, max_features=4000):
+        self.max_features = max_features
+        self.vocabulary = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.oov_idf = 1.0
+
+    def fit(self, documents):
+        df = {}
+        for doc in documents:
+            for term in set(tokenize(doc)):
+                df[term] = df.get(term, 0) + 1
+        terms = sorted(df, key=lambda t: (-df[t], t))[:self.max_features]
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        n = len(documents)
+        self.idf = np.array([np.log((1 + n) / (1 + df[t])) + 1 for t in terms], dtype=np.float32)
+        self.oov_idf = float(np.log(1 + n) + 1)
+        return self
+
+    def transform(self, documents):
+        matrix = np.zeros((len(documents), len(self.vocabulary)), dtype=np.float32)
+        oov = np.zeros((len(documents), 1), dtype=np.float32)
+        for row, doc in enumerate(documents):
+            unseen = {}
+            for term in tokenize(doc):
+                col = self.vocabulary.get(term)
+                if col is not None:
+                    matrix[row, col] += 1
+                else:
+                    unseen[term] = unseen.get(term, 0) + 1
+            oov[row] = sum(count * count for count in unseen.values()) * self.oov_idf ** 2
+        matrix *= self.idf
+        norms = np.sqrt(np.sum(matrix * matrix, axis=1, keepdims=True) + oov)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def to_dict(self):
+        return {"vocabulary": self.vocabulary, "idf": self.idf.tolist(), "oov_idf": self.oov_idf}
+
+    @classmethod
+    def from_dict(cls, data):
+        vectorizer = cls()
+        vectorizer.vocabulary = data["vocabulary"]
+        vectorizer.idf = np.array(data["idf"], dtype=np.float32)
+        # Banks written before oov_idf was stored: the rarest fitted term
+        vectorizer.oov_idf = data.get("oov_idf", float(vectorizer.idf.max(initial=1.0)))
+        return vectorizer
+
+def cluster_queries(vectors, k, iterations=25, seed=0):
+    """
+    Spherical k-means over unit-length rows. Returns (labels, centroids).
+    Seeded k-means++ so rebuilds on the same log are reproducible.
+    """
+    n = len(vectors)
+    k = min(k, n)
+    rng = np.random.default_rng(seed)
+    centroids = [vectors[rng.integers(n)]]
+    for _ in range(1, k):
+        distance = 1 - np.max(vectors @ np.array(centroids).T, axis=1)
+        distance = np.clip(distance, 0, None)
+        if distance.sum() == 0:
+            break
+        centroids.append(vectors[rng.choice(n, p=distance / distance.sum())])
+    centroids = np.array(centroids)
+
+    labels = None
+    for _ in range(iterations):
+        new_labels = np.argmax(vectors @ centroids.T, axis=1)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for c in range(len(centroids)):
+            members = vectors[labels == c]
+            if len(members):
+                centroid = members.sum(axis=0)
+                centroids[c] = centroid / (np.linalg.norm(centroid) or 1)
+    return labels, centroids
+
+def load_historical_queries(spans_path=None, max_queries=5000):
+    """Most recent CPF query texts from the exported telemetry spans"""
+    from telemetry import load_spans, TELEMETRY_PATH
+    roots = [s for s in load_spans(spans_path or TELEMETRY_PATH) if s.get("name") == "query"]
+    roots.sort(key=lambda s: s.get("start", 0))
+    queries = [(s.get("attributes") or {}).get("query", "").strip() for s in roots]
+    return [q for q in queries if q][-max_queries:]
+
+def select_cluster_questions(queries, clusters=40, top=20):
+    """
+    Cluster historical queries and return, for the `top` largest clusters,
+    the member closest to the centroid plus a sample of the other members.
+    """
+    unique = sorted(set(queries))
+    if not unique:
+        return []
+    counts = {q: 0 for q in unique}
+    for q in queries:
+        counts[q] += 1
+
+    vectorizer = TfidfVectorizer().fit(unique)
+    vectors = vectorizer.transform(unique)
+    labels, centroids = cluster_queries(vectors, clusters)
+
+    selected = []
+    for c in range(len(centroids)):
+        members = np.flatnonzero(labels == c)
+        if not len(members):
+            continue
+        similarity = vectors[members] @ centroids[c]
+        order = members[np.argsort(-similarity)]
+        size = sum(counts[unique[i]] for i in members)
+        selected.append({
+            "question": unique[order[0]],
+            "aliases": [unique[i] for i in order[1:MAX_ALIASES + 1]],
+            "cluster_size": size,
+        })
+    selected.sort(key=lambda item: -item["cluster_size"])
+    return selected[:top]
+
+def generate_grounded_answer(question):
+    """Answer from freshly fetched CPF sources, returning (answer, sources)"""
+    from cpf_assistant import identify_relevant_url, get_relevant_content_from_urls, get_openai_response
+    relevant_content = get_relevant_content_from_urls(identify_relevant_url(question))[:3]
+    context = "\n\n".join(item["content"] for item in relevant_content)
+    answer = get_openai_response(question, context)
+    return answer, [item["url"] for item in relevant_content]
+
+def build_answer_bank(path=ANSWER_BANK_PATH, spans_path=None, clusters=40, top=20):
+    """Generate and write the answer bank for the current corpus version"""
+    from cpf_assistant import EXAMPLE_QUESTIONS, current_corpus_version, is_cpf_related
+    version = current_corpus_version()
+
+    candidates = [{"question": q, "aliases": [], "cluster_size": 0, "kind": "example"}
+                  for q in EXAMPLE_QUESTIONS]
+    seen = {q.lower() for q in EXAMPLE_QUESTIONS}
+    history = [q for q in load_historical_queries(spans_path) if is_cpf_related(q)]
+    for item in select_cluster_questions(history, clusters, top):
+        if item["question"].lower() not in seen:
+            seen.add(item["question"].lower())
+            candidates.append(dict(item, kind="cluster"))
+
+    entries = []
+    for item in candidates:
+        answer, sources = generate_grounded_answer(item["question"])
+        if not sources or answer.startswith("Error getting OpenAI response"):
+            print(f"skipped (no grounded answer): {item['question']}", file=sys.stderr)
+            continue
+        entries.append(dict(item, answer=answer, sources=sources))
+        print(f"answered [{item['kind']}]: {item['question']}", file=sys.stderr)
+
+    questions = [q for e in entries for q in [e["question"]] + e["aliases"]]
+    bank = {
+        "corpus_version": version,
+        "built_at": time.time(),
+        "vectorizer": TfidfVectorizer().fit(questions).to_dict() if questions else None,
+        "entries": entries,
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(bank, f)
+    os.replace(tmp_path, path)
+    return bank
+
+class AnswerBank:
+    """Read side of the answer bank"""
+
+    def __init__(self, bank):
+        self.corpus_version = bank.get("corpus_version")
+        self.entries = bank.get("entries", [])
+        self.vectorizer = None
+        self.rows = []
+        if self.entries and bank.get("vectorizer"):
+            self.vectorizer = TfidfVectorizer.from_dict(bank["vectorizer"])
+            questions = []
+            for index, entry in enumerate(self.entries):
+                for question in [entry["question"]] + entry.get("aliases", []):
+                    questions.append(question)
+                    self.rows.append(index)
+            self.matrix = self.vectorizer.transform(questions)
+            self.rows = np.array(self.rows)
+
+    @classmethod
+    def load(cls, path=ANSWER_BANK_PATH):
+        if not os.path.exists(path):
+            return cls({})
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def match(self, query, corpus_version, min_similarity=MIN_SIMILARITY):
+        """Return (entry, similarity) for a confident match, else None"""
+        if self.vectorizer is None or corpus_version != self.corpus_version:
+            return None
+        similarity = self.matrix @ self.vectorizer.transform([query])[0]
+        best = int(np.argmax(similarity))
+        if similarity[best] < min_similarity:
+            return None
+        return self.entries[self.rows[best]], float(similarity[best])
+
+_bank = None
+_bank_mtime = None
+_bank_lock = threading.Lock()
+
+def get_answer_bank(path=ANSWER_BANK_PATH):
+    """Process-wide bank, reloaded when the file on disk is rebuilt"""
+    global _bank, _bank_mtime
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    with _bank_lock:
+        if _bank is None or mtime != _bank_mtime:
+            _bank = AnswerBank.load(path)
+            _bank_mtime = mtime
+        return _bank
+
+def is_stale(path=ANSWER_BANK_PATH):
+    """True when the bank is missing or was built for another corpus version"""
+    from cpf_assistant import current_corpus_version
+    return AnswerBank.load(path).corpus_version != current_corpus_version()
+
+_rebuild_attempted = set()
+
+def _acquire_rebuild_lock(lock_path):
+    """Create the lock file, taking over one left behind by a dead rebuild"""
+    try:
+        if time.time() - os.path.getmtime(lock_path) > REBUILD_LOCK_TIMEOUT_SECONDS:
+            os.remove(lock_path)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except OSError:
+        return False
+
+def _rebuild(path, lock_path):
+    try:
+        build_answer_bank(path)
+    except Exception as e:
+        print(f"answer bank rebuild failed: {type(e).__name__}: {e}", file=sys.stderr)
+    finally:
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
+
+def rebuild_if_stale(corpus_version, path=ANSWER_BANK_PATH):
+    """
+    Start a background rebuild when the bank is not for corpus_version.
+    Each process tries once per corpus version, and a lock file next to the
+    bank keeps other server processes from building it at the same time.
+    Returns True when this call started a rebuild.
+    """
+    if not AUTO_REBUILD or get_answer_bank(path).corpus_version == corpus_version:
+        return False
+    with _bank_lock:
+        if (path, corpus_version) in _rebuild_attempted:
+            return False
+        _rebuild_attempted.add((path, corpus_version))
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    lock_path = path + ".lock"
+    if not _acquire_rebuild_lock(lock_path):
+        return False
+    threading.Thread(target=_rebuild, args=(path, lock_path), name="answer-bank-rebuild", daemon=True).start()
+    return True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the precomputed CPF answer bank")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="cluster historical queries and generate answers")
+    build.add_argument("--path", default=ANSWER_BANK_PATH)
+    build.add_argument("--spans", default=None, help="telemetry spans file (JSON lines)")
+    build.add_argument("--clusters", type=int, default=40)
+    build.add_argument("--top", type=int, default=20, help="largest clusters to answer")
+    build.add_argument("--if-stale", action="store_true",
+                       help="only rebuild when the corpus version has changed")
+    args = parser.parse_args(argv)
+
+    if args.if_stale and not is_stale(args.path):
+        print("answer bank is current; nothing to do")
+        return 0
+    bank = build_answer_bank(args.path, args.spans, args.clusters, args.top)
+    print(f"wrote {len(bank['entries'])} answers for corpus {bank['corpus_version']} to {args.path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
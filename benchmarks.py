@@ -0,0 +1,340 @@
+"""
+Benchmarks for the calculator and retrieval hot paths.
+
+    python benchmarks.py run [--output PATH] [--quick] [--filter TEXT]
+    python benchmarks.py compare [--baseline PATH] [--current PATH] [--tolerance 0.2]
+    python benchmarks.py save-pages
+
+`run` times every benchmark and writes the results as JSON; run it with
+`--output benchmarks/baseline.json` to record a baseline. `compare` runs
+the suite (or reads `--current`) and exits 1 when any benchmark is slower
+than its baseline by more than the tolerance, widened by the repeats' own
+spread, or when a baseline benchmark was not run. `save-pages` downloads
+the CPF source pages that the HTML extraction benchmark parses; without
+them it parses a generated page.
+
+Each benchmark is one call over n inputs. A measurement loops the call
+until it has run for at least MIN_MEASURE_SECONDS, so microsecond calls
+are not lost in timer and scheduler noise, and is repeated; the fastest
+repeat's time per call is compared, as it is the least disturbed by
+other load on the machine.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import random
+import hashlib
+import argparse
+import platform
+import datetime
+import statistics
+
+BENCHMARK_DIR = os.getenv("CPF_BENCHMARK_DIR", "benchmarks")
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+RESULTS_PATH = os.path.join(BENCHMARK_DIR, "results.json")
+PAGES_DIR = os.path.join(BENCHMARK_DIR, "pages")
+
+# A benchmark may take this much longer than its baseline before compare fails
+DEFAULT_TOLERANCE = 0.2
+
+# Timed repeats per benchmark; the fastest is kept
+DEFAULT_REPEATS = 5
+
+# Each repeat loops the call until it has taken at least this long
+MIN_MEASURE_SECONDS = 0.2
+
+# Input sizes: scalar functions loop in Python, batch functions take arrays
+SCALAR_SIZES = (1, 100, 10_000)
+BATCH_SIZES = (1, 100, 10_000, 1_000_000)
+
+# Dropped from --quick runs
+QUICK_MAX_SIZE = 10_000
+
+QUERIES = [
+    "How do I use my CPF savings to purchase a home?",
+    "What are the differences between HDB loans and bank loans?",
+    "Can I use my CPF for downpayment on a private property?",
+    "What is the interest rate for the special account",
+    "how much medisave do i need for hospital bills",
+    "best hawker centre near tampines",
+    "retain 20000 in oa for housing loan",
+    "home protection scheme claims",
+]
+
+# name -> (setup, sizes, size label); setup(n) returns the function to time
+BENCHMARKS = {}
+
+def benchmark(name, sizes=(1,), label="n"):
+    """Register a benchmark; the decorated setup(n) builds inputs and returns the timed callable."""
+    def decorator(setup):
+        BENCHMARKS[name] = (setup, sizes, label)
+        return setup
+    return decorator
+
+def _members(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        (rng.uniform(0, 8000), rng.choice((0.0, 0.0, 0.0, rng.uniform(0, 20000))), rng.uniform(0, 100000))
+        for _ in range(n)
+    ]
+
+@benchmark("calculate_contributions", SCALAR_SIZES)
+def _contributions(n):
+    from cpf_core.calculator import calculate_contributions
+    from cpf_core.policy import AGE_GROUPS
+    inputs = [(ow, aw, AGE_GROUPS[i % len(AGE_GROUPS)], ytd) for i, (ow, aw, ytd) in enumerate(_members(n))]
+    return lambda: [calculate_contributions(*args) for args in inputs]
+
+@benchmark("calculate_allocations", SCALAR_SIZES)
+def _allocations(n):
+    from cpf_core.calculator import calculate_allocations
+    from cpf_core.policy import AGE_GROUPS
+    inputs = [(ow * 0.37, AGE_GROUPS[i % len(AGE_GROUPS)]) for i, (ow, _, _) in enumerate(_members(n))]
+    return lambda: [calculate_allocations(*args) for args in inputs]
+
+@benchmark("calculate_contributions_batch", BATCH_SIZES)
+def _contributions_batch(n):
+    import numpy as np
+    from cpf_core.batch import calculate_contributions_batch
+    from cpf_core.tables import POLICY
+    rng = np.random.default_rng(0)
+    ordinary, additional = rng.uniform(0, 8000, n), rng.uniform(0, 20000, n)
+    ytd, rows = rng.uniform(0, 100000, n), rng.integers(0, POLICY.n_bands, n)
+    return lambda: calculate_contributions_batch(ordinary, additional, rows, ytd)
+
+@benchmark("calculate_allocations_batch", BATCH_SIZES)
+def _allocations_batch(n):
+    import numpy as np
+    from cpf_core.batch import calculate_allocations_batch
+    from cpf_core.tables import POLICY
+    rng = np.random.default_rng(0)
+    total, rows = rng.uniform(0, 3000, n), rng.integers(0, POLICY.n_bands, n)
+    return lambda: calculate_allocations_batch(total, rows)
+
+@benchmark("calculate_future_balance", (1, 10, 20, 40), label="years")
+def _future_balance(years):
+    from cpf_core.projection import calculate_future_balance
+    birth_date, start_date = datetime.date(1985, 7, 1), datetime.date(2024, 1, 1)
+    balances = {"OA": 30000.0, "SA": 20000.0, "MA": 25000.0}
+    return lambda: calculate_future_balance(
+        1850.0, years, birth_date=birth_date, start_date=start_date, initial_balances=balances
+    )
+
+@benchmark("calculate_milestones")
+def _milestones(n):
+    from cpf_core.milestones import calculate_milestones
+    birth_date, start_date = datetime.date(1985, 7, 1), datetime.date(2024, 1, 1)
+    balances = {"OA": 30000.0, "SA": 20000.0, "MA": 25000.0}
+    return lambda: calculate_milestones(balances, 1850.0, birth_date=birth_date, start_date=start_date)
+
+@benchmark("calculate_milestones_batch", (1, 100, 10_000))
+def _milestones_batch(n):
+    import numpy as np
+    from cpf_core.milestones import calculate_milestones_batch
+    rng = np.random.default_rng(0)
+    contributions = rng.uniform(500, 2220, n)
+    birth_dates = np.datetime64("1960-01-01") + rng.integers(0, 365 * 40, n)
+    current_sa = rng.uniform(0, 100000, n)
+    return lambda: calculate_milestones_batch(
+        contributions, birth_dates, current_sa, start_date=datetime.date(2024, 1, 1)
+    )
+
+@benchmark("is_cpf_related", SCALAR_SIZES)
+def _is_cpf_related(n):
+    from cpf_sources import is_cpf_related
+    queries = [QUERIES[i % len(QUERIES)] for i in range(n)]
+    return lambda: [is_cpf_related(query) for query in queries]
+
+@benchmark("identify_relevant_url", (1, 100, 1_000))
+def _identify_relevant_url(n):
+    from cpf_sources import identify_relevant_url
+    queries = [QUERIES[i % len(QUERIES)] for i in range(n)]
+    return lambda: [identify_relevant_url(query) for query in queries]
+
+def _generated_page():
+    """A CPF-like article page, for machines without saved pages."""
+    paragraphs = "".join(
+        f"<p>Paragraph {i} on using <b>CPF</b> savings for an <a href='#'>HDB flat</a>.</p>"
+        for i in range(400)
+    )
+    return (
+        "<html><head><style>p{margin:0}</style><script>var x = 1;</script></head><body>"
+        "<nav><ul>" + "".join(f"<li><a href='/{i}'>Link {i}</a></li>" for i in range(200)) + "</ul></nav>"
+        f"<main><h1>Using your CPF to buy a home</h1>{paragraphs}</main>"
+        "<footer>Central Provident Fund Board</footer></body></html>"
+    )
+
+@benchmark("extract_text")
+def _extract_text(n):
+    from cpf_sources import extract_text
+    pages = []
+    for path in sorted(glob.glob(os.path.join(PAGES_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    pages = pages or [_generated_page()]
+    return lambda: [extract_text(html) for html in pages]
+
+@benchmark("extract_text_stream")
+def _extract_text_stream(n):
+    from cpf_sources import FETCH_CHUNK_BYTES, extract_text_stream
+    pages = []
+    for path in sorted(glob.glob(os.path.join(PAGES_DIR, "*.html"))):
+        with open(path, "rb") as f:
+            pages.append(f.read())
+    pages = pages or [_generated_page().encode("utf-8")]
+
+    def chunks(page):
+        return (page[i:i + FETCH_CHUNK_BYTES] for i in range(0, len(page), FETCH_CHUNK_BYTES))
+
+    return lambda: [extract_text_stream(chunks(page)) for page in pages]
+
+def _time_loops(func, loops):
+    start = time.perf_counter()
+    for _ in range(loops):
+        func()
+    return time.perf_counter() - start
+
+def time_benchmark(setup, n, repeats=DEFAULT_REPEATS, min_seconds=MIN_MEASURE_SECONDS):
+    """
+    Fastest and median time per call of setup(n)() over repeats. The loop
+    count per repeat is doubled from one, during warm-up, until a repeat
+    takes at least min_seconds.
+    """
+    func = setup(n)
+    loops = 1
+    while _time_loops(func, loops) < min_seconds:
+        loops *= 2
+    timings = [_time_loops(func, loops) / loops for _ in range(repeats)]
+    return {"seconds": min(timings), "median_seconds": statistics.median(timings), "n": n, "loops": loops}
+
+def run_benchmarks(quick=False, pattern=None, repeats=DEFAULT_REPEATS, min_seconds=MIN_MEASURE_SECONDS):
+    """Run the suite and return results keyed "<benchmark>[<label>=<size>]"."""
+    results = {}
+    for name, (setup, sizes, label) in BENCHMARKS.items():
+        if pattern and pattern not in name:
+            continue
+        for n in sizes:
+            if quick and n > QUICK_MAX_SIZE:
+                continue
+            key = f"{name}[{label}={n}]"
+            results[key] = time_benchmark(setup, n, repeats, min_seconds)
+            print(f"{key:45s} {results[key]['seconds'] * 1000:12.3f} ms", flush=True)
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "results": results,
+    }
+
+def write_results(report, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def _spread(result):
+    """Relative gap between the median and fastest repeat, a measure of noise."""
+    return result.get("median_seconds", result["seconds"]) / result["seconds"] - 1 if result["seconds"] > 0 else 0.0
+
+def compare_results(baseline, current, tolerance=DEFAULT_TOLERANCE):
+    """
+    Benchmarks slower than baseline * (1 + tolerance + noise), where noise
+    is the larger repeat spread of the two measurements, so a benchmark
+    whose repeats themselves varied by 30% is not failed for a 25% change.
+
+    Returns:
+        List of (name, baseline seconds, current seconds, ratio) rows,
+        one per benchmark present in both reports, the names that
+        regressed, and the baseline names missing from the current report
+    """
+    rows, regressions = [], []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["seconds"]
+        ratio = result["seconds"] / before if before > 0 else 1.0
+        rows.append((name, before, result["seconds"], ratio))
+        noise = max(_spread(baseline["results"][name]), _spread(result))
+        if ratio > 1 + tolerance + noise:
+            regressions.append(name)
+    missing = [name for name in baseline["results"] if name not in current["results"]]
+    return rows, regressions, missing
+
+def save_pages():
+    """Download every CPF source page into PAGES_DIR."""
+    import requests
+    from cpf_sources import CPF_URLS
+    os.makedirs(PAGES_DIR, exist_ok=True)
+    urls = [url for urls in CPF_URLS.values() for url in urls]
+    saved = 0
+    for url in urls:
+        try:
+            response = requests.get(url, timeout=10)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"skipped {url}: {e}")
+            continue
+        name = hashlib.sha1(url.encode()).hexdigest()[:16] + ".html"
+        with open(os.path.join(PAGES_DIR, name), "w", encoding="utf-8") as f:
+            f.write(response.text)
+        saved += 1
+    return saved
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the CPF calculator and retrieval hot paths")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="time the suite and write the results")
+    run.add_argument("--output", default=RESULTS_PATH)
+    compare = sub.add_parser("compare", help="fail when a benchmark is slower than the baseline")
+    compare.add_argument("--baseline", default=BASELINE_PATH)
+    compare.add_argument("--current", default=None, help="results file to compare instead of running the suite")
+    compare.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                         help="allowed slowdown as a fraction, e.g. 0.2 for 20%%")
+    for command in (run, compare):
+        command.add_argument("--quick", action="store_true", help=f"skip sizes above {QUICK_MAX_SIZE:,}")
+        command.add_argument("--filter", default=None, help="only benchmarks whose name contains this")
+        command.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+        command.add_argument("--min-time", type=float, default=MIN_MEASURE_SECONDS,
+                             help="seconds each repeat loops the benchmark for")
+    sub.add_parser("save-pages", help="download the CPF pages used by extract_text")
+    args = parser.parse_args(argv)
+
+    if args.command == "save-pages":
+        print(f"saved {save_pages()} pages to {PAGES_DIR}")
+        return 0
+
+    if args.command == "run":
+        report = run_benchmarks(args.quick, args.filter, args.repeats, args.min_time)
+        write_results(report, args.output)
+        print(f"wrote {len(report['results'])} results to {args.output}")
+        return 0
+
+    baseline = load_results(args.baseline)
+    if args.current:
+        current = load_results(args.current)
+    else:
+        current = run_benchmarks(args.quick, args.filter, args.repeats, args.min_time)
+        write_results(current, RESULTS_PATH)
+    rows, regressions, missing = compare_results(baseline, current, args.tolerance)
+    for name, before, after, ratio in rows:
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:45s} {before * 1000:10.3f} ms -> {after * 1000:10.3f} ms  x{ratio:5.2f}{flag}")
+    for name in missing:
+        print(f"{name:45s} MISSING from the current run")
+    if regressions or missing:
+        if regressions:
+            print(f"{len(regressions)} of {len(rows)} benchmarks regressed by more than {args.tolerance:.0%}")
+        if missing:
+            print(f"{len(missing)} baseline benchmarks were not run (filtered out or renamed?)")
+        return 1
+    print(f"no regressions in {len(rows)} benchmarks (tolerance {args.tolerance:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,444 @@
+"""
+HTTP JSON API over the CPF calculator, for the HR portal and other services.
+
+    python cpf_api.py serve [--host 127.0.0.1] [--port 8080]
+    python cpf_api.py loadtest [--url http://127.0.0.1:8080] [--rps 200] [--seconds 30]
+
+Endpoints (POST, JSON body):
+
+    /v1/contributions  ordinary_wages, additional_wages, total_wages_ytd,
+                       birth_date or age_group, month (YYYY-MM-DD, default today),
+                       exact (true: integer cents with CPF rounding)
+    /v1/allocations    total_cpf, birth_date or age_group, month
+    /v1/projections    monthly_contribution, years, salary_increment,
+                       birth_date, balances {OA, SA, MA}, start_date
+    /v1/milestones     the projection fields; months to BRS, FRS and ERS
+
+A body is one object or a list of objects; a list is answered with a list
+in the same order, with {"error": ...} in place of any invalid item.
+GET /v1/stats reports cache hit rates and GET /healthz liveness.
+
+Amounts must be finite, non-negative and at most MAX_MONEY, and salary
+increments above -100% and at most +100%. Inputs are quantized (money to
+the cent, rates to 0.01%) before they are computed, and each item's
+response is kept in an LRU cache keyed on the quantized values, so
+repeated and near-identical requests are served without recomputing. Contribution and allocation items that miss the
+cache are computed together in one vectorized call.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from cpf_core.policy import AGE_GROUPS, age_on, age_group_for_age, month_index
+
+# Responses kept per endpoint
+CACHE_ENTRIES = int(os.getenv("CPF_API_CACHE_ENTRIES", "100000"))
+
+# Largest batch body accepted, in items
+MAX_BATCH_ITEMS = 10_000
+
+# Batches with more uncached items than this are computed off the event loop
+INLINE_MAX_ITEMS = 64
+
+# Longest projection served
+MAX_YEARS = 60
+
+# Largest amount accepted, in dollars; far inside the int64 cents range of the exact kernel
+MAX_MONEY = 1_000_000_000
+
+ACCOUNTS = ("OA", "SA", "MA")
+
+class RequestError(ValueError):
+    """An invalid request item, reported to the client."""
+
+class ResponseCache:
+    """LRU cache of per-item responses with hit and miss counts."""
+
+    def __init__(self, max_entries: int = CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+def _number(value, name):
+    """Finite float from a JSON number or numeric string."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError, OverflowError):
+        raise RequestError(f"{name} must be a number")
+    if not math.isfinite(value):
+        raise RequestError(f"{name} must be a finite number")
+    return value
+
+def _money(item, name, default=None):
+    value = item.get(name, default)
+    if value is None:
+        raise RequestError(f"{name} is required")
+    value = _number(value, name)
+    if value < 0:
+        raise RequestError(f"{name} must not be negative")
+    if value > MAX_MONEY:
+        raise RequestError(f"{name} must be at most {MAX_MONEY:,}")
+    return round(value, 2)
+
+def _rate(item, name, default):
+    return round(_number(item.get(name, default), name), 4)
+
+def _increment(item):
+    """Annual salary increment, above -100% and at most +100%."""
+    increment = _rate(item, "salary_increment", 0.03)
+    if not -1 < increment <= 1:
+        raise RequestError("salary_increment must be above -1 and at most 1")
+    return increment
+
+def _date(item, name, default=None):
+    value = item.get(name)
+    if value is None:
+        if default is None:
+            raise RequestError(f"{name} is required")
+        return default
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise RequestError(f"{name} must be a YYYY-MM-DD date")
+
+def _reject_constant(name):
+    raise ValueError(f"body must be strict JSON; {name} is not a number")
+
+def _loads(text):
+    """json.loads without the NaN, Infinity and -Infinity extensions."""
+    return json.loads(text, parse_constant=_reject_constant)
+
+def _years(item):
+    try:
+        years = int(item.get("years", 20))
+    except (TypeError, ValueError, OverflowError):
+        raise RequestError("years must be an integer")
+    if not 1 <= years <= MAX_YEARS:
+        raise RequestError(f"years must be between 1 and {MAX_YEARS}")
+    return years
+
+def _age_group(item, on):
+    """Age group from age_group or birth_date, measured on `on`."""
+    if "age_group" in item:
+        if item["age_group"] not in AGE_GROUPS:
+            raise RequestError(f"age_group must be one of {list(AGE_GROUPS)}")
+        return item["age_group"]
+    return age_group_for_age(age_on(_date(item, "birth_date"), on))
+
+def _policy_row(age_group, on):
+    from cpf_core.tables import POLICY
+    return int(POLICY.edition(month_index(on))) * POLICY.n_bands + AGE_GROUPS.index(age_group)
+
+# Each endpoint: parse(item) -> quantized key, and compute(keys) -> responses
+
+def _parse_contribution(item):
+    on = _date(item, "month", datetime.date.today())
+    exact = item.get("exact", False)
+    if not isinstance(exact, bool):
+        raise RequestError("exact must be true or false")
+    return (
+        _money(item, "ordinary_wages"),
+        _money(item, "additional_wages", 0.0),
+        _money(item, "total_wages_ytd", 0.0),
+        _policy_row(_age_group(item, on), on),
+        exact,
+    )
+
+def _compute_contributions(keys):
+    import numpy as np
+    from cpf_core.batch import calculate_rows_batch
+    responses = [None] * len(keys)
+    # One vectorized call per arithmetic: float, and integer cents for exact items
+    for exact in (False, True):
+        indices = [i for i, key in enumerate(keys) if key[4] == exact]
+        if not indices:
+            continue
+        ordinary, additional, ytd, rows = (np.array(column) for column in zip(*(keys[i][:4] for i in indices)))
+        columns = calculate_rows_batch(ordinary, additional, rows, ytd, exact)
+        for j, i in enumerate(indices):
+            responses[i] = {name: round(float(values[j]), 2) for name, values in columns.items()}
+    return responses
+
+def _parse_allocation(item):
+    on = _date(item, "month", datetime.date.today())
+    return (_money(item, "total_cpf"), _policy_row(_age_group(item, on), on))
+
+def _compute_allocations(keys):
+    import numpy as np
+    from cpf_core.batch import calculate_allocations_batch
+    total, rows = (np.array(column) for column in zip(*keys))
+    allocations = calculate_allocations_batch(total, rows)
+    return [
+        {name: round(float(values[i]), 2) for name, values in allocations.items()}
+        for i in range(len(keys))
+    ]
+
+def _parse_projection(item):
+    balances = item.get("balances") or {}
+    if not isinstance(balances, dict):
+        raise RequestError("balances must be an object with OA, SA and MA")
+    birth_date = item.get("birth_date")
+    return (
+        _money(item, "monthly_contribution"),
+        _years(item),
+        _increment(item),
+        None if birth_date is None else _date(item, "birth_date"),
+        tuple(_money(balances, account, 0.0) for account in ACCOUNTS),
+        _date(item, "start_date", datetime.date.today().replace(day=1)),
+    )
+
+def _compute_projections(keys):
+    from cpf_core.projection import calculate_future_balance
+    responses = []
+    for contribution, years, increment, birth_date, balances, start_date in keys:
+        monthly_data = calculate_future_balance(
+            contribution, years, increment, birth_date=birth_date, start_date=start_date,
+            initial_balances=dict(zip(ACCOUNTS, balances))
+        )
+        # Year-end balances keep the response small
+        year_end = slice(11, None, 12)
+        response = {"years": list(range(1, years + 1))}
+        for account in ACCOUNTS + ("Total",):
+            response[account] = [round(float(value), 2) for value in monthly_data[account][year_end]]
+        responses.append(response)
+    return responses
+
+def _compute_milestones(keys):
+    from cpf_core.milestones import calculate_milestones
+    return [
+        {
+            "months": calculate_milestones(
+                dict(zip(ACCOUNTS, balances)), contribution, years, increment,
+                birth_date=birth_date, start_date=start_date
+            )
+        }
+        for contribution, years, increment, birth_date, balances, start_date in keys
+    ]
+
+ENDPOINTS = {
+    "contributions": (_parse_contribution, _compute_contributions),
+    "allocations": (_parse_allocation, _compute_allocations),
+    "projections": (_parse_projection, _compute_projections),
+    "milestones": (_parse_projection, _compute_milestones),
+}
+
+class CalculatorAPI:
+    """Request handling shared by the endpoints: parsing, caching and batching."""
+
+    def __init__(self, cache_entries: int = CACHE_ENTRIES, workers: int = None):
+        self.caches = {name: ResponseCache(cache_entries) for name in ENDPOINTS}
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.requests = 0
+        self.items = 0
+        self.started = time.time()
+
+    async def answer(self, endpoint, items):
+        """Responses for a list of request items, in order."""
+        parse, compute = ENDPOINTS[endpoint]
+        cache = self.caches[endpoint]
+        responses = [None] * len(items)
+        missing = OrderedDict()  # key -> positions waiting for it
+        for i, item in enumerate(items):
+            try:
+                if not isinstance(item, dict):
+                    raise RequestError("each item must be a JSON object")
+                key = parse(item)
+            except RequestError as e:
+                responses[i] = {"error": str(e)}
+                continue
+            cached = cache.get(key)
+            if cached is not None:
+                responses[i] = cached
+            else:
+                missing.setdefault(key, []).append(i)
+
+        if missing:
+            keys = list(missing)
+            if len(keys) > INLINE_MAX_ITEMS:
+                results = await asyncio.get_running_loop().run_in_executor(self.executor, compute, keys)
+            else:
+                results = compute(keys)
+            for key, result in zip(keys, results):
+                cache.put(key, result)
+                for i in missing[key]:
+                    responses[i] = result
+        return responses
+
+    async def handle(self, request):
+        endpoint = request.match_info["endpoint"]
+        if endpoint not in ENDPOINTS:
+            raise web.HTTPNotFound(text=json.dumps({"error": f"unknown endpoint {endpoint}"}),
+                                   content_type="application/json")
+        try:
+            body = await request.json(loads=_loads)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return web.json_response({"error": "body must be JSON"}, status=400)
+        except ValueError as e:
+            return web.json_response({"error": str(e)}, status=400)
+
+        batch = isinstance(body, list)
+        items = body if batch else [body]
+        if len(items) > MAX_BATCH_ITEMS:
+            return web.json_response({"error": f"at most {MAX_BATCH_ITEMS} items per request"}, status=413)
+        self.requests += 1
+        self.items += len(items)
+
+        responses = await self.answer(endpoint, items)
+        if batch:
+            return web.json_response(responses)
+        status = 400 if "error" in responses[0] else 200
+        return web.json_response(responses[0], status=status)
+
+    async def stats(self, request):
+        return web.json_response({
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "items": self.items,
+            "caches": {name: cache.stats() for name, cache in self.caches.items()},
+        })
+
+    async def health(self, request):
+        return web.json_response({"status": "ok"})
+
+def create_app(cache_entries: int = CACHE_ENTRIES) -> web.Application:
+    api = CalculatorAPI(cache_entries)
+    app = web.Application(client_max_size=16 * 1024 * 1024)
+    app["api"] = api
+    app.router.add_post("/v1/{endpoint}", api.handle)
+    app.router.add_get("/v1/stats", api.stats)
+    app.router.add_get("/healthz", api.health)
+
+    async def warm_up(app):
+        # Load numpy and the policy tables before the first request
+        await api.answer("contributions", [{"ordinary_wages": 0, "age_group": AGE_GROUPS[0]}])
+
+    async def shut_down(app):
+        api.executor.shutdown(wait=False)
+
+    app.on_startup.append(warm_up)
+    app.on_cleanup.append(shut_down)
+    return app
+
+def _random_item(endpoint, rng):
+    """A request item drawn from a small pool, so repeats exercise the cache."""
+    birth_date = datetime.date(rng.randint(1960, 2004), rng.randint(1, 12), 1).isoformat()
+    if endpoint == "contributions":
+        return {"ordinary_wages": rng.randrange(1000, 8001, 250), "birth_date": birth_date}
+    if endpoint == "allocations":
+        return {"total_cpf": rng.randrange(100, 2221, 10), "birth_date": birth_date}
+    return {
+        "monthly_contribution": rng.randrange(500, 2221, 50),
+        "years": rng.choice((10, 20, 30)),
+        "birth_date": birth_date,
+        "balances": {"OA": rng.randrange(0, 100001, 5000), "SA": rng.randrange(0, 100001, 5000)},
+    }
+
+async def load_test(url, rps, seconds, batch_size=1, mix=None, seed=0):
+    """
+    Open-loop load test: requests start at a fixed rate whatever the latency.
+
+    Returns:
+        Dictionary with requests sent, errors, achieved requests per second
+        and latency percentiles in milliseconds
+    """
+    import aiohttp
+    rng = random.Random(seed)
+    mix = mix or {"contributions": 0.6, "allocations": 0.1, "projections": 0.2, "milestones": 0.1}
+    endpoints, weights = zip(*mix.items())
+    latencies, errors = [], 0
+
+    async def one(session, endpoint, body):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            async with session.post(f"{url}/v1/{endpoint}", json=body) as response:
+                await response.read()
+                if response.status != 200:
+                    errors += 1
+        except aiohttp.ClientError:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=512)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        tasks = []
+        start = time.perf_counter()
+        for i in range(int(rps * seconds)):
+            delay = start + i / rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            endpoint = rng.choices(endpoints, weights)[0]
+            body = [_random_item(endpoint, rng) for _ in range(batch_size)] if batch_size > 1 else _random_item(endpoint, rng)
+            tasks.append(asyncio.ensure_future(one(session, endpoint, body)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    def percentile(q):
+        return latencies[min(len(latencies) - 1, int(q / 100 * len(latencies)))] * 1000 if latencies else 0.0
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve or load-test the CPF calculator API")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="run the HTTP API")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--cache-entries", type=int, default=CACHE_ENTRIES)
+    load = sub.add_parser("loadtest", help="send requests at a fixed rate and report latency")
+    load.add_argument("--url", default="http://127.0.0.1:8080")
+    load.add_argument("--rps", type=float, default=200)
+    load.add_argument("--seconds", type=float, default=30)
+    load.add_argument("--batch-size", type=int, default=1, help="items per request body")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        web.run_app(create_app(args.cache_entries), host=args.host, port=args.port)
+        return 0
+
+    stats = asyncio.run(load_test(args.url, args.rps, args.seconds, args.batch_size))
+    for name, value in stats.items():
+        print(f"{name}: {value:,.1f}" if isinstance(value, float) else f"{name}: {value:,}")
+    return 1 if stats["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
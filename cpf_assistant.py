@@ -0,0 +1,369 @@
+"""
+Query pipeline for the CPF Information Hub: keyword validation, URL
+retrieval and scraping, the CrewAI agents and the OpenAI fallback.
+Kept free of page rendering so offline jobs can import it.
+"""
+import os
+import time
+import threading
+import requests
+import streamlit as st
+from dotenv import load_dotenv
+from openai import OpenAI
+from crewai import Agent, Task, Crew
+from telemetry import span, traced, record_span, count_tokens, DEFAULT_MODEL
+from crew_cache import task_cache, topic_signature, topic_terms, corpus_version
+from tiered_cache import TieredCache
+import cpf_sources
+from cpf_sources import (
+    CPF_URLS,
+    FETCH_CHUNK_BYTES,
+    MAX_PAGE_BYTES,
+    PAGE_CACHE_TTL_SECONDS,
+    extract_text_stream,
+)
+from passage_store import get_store
+
+# Load environment variables
+load_dotenv()
+
+# Initialize OpenAI client with flexible secret management
+def get_openai_api_key():
+    try:
+        api_key = st.secrets.get("OPENAI_API_KEY")
+    except FileNotFoundError:
+        # No secrets.toml, e.g. when imported by an offline job
+        api_key = None
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        st.error("No OpenAI API key found. Please set it in .streamlit/secrets.toml or as an environment variable.")
+        st.stop()
+    return api_key
+
+# Initialize the OpenAI client
+client = OpenAI(api_key=get_openai_api_key())  
+
+# Traced for the app; the plain versions live in cpf_sources
+is_cpf_related = traced()(cpf_sources.is_cpf_related)
+
+OPENAI_FALLBACK_MODEL = "gpt-3.5-turbo"
+
+def get_openai_response(query, context):
+    """Get response from OpenAI as a fallback"""
+    with span("get_openai_response", model=OPENAI_FALLBACK_MODEL) as s:
+        return _get_openai_response(query, context, s)
+
+def _get_openai_response(query, context, s):
+    try:
+        system_prompt = """You are a CPF (Central Provident Fund) specialist assistant. 
+        Provide accurate, helpful information about CPF policies and regulations.
+        Base your response on the context provided, and clearly indicate if you're unsure about any information.
+        Format your response in a clear, structured manner."""
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"Context: {context}\n\nQuery: {query}"}
+        ]
+
+        response = client.chat.completions.create(
+            model=OPENAI_FALLBACK_MODEL,
+            messages=messages,
+            temperature=0.5,
+            max_tokens=1000
+        )
+
+        if response.usage:
+            s.add_tokens(response.usage.prompt_tokens, response.usage.completion_tokens, OPENAI_FALLBACK_MODEL)
+        return response.choices[0].message.content
+
+    except Exception as e:
+        s.status = "error"
+        s.error = str(e)
+        return f"Error getting OpenAI response: {str(e)}"
+
+
+# Changes whenever the source URL list does, invalidating cached research
+URLS_VERSION = corpus_version(CPF_URLS)
+
+def current_corpus_version():
+    """
+    Version of the corpus answers are grounded in: the source URL list
+    plus, while pages are served from the passage store, its build id.
+    Cached research, answers and the answer bank are scoped to it, so
+    publishing a new store build invalidates them.
+    """
+    store = get_store()
+    return URLS_VERSION if store is None else f"{URLS_VERSION}-{store.manifest['build']}"
+
+# Shared across server processes: parsed page text and final answers
+page_cache = TieredCache("pages", ttl_seconds=PAGE_CACHE_TTL_SECONDS)
+answer_cache = TieredCache("answers", ttl_seconds=60 * 60)
+
+def answer_cache_key(query):
+    """Normalised question text scoped to the corpus version"""
+    return f"{current_corpus_version()}:{' '.join(query.lower().split())}"
+
+# Shown in the Help section and always kept in the answer bank
+EXAMPLE_QUESTIONS = [
+    "How do I use my CPF savings to purchase a home?",
+    "What are the differences between HDB loans and bank loans?",
+    "Can I use my CPF for downpayment on a private property?",
+    "What are the different CPF account types and their purposes?",
+    "How does the CPF Ordinary Account interest rate compare to the Special Account?",
+    "What grants are available for first-time homebuyers using CPF?",
+]
+
+# Enhanced URL handling and content fetching functions
+identify_relevant_url = traced()(cpf_sources.identify_relevant_url)
+
+def fetch_webpage_content(url, timeout=10, warmup=False):
+    """
+    Fetch and parse webpage content with improved error handling and content cleaning.
+    Warm-up fetches are tagged warmup=True so they are not counted as user requests.
+    """
+    with span("fetch_webpage_content", url=url, **({"warmup": True} if warmup else {})) as s:
+        # Pages in the passage store are read from its mapped files
+        store = get_store()
+        stored = store.page_text(url) if store is not None else None
+        if stored:
+            s.set(cache_hit=True, passage_store=True)
+            return stored
+
+        fetched = []
+
+        def fetch():
+            fetched.append(True)
+            return _fetch_webpage_content(url, timeout, s)
+
+        # Failed fetches return "" and are not cached
+        content = page_cache.get_or_compute(url, fetch, cacheable=bool)
+        s.set(cache_hit=not fetched)
+        return content
+
+def _fetch_webpage_content(url, timeout, s):
+    try:
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        }
+        # Streamed and parsed as it arrives; reading stops once the main content has closed
+        with requests.get(url, headers=headers, timeout=timeout, stream=True) as response:
+            s.set(http_status=response.status_code)
+            response.raise_for_status()
+            # Without a declared charset requests assumes ISO-8859-1; CPF pages are UTF-8
+            declared = "charset" in response.headers.get("Content-Type", "").lower()
+            text, stats = extract_text_stream(
+                response.iter_content(FETCH_CHUNK_BYTES),
+                encoding=response.encoding if declared else "utf-8",
+                max_bytes=MAX_PAGE_BYTES,
+                max_seconds=timeout
+            )
+        s.add_bytes(stats["bytes"])
+        s.set(stopped_early=stats["stopped"])
+        return text
+    
+    except requests.RequestException as e:
+        s.status = "error"
+        s.error = str(e)
+        st.warning(f"Error fetching content from {url}: {str(e)}")
+        return ""
+
+def get_relevant_content_from_urls(urls):
+    """
+    Fetch and process content from multiple URLs with improved content handling
+    """
+    content_list = []
+    for url in urls:
+        content = fetch_webpage_content(url)
+        if content:
+            # Process and clean content
+            cleaned_content = ' '.join(content.split())  # Remove extra whitespace
+            # Truncate content if too long (optional)
+            max_length = 1000  # Adjust as needed
+            if len(cleaned_content) > max_length:
+                cleaned_content = cleaned_content[:max_length] + "..."
+            
+            content_list.append({
+                "url": url,
+                "content": cleaned_content
+            })
+    return content_list
+
+# Create custom WebsiteSearchTool for CPF content
+#class CPFWebsiteSearchTool():
+    def __init__(self, base_urls=None):
+        super().__init__(base_urls if base_urls else CPF_URLS["housing_policies"][0])
+        self.all_urls = [url for urls in CPF_URLS.values() for url in urls]
+    
+    def search(self, query):
+        """Enhanced search method for CPF website content"""
+        relevant_urls = identify_relevant_url(query)
+        content_list = get_relevant_content_from_urls(relevant_urls)
+        
+        # Combine and format content for the agent
+        combined_content = "\n\n".join([
+            f"Source: {item['url']}\n{item['content']}"
+            for item in content_list
+        ])
+        
+        return combined_content
+
+# Create tools with enhanced CPF search capability
+#tool_cpf_search = CPFWebsiteSearchTool()
+
+# CrewAI Agents with improved tools and capabilities
+agent_researcher = Agent(
+    role="CPF Research Analyst",
+    goal="Conduct thorough research on CPF housing queries using official CPF sources",
+    backstory="""You're a specialized researcher focusing on CPF housing policies and regulations.
+    You have access to the latest CPF housing information and can analyze complex policy details.
+    You always verify information from official CPF sources and provide accurate, up-to-date information.""",
+#    tools=[tool_cpf_search],
+    allow_delegation=False,
+    verbose=True
+)
+
+agent_advisor = Agent(
+    role="CPF Housing Advisor",
+    goal="Provide clear and accurate CPF housing advice",
+    backstory="""You're an experienced CPF housing advisor who explains complex policies in simple terms.
+    You ensure all advice is accurate and helpful for decision-making.""",
+    allow_delegation=False,
+    verbose=True
+)
+
+agent_writer = Agent(
+    role="Content Writer",
+    goal="Create clear and comprehensive responses to CPF housing queries",
+    backstory="""You're a specialized writer who transforms complex CPF housing information into 
+    clear, concise, and user-friendly responses.""",
+    allow_delegation=False,
+    verbose=True
+)
+
+# Function to create CrewAI tasks based on user query
+def create_crew_tasks(user_query, topic, cached=None):
+    """
+    Build the research -> analysis -> writing tasks. Research and analysis
+    are written for the topic rather than the exact question, so their
+    output can be reused for any question on it. When they are cached for
+    this topic, only the writing task is built and the cached findings are
+    handed to the writer in its description.
+    """
+    if cached:
+        task_write = Task(
+            description=f"""
+            1. Create a clear and comprehensive response to: {user_query}
+            2. Include relevant policy details and practical implications
+            3. Structure the response for easy understanding
+
+            Research findings:
+            {cached["research"]}
+
+            Analysis:
+            {cached["analysis"]}
+            """,
+            agent=agent_writer
+        )
+        return [task_write]
+
+    task_research = Task(
+        description=f"""
+        1. Research CPF housing policy on this topic: {topic}
+        2. Identify relevant CPF policies and guidelines
+        3. Gather supporting information from official CPF sources
+        """,
+        agent=agent_researcher,
+#        tools=[tool_cpf_search],
+        async_execution=True
+    )
+
+    task_analyze = Task(
+        description=f"""
+        1. Analyze the research findings on this topic: {topic}
+        2. Validate information accuracy
+        3. Identify the key points someone asking about this topic needs
+        """,
+        agent=agent_advisor,
+        context=[task_research],
+        async_execution=True
+    )
+
+    task_write = Task(
+        description=f"""
+        1. Create a clear and comprehensive response to: {user_query}
+        2. Include relevant policy details and practical implications
+        3. Structure the response for easy understanding
+        """,
+        agent=agent_writer,
+        context=[task_research, task_analyze]
+    )
+
+    return [task_research, task_analyze, task_write]
+
+def _crew_callbacks(parent):
+    """
+    Build step/task callbacks that record a span per agent LLM step and
+    per finished task. CrewAI does not report per-call usage, so token
+    counts on these spans are estimated with tiktoken.
+    """
+    lock = threading.Lock()
+    marks = {"step": time.perf_counter(), "task": time.perf_counter()}
+
+    def elapsed_since(key):
+        with lock:
+            now = time.perf_counter()
+            elapsed = (now - marks[key]) * 1000
+            marks[key] = now
+        return elapsed
+
+    def step_callback(step):
+        text = getattr(step, "text", None) or getattr(step, "output", None) or str(step)
+        record_span(
+            "agent_llm_call", elapsed_since("step"), parent=parent,
+            step_type=type(step).__name__, estimated=True,
+            completion_tokens=count_tokens(text),
+        )
+
+    def task_callback(output):
+        duration_ms = elapsed_since("task")
+        record_span(
+            "crew_task", duration_ms, parent=parent,
+            agent=str(output.agent), estimated=True,
+            prompt_tokens=count_tokens(output.description),
+            completion_tokens=count_tokens(output.raw),
+        )
+
+    return step_callback, task_callback
+
+# Function to process user query using CrewAI
+def process_crew_query(user_query):
+    """
+    Run the crew for a query. Research and analysis outputs are cached per
+    topic (topic_terms() of the question + corpus version), so a new
+    question on a researched topic only runs the writer agent.
+    """
+    with span("process_crew_query") as s:
+        terms = topic_terms(user_query)
+        signature = topic_signature(terms, current_corpus_version())
+        cached = task_cache.get(signature) if terms else None
+        s.set(cache_hit=cached is not None)
+
+        tasks = create_crew_tasks(user_query, ", ".join(terms) or user_query, cached)
+        step_callback, task_callback = _crew_callbacks(s)
+        crew = Crew(
+            agents=[agent_writer] if cached else [agent_researcher, agent_advisor, agent_writer],
+            tasks=tasks,
+            step_callback=step_callback,
+            task_callback=task_callback,
+            verbose=True
+        )
+        result = crew.kickoff()
+        usage = getattr(result, "token_usage", None) or getattr(crew, "usage_metrics", None)
+        if usage:
+            s.add_tokens(usage.prompt_tokens, usage.completion_tokens, DEFAULT_MODEL)
+
+        if not cached and terms:
+            research, analysis = tasks[0].output, tasks[1].output
+            if research and analysis:
+                task_cache.put(signature, research.raw, analysis.raw)
+        return result
@@ -0,0 +1,61 @@
+"""
+CPF contribution and projection computations, independent of the Streamlit UI.
+
+Nothing here imports streamlit, plotly or pandas, and the public names
+below are resolved on first use, so `import cpf_core` loads no submodule
+at all. The scalar calculator (cpf_core.calculator) needs only the
+standard library; numpy is loaded with the first vectorized engine used.
+
+    from cpf_core import calculate_contributions, get_age_group
+    from cpf_core import calculate_payroll_batch  # loads numpy
+"""
+import importlib
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    "calculate_allocations": "calculator",
+    "calculate_contributions": "calculator",
+    "format_milestone": "calculator",
+    "generate_explanation": "calculator",
+    "AGE_GROUPS": "policy",
+    "ALLOCATIONS": "policy",
+    "CPF_RATES": "policy",
+    "ORDINARY_WAGES_CEILING": "policy",
+    "ADDITIONAL_WAGES_CEILING": "policy",
+    "TOTAL_WAGES_CEILING": "policy",
+    "BRS_2024": "policy",
+    "FRS_2024": "policy",
+    "ERS_2024": "policy",
+    "age_on": "policy",
+    "get_age_group": "policy",
+    "POLICY": "tables",
+    "load_policy": "tables",
+    "calculate_contributions_batch": "batch",
+    "calculate_allocations_batch": "batch",
+    "calculate_payroll_batch": "batch",
+    "simulate_payroll_year": "batch",
+    "payroll_cents": "cents",
+    "calculate_future_balance": "projection",
+    "calculate_milestones": "milestones",
+    "calculate_milestones_batch": "milestones",
+    "simulate_projections": "montecarlo",
+    "sweep_projections": "sweep",
+    "affordability_grid": "housing",
+    "amortization_schedule": "housing",
+    "project_with_loan": "housing",
+    "estimate_payouts": "cpflife",
+    "project_member": "planning",
+    "generate_reports": "reports",
+}
+
+__all__ = sorted(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{_EXPORTS[name]}"), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,235 @@
+import datetime
+from typing import Dict, Optional
+import numpy as np
+from cpf_core.policy import AGE_GROUPS, month_index
+from cpf_core.tables import POLICY
+from cpf_core.projection import ALLOCATION_TABLE, date_parts
+
+# (total, employee, employer) rates indexed by policy row (edition and age band)
+CONTRIBUTION_RATE_TABLE = POLICY.rates
+
+# Column of each ceiling in POLICY.ceilings
+_ORDINARY, _TOTAL = 0, 2
+
+def ages_on(birth_dates: np.ndarray, on: datetime.date) -> np.ndarray:
+    """
+    Age in completed years for an array of birth dates.
+
+    Args:
+        birth_dates: Birth dates (anything convertible to datetime64[D])
+        on: Date to measure age at
+
+    Returns:
+        Integer array of ages
+    """
+    birth_index, day = date_parts(birth_dates)
+    year, month = birth_index // 12, birth_index % 12 + 1
+    before_birthday = (on.month < month) | ((on.month == month) & (on.day < day))
+    return on.year - year - before_birthday
+
+def rows_for_birth_dates(birth_dates: np.ndarray, on: datetime.date) -> np.ndarray:
+    """Policy table row for each member in the edition in force on the given date."""
+    return POLICY.rows(ages_on(birth_dates, on), month_index(on))
+
+def calculate_contributions_batch(
+    ordinary_wages: np.ndarray,
+    additional_wages: np.ndarray,
+    rows: np.ndarray,
+    total_wages_ytd: np.ndarray = 0.0
+) -> Dict[str, np.ndarray]:
+    """
+    calculate_contributions() for many employees at once.
+
+    Applies the same ceilings in the same order as the scalar function,
+    so each row gives the same floats as a scalar call.
+
+    Args:
+        ordinary_wages: Monthly ordinary wages
+        additional_wages: Additional wages (bonus, etc.)
+        rows: Policy table row per employee (see rows_for_birth_dates)
+        total_wages_ytd: Year-to-date wages before current contribution
+
+    Returns:
+        Dictionary of total_cpf, employee_share and employer_share arrays,
+        plus the capped ordinary and additional wages they were charged on
+    """
+    ordinary_wages = np.asarray(ordinary_wages, dtype=np.float64)
+    additional_wages = np.asarray(additional_wages, dtype=np.float64)
+    rates = CONTRIBUTION_RATE_TABLE[rows]
+    rate, employee_rate = rates[:, 0], rates[:, 1]
+    ceilings = POLICY.ceilings[np.asarray(rows) // POLICY.n_bands]
+
+    remaining_ceiling = np.maximum(0, ceilings[:, _TOTAL] - np.asarray(total_wages_ytd, dtype=np.float64))
+    capped_ordinary_wages = np.minimum(ordinary_wages, ceilings[:, _ORDINARY])
+    remaining_aw_ceiling = np.maximum(0, remaining_ceiling - capped_ordinary_wages)
+    capped_additional_wages = np.minimum(additional_wages, remaining_aw_ceiling)
+
+    total_cpf = (rate * capped_ordinary_wages) + (rate * capped_additional_wages)
+    employee_share = (employee_rate * capped_ordinary_wages) + (employee_rate * capped_additional_wages)
+    return {
+        "total_cpf": total_cpf,
+        "employee_share": employee_share,
+        "employer_share": total_cpf - employee_share,
+        "capped_ordinary_wages": capped_ordinary_wages,
+        "capped_additional_wages": capped_additional_wages,
+    }
+
+def calculate_allocations_batch(
+    total_cpf: np.ndarray,
+    rows: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    calculate_allocations() for many contributions at once.
+
+    Args:
+        total_cpf: Total CPF contribution amounts
+        rows: Policy table row per contribution
+
+    Returns:
+        Dictionary of medisave, special and ordinary allocation arrays
+    """
+    total_cpf = np.asarray(total_cpf, dtype=np.float64)
+    allocation = ALLOCATION_TABLE[rows]
+    positive = total_cpf > 0
+
+    medisave = np.where(positive, np.round(allocation[:, 0] * total_cpf, 2), 0.0)
+    special = np.where(positive, np.round(allocation[:, 1] * total_cpf, 2), 0.0)
+    ordinary = np.where(positive, np.round(total_cpf - medisave - special, 2), 0.0)
+    return {"medisave": medisave, "special": special, "ordinary": ordinary}
+
+def calculate_rows_batch(
+    ordinary_wages: np.ndarray,
+    additional_wages: np.ndarray,
+    rows: np.ndarray,
+    total_wages_ytd=0.0,
+    exact: bool = False
+) -> Dict[str, np.ndarray]:
+    """
+    Contributions and allocations for known policy rows.
+
+    Args:
+        ordinary_wages: Monthly ordinary wages
+        additional_wages: Additional wages (bonus, etc.)
+        rows: Policy table row per employee
+        total_wages_ytd: Year-to-date wages before this month
+        exact: Use the integer-cents kernel (cpf_core.cents), with the CPF
+            Board's rounding, instead of float arithmetic
+
+    Returns:
+        Dictionary of the contribution and allocation arrays, in dollars
+    """
+    if exact:
+        from cpf_core.cents import payroll_cents, to_dollars
+        cents = payroll_cents(ordinary_wages, additional_wages, rows, total_wages_ytd)
+        return {name: to_dollars(values) for name, values in cents.items()}
+    contributions = calculate_contributions_batch(ordinary_wages, additional_wages, rows, total_wages_ytd)
+    return dict(**contributions, **calculate_allocations_batch(contributions["total_cpf"], rows))
+
+def calculate_payroll_batch(
+    ordinary_wages: np.ndarray,
+    additional_wages: np.ndarray,
+    birth_dates: np.ndarray,
+    on: datetime.date,
+    total_wages_ytd: Optional[np.ndarray] = None,
+    exact: bool = False
+) -> Dict[str, np.ndarray]:
+    """
+    Contributions and account allocations for a payroll month.
+
+    Args:
+        ordinary_wages: Monthly ordinary wages
+        additional_wages: Additional wages (bonus, etc.)
+        birth_dates: Employee birth dates
+        on: Contribution month (age is measured on this date)
+        total_wages_ytd: Year-to-date wages before this month (default zero)
+        exact: Compute in integer cents with CPF rounding (see calculate_rows_batch)
+
+    Returns:
+        Dictionary with age_group plus the contribution and allocation arrays
+    """
+    rows = rows_for_birth_dates(birth_dates, on)
+    results = calculate_rows_batch(
+        ordinary_wages,
+        additional_wages,
+        rows,
+        0.0 if total_wages_ytd is None else total_wages_ytd,
+        exact
+    )
+    return dict(age_group=np.array(AGE_GROUPS)[rows % POLICY.n_bands], **results)
+
+# Per-month results of simulate_payroll_year, in output order
+YEAR_OUTPUT_COLUMNS = (
+    "total_wages_ytd", "aw_ceiling_remaining", "capped_ordinary_wages", "capped_additional_wages",
+    "total_cpf", "employee_share", "employer_share", "medisave", "special", "ordinary",
+)
+
+def simulate_payroll_year(
+    ordinary_wages: np.ndarray,
+    additional_wages: np.ndarray,
+    birth_dates: np.ndarray,
+    year: int,
+    opening_ordinary_ytd: Optional[np.ndarray] = None,
+    opening_additional_ytd: Optional[np.ndarray] = None,
+    exact: bool = False
+) -> Dict[str, np.ndarray]:
+    """
+    Run a calendar year of monthly payroll for many employees.
+
+    Months are processed in order with the employees as one vector, so
+    the year takes 12 array steps instead of 12 x N scalar calls. The
+    Additional Wages ceiling for the year is the total wages ceiling less
+    the ordinary wages subject to CPF over the whole year; each month's
+    AW is charged against what is left of it. Every month goes through
+    calculate_contributions_batch(), with total_wages_ytd set so that its
+    remaining-ceiling arithmetic yields that running AW ceiling. Age
+    bands and the policy edition are taken on the first of each month,
+    as in a monthly payroll run.
+
+    Args:
+        ordinary_wages: Monthly ordinary wages, shape (employees, 12)
+        additional_wages: Additional wages paid in each month, shape (employees, 12)
+        birth_dates: Employee birth dates, shape (employees,)
+        year: Calendar year of the payroll
+        opening_ordinary_ytd: OW subject to CPF this year before the first month
+            (for runs that start mid-year with those months zeroed)
+        opening_additional_ytd: AW subject to CPF this year before the first month
+        exact: Compute each month in integer cents with CPF rounding (see calculate_rows_batch)
+
+    Returns:
+        Dictionary of (employees, 12) arrays keyed by YEAR_OUTPUT_COLUMNS;
+        total_wages_ytd and aw_ceiling_remaining are as at the start of each month
+    """
+    ordinary_wages = np.asarray(ordinary_wages, dtype=np.float64)
+    additional_wages = np.asarray(additional_wages, dtype=np.float64)
+    if ordinary_wages.shape != additional_wages.shape or ordinary_wages.shape[1:] != (12,):
+        raise ValueError("Wages must have shape (employees, 12)")
+
+    n_employees = len(ordinary_wages)
+    ordinary_ytd = np.zeros(n_employees) + (0.0 if opening_ordinary_ytd is None else opening_ordinary_ytd)
+    additional_ytd = np.zeros(n_employees) + (0.0 if opening_additional_ytd is None else opening_additional_ytd)
+
+    # OW ceilings can change between editions, so cap each month with its own edition
+    month_starts = [datetime.date(year, month + 1, 1) for month in range(12)]
+    editions = POLICY.edition([month_index(start) for start in month_starts])
+    capped_ordinary = np.minimum(ordinary_wages, POLICY.ceilings[editions, _ORDINARY])
+    ordinary_year = ordinary_ytd + capped_ordinary.sum(axis=1)
+
+    results = {name: np.empty((n_employees, 12)) for name in YEAR_OUTPUT_COLUMNS}
+    for month, start in enumerate(month_starts):
+        rows = rows_for_birth_dates(birth_dates, start)
+        total_ceiling = POLICY.ceilings[editions[month], _TOTAL]
+        # Charged to the kernel so that total - ytd - this month's OW = AW ceiling left
+        charged_ytd = ordinary_year - capped_ordinary[:, month] + additional_ytd
+        contributions = calculate_rows_batch(
+            ordinary_wages[:, month], additional_wages[:, month], rows, charged_ytd, exact
+        )
+
+        results["total_wages_ytd"][:, month] = ordinary_ytd + additional_ytd
+        results["aw_ceiling_remaining"][:, month] = np.maximum(0, total_ceiling - ordinary_year - additional_ytd)
+        for name, values in contributions.items():
+            results[name][:, month] = values
+
+        ordinary_ytd = ordinary_ytd + contributions["capped_ordinary_wages"]
+        additional_ytd = additional_ytd + contributions["capped_additional_wages"]
+
+    return results
@@ -0,0 +1,120 @@
+"""
+Single-member CPF calculations in plain Python.
+
+Imports nothing beyond the standard library and cpf_core.policy, so a
+script can compute one member's contributions without loading numpy;
+the vectorized engines live in cpf_core.batch and cpf_core.projection.
+"""
+from typing import Tuple, Optional
+from cpf_core.policy import ALLOCATIONS, CPF_RATES, TOTAL_WAGES_CEILING, ORDINARY_WAGES_CEILING
+
+def calculate_contributions(
+    ordinary_wages: float,
+    additional_wages: float,
+    age_group: str,
+    total_wages_ytd: float = 0.0
+) -> Tuple[float, float, float]:
+    """
+    Calculate CPF contributions with consideration for YTD wages.
+    
+    Args:
+        ordinary_wages: Monthly ordinary wages
+        additional_wages: Additional wages (bonus, etc.)
+        age_group: Age group category
+        total_wages_ytd: Year-to-date wages before current contribution
+        
+    Returns:
+        Tuple containing total CPF, employee share, and employer share
+    """
+    rate, employee_rate, employer_rate = CPF_RATES[age_group]
+    
+    # Check total wages ceiling
+    remaining_ceiling = max(0, TOTAL_WAGES_CEILING - total_wages_ytd)
+    
+    # Cap ordinary wages
+    capped_ordinary_wages = min(ordinary_wages, ORDINARY_WAGES_CEILING)
+    
+    # Calculate remaining ceiling for additional wages
+    remaining_aw_ceiling = max(0, remaining_ceiling - capped_ordinary_wages)
+    capped_additional_wages = min(additional_wages, remaining_aw_ceiling)
+    
+    # Calculate contributions
+    total_cpf = (rate * capped_ordinary_wages) + (rate * capped_additional_wages)
+    employee_share = (employee_rate * capped_ordinary_wages) + (employee_rate * capped_additional_wages)
+    employer_share = total_cpf - employee_share
+    
+    return total_cpf, employee_share, employer_share
+
+def calculate_allocations(
+    total_cpf: float,
+    age_group: str
+) -> Tuple[float, float, float]:
+    """
+    Calculate allocations for CPF accounts.
+    
+    Args:
+        total_cpf: Total CPF contribution amount
+        age_group: Age group category
+    
+    Returns:
+        Tuple containing Medisave, Special, and Ordinary account allocations
+    """
+    if total_cpf <= 0:
+        return 0, 0, 0
+
+    medisave_rate, special_rate, ordinary_rate = ALLOCATIONS[age_group]
+    
+    medisave_allocation = round(medisave_rate * total_cpf, 2)
+    special_allocation = round(special_rate * total_cpf, 2)
+    ordinary_allocation = round(total_cpf - medisave_allocation - special_allocation, 2)
+    
+    return medisave_allocation, special_allocation, ordinary_allocation
+
+def generate_explanation(
+    ordinary_wages: float,
+    total_cpf: float,
+    employee_share: float,
+    employer_share: float,
+    age_group: str,
+    medisave: float,
+    special: float,
+    ordinary: float
+) -> str:
+    """Generate a detailed explanation of the CPF contribution calculation."""
+    
+    total_rate, employee_rate, employer_rate = CPF_RATES[age_group]
+    
+    explanation = f"""
+    ### 📊 Understanding Your CPF Contribution
+
+    #### 💰 Contribution Breakdown
+    Based on your monthly ordinary wages of ${ordinary_wages:,.2f}:
+    
+    * Your contribution rate is {employee_rate*100:.1f}% = ${employee_share:,.2f}
+    * Your employer's contribution rate is {employer_rate*100:.1f}% = ${employer_share:,.2f}
+    * Total contribution rate is {total_rate*100:.1f}% = ${total_cpf:,.2f}
+
+    #### 🏦 Account Allocation Details
+    Your monthly contribution of ${total_cpf:,.2f} is distributed as follows:
+    
+    * Ordinary Account (for housing, investment, education):
+        * {ALLOCATIONS[age_group][2]*100:.1f}% = ${ordinary:,.2f}
+    * Special Account (for retirement):
+        * {ALLOCATIONS[age_group][1]*100:.1f}% = ${special:,.2f}
+    * MediSave Account (for healthcare):
+        * {ALLOCATIONS[age_group][0]*100:.1f}% = ${medisave:,.2f}
+
+    #### 📈 Key Financial Insights
+    * Your annual CPF contribution (excluding bonuses) would be: ${total_cpf*12:,.2f}
+    * This represents ${(total_cpf/ordinary_wages*100):.1f}% of your monthly income
+    """
+    
+    return explanation
+
+def format_milestone(months: Optional[float], horizon_years: int) -> str:
+    """Describe the months until a milestone, as returned by calculate_milestones."""
+    if months is None:
+        return f"Not reached within {horizon_years} years at current contributions"
+    if months == 0:
+        return "Already achieved"
+    return f"Will reach in approximately {months / 12:.1f} years"
@@ -0,0 +1,229 @@
+"""
+Fixed-point CPF arithmetic on int64 cents with CPF's rounding rules.
+
+    python -m cpf_core.cents --rows 1000000
+
+checks the kernel against the Decimal reference on random rows and
+reports the speed of both.
+
+Rounding follows the CPF Board's convention for contributions:
+
+- the total contribution is rounded to the nearest dollar (50 cents up);
+- the employee's share drops the cents;
+- the employer's share is the total less the employee's share.
+
+The MA and SA allocations are rounded half up to the cent and the OA
+takes the remainder, so the three accounts always add up to the total.
+
+Rates and allocation ratios are held in units of 1/10,000 (0.105 is
+1050), so every product is an exact integer and all rounding is integer
+division.
+"""
+import sys
+import time
+import argparse
+from decimal import Decimal, ROUND_FLOOR, ROUND_HALF_UP
+from typing import Dict, Optional
+import numpy as np
+from cpf_core.tables import POLICY
+
+# Rates and allocation ratios are integers in these units
+RATE_UNIT = 10_000
+
+CENTS_PER_DOLLAR = 100
+
+def _to_units(table: np.ndarray) -> np.ndarray:
+    units = np.rint(table * RATE_UNIT).astype(np.int64)
+    if not np.allclose(units / RATE_UNIT, table, rtol=0, atol=1e-12):
+        raise ValueError(f"Policy rates need more than {len(str(RATE_UNIT)) - 1} decimal places")
+    return units
+
+# Indexed by policy row, like CONTRIBUTION_RATE_TABLE and ALLOCATION_TABLE
+RATE_UNITS = _to_units(POLICY.rates)  # total, employee, employer
+ALLOCATION_UNITS = _to_units(POLICY.allocations)  # MA, SA, OA
+CEILING_CENTS = np.rint(POLICY.ceilings * CENTS_PER_DOLLAR).astype(np.int64)
+
+def to_cents(amounts) -> np.ndarray:
+    """Dollar amounts (at most two decimals) as int64 cents."""
+    return np.rint(np.asarray(amounts, dtype=np.float64) * CENTS_PER_DOLLAR).astype(np.int64)
+
+def to_dollars(cents) -> np.ndarray:
+    """int64 cents as float dollars."""
+    return np.asarray(cents) / CENTS_PER_DOLLAR
+
+def _divide_half_up(numerator: np.ndarray, denominator: int) -> np.ndarray:
+    """Round numerator / denominator half up, for non-negative integers."""
+    return (2 * numerator + denominator) // (2 * denominator)
+
+def contributions_cents(
+    ordinary_cents: np.ndarray,
+    additional_cents: np.ndarray,
+    rows: np.ndarray,
+    total_wages_ytd_cents: np.ndarray = 0
+) -> Dict[str, np.ndarray]:
+    """
+    CPF contributions in cents with CPF rounding.
+
+    Applies the same ceilings in the same order as
+    calculate_contributions_batch(), in integer cents.
+
+    Args:
+        ordinary_cents: Monthly ordinary wages in cents
+        additional_cents: Additional wages in cents
+        rows: Policy table row per employee (see batch.rows_for_birth_dates)
+        total_wages_ytd_cents: Year-to-date wages before this month, in cents
+
+    Returns:
+        Dictionary of int64 cent arrays: total_cpf, employee_share,
+        employer_share, capped_ordinary_wages and capped_additional_wages
+    """
+    ordinary_cents = np.asarray(ordinary_cents, dtype=np.int64)
+    additional_cents = np.asarray(additional_cents, dtype=np.int64)
+    rows = np.asarray(rows)
+    rates = RATE_UNITS[rows]
+    ceilings = CEILING_CENTS[rows // POLICY.n_bands]
+
+    remaining_ceiling = np.maximum(0, ceilings[:, 2] - np.asarray(total_wages_ytd_cents, dtype=np.int64))
+    capped_ordinary = np.minimum(ordinary_cents, ceilings[:, 0])
+    capped_additional = np.minimum(additional_cents, np.maximum(0, remaining_ceiling - capped_ordinary))
+    wages = capped_ordinary + capped_additional
+
+    # rate units x cents -> whole dollars, then back to cents
+    per_dollar = RATE_UNIT * CENTS_PER_DOLLAR
+    total_cpf = _divide_half_up(rates[:, 0] * wages, per_dollar) * CENTS_PER_DOLLAR
+    employee_share = (rates[:, 1] * wages // per_dollar) * CENTS_PER_DOLLAR
+    return {
+        "total_cpf": total_cpf,
+        "employee_share": employee_share,
+        "employer_share": total_cpf - employee_share,
+        "capped_ordinary_wages": capped_ordinary,
+        "capped_additional_wages": capped_additional,
+    }
+
+def allocations_cents(total_cents: np.ndarray, rows: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Split contributions in cents across MA, SA and OA.
+
+    Args:
+        total_cents: Total CPF contributions in cents
+        rows: Policy table row per contribution
+
+    Returns:
+        Dictionary of int64 cent arrays: medisave, special and ordinary
+    """
+    total_cents = np.maximum(np.asarray(total_cents, dtype=np.int64), 0)
+    allocation = ALLOCATION_UNITS[np.asarray(rows)]
+    medisave = _divide_half_up(total_cents * allocation[:, 0], RATE_UNIT)
+    special = _divide_half_up(total_cents * allocation[:, 1], RATE_UNIT)
+    return {"medisave": medisave, "special": special, "ordinary": total_cents - medisave - special}
+
+def payroll_cents(
+    ordinary_wages: np.ndarray,
+    additional_wages: np.ndarray,
+    rows: np.ndarray,
+    total_wages_ytd: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Contributions and allocations from dollar wages, as int64 cents.
+
+    Args:
+        ordinary_wages: Monthly ordinary wages in dollars
+        additional_wages: Additional wages in dollars
+        rows: Policy table row per employee
+        total_wages_ytd: Year-to-date wages before this month, in dollars
+
+    Returns:
+        Dictionary of int64 cent arrays from contributions_cents() and allocations_cents()
+    """
+    contributions = contributions_cents(
+        to_cents(ordinary_wages),
+        to_cents(additional_wages),
+        rows,
+        0 if total_wages_ytd is None else to_cents(total_wages_ytd)
+    )
+    return dict(**contributions, **allocations_cents(contributions["total_cpf"], rows))
+
+def payroll_decimal(
+    ordinary_wages: Decimal,
+    additional_wages: Decimal,
+    row: int,
+    total_wages_ytd: Decimal = Decimal(0)
+) -> Dict[str, Decimal]:
+    """
+    One employee's contributions and allocations with Decimal arithmetic.
+
+    The reference the integer kernel is checked against: the same rules,
+    written directly from the CPF rounding conventions.
+    """
+    rates = [Decimal(str(rate)) for rate in POLICY.rates[row].tolist()]
+    allocation = [Decimal(str(ratio)) for ratio in POLICY.allocations[row].tolist()]
+    ceilings = [Decimal(str(ceiling)) for ceiling in POLICY.ceilings[row // POLICY.n_bands].tolist()]
+    dollar, cent = Decimal(1), Decimal("0.01")
+
+    remaining_ceiling = max(Decimal(0), ceilings[2] - total_wages_ytd)
+    capped_ordinary = min(ordinary_wages, ceilings[0])
+    capped_additional = min(additional_wages, max(Decimal(0), remaining_ceiling - capped_ordinary))
+    wages = capped_ordinary + capped_additional
+
+    total_cpf = (rates[0] * wages).quantize(dollar, rounding=ROUND_HALF_UP)
+    employee_share = (rates[1] * wages).quantize(dollar, rounding=ROUND_FLOOR)
+    medisave = (total_cpf * allocation[0]).quantize(cent, rounding=ROUND_HALF_UP)
+    special = (total_cpf * allocation[1]).quantize(cent, rounding=ROUND_HALF_UP)
+    return {
+        "total_cpf": total_cpf,
+        "employee_share": employee_share,
+        "employer_share": total_cpf - employee_share,
+        "capped_ordinary_wages": capped_ordinary,
+        "capped_additional_wages": capped_additional,
+        "medisave": medisave,
+        "special": special,
+        "ordinary": total_cpf - medisave - special,
+    }
+
+def verify(rows: int = 100_000, seed: int = 0) -> Dict[str, float]:
+    """
+    Compare payroll_cents() with payroll_decimal() on random wages.
+
+    Returns:
+        Dictionary with mismatches and the rows per second of each path
+    """
+    rng = np.random.default_rng(seed)
+    ordinary = rng.integers(0, 1_000_000, rows)  # cents
+    additional = np.where(rng.random(rows) < 0.2, rng.integers(0, 5_000_000, rows), 0)
+    ytd = rng.integers(0, 11_000_000, rows)
+    policy_rows = rng.integers(0, len(RATE_UNITS), rows)
+
+    start = time.perf_counter()
+    kernel = payroll_cents(ordinary / 100, additional / 100, policy_rows, ytd / 100)
+    kernel_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mismatches = 0
+    for i in range(rows):
+        reference = payroll_decimal(
+            Decimal(int(ordinary[i])) / 100, Decimal(int(additional[i])) / 100,
+            int(policy_rows[i]), Decimal(int(ytd[i])) / 100
+        )
+        mismatches += any(int(value * 100) != kernel[name][i] for name, value in reference.items())
+    decimal_seconds = time.perf_counter() - start
+
+    return {
+        "rows": rows,
+        "mismatches": mismatches,
+        "kernel_rows_per_second": rows / kernel_seconds,
+        "decimal_rows_per_second": rows / decimal_seconds,
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check the integer-cents kernel against Decimal")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    stats = verify(args.rows, args.seed)
+    for name, value in stats.items():
+        print(f"{name}: {value:,.0f}")
+    return 1 if stats["mismatches"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import datetime
+import functools
+from typing import Dict, Optional, Sequence
+import numpy as np
+from cpf_core.milestones import MILESTONES, retirement_sum_schedule
+from cpf_core.projection import ages_by_month
+
+PLANS = ("Basic", "Standard", "Escalating")
+
+PAYOUT_AGE = 65
+
+# Age at which the SA and OA are used to form the Retirement Account
+RA_FORMATION_AGE = 55
+
+# Payouts are priced up to this age; survival beyond it is negligible
+MAX_AGE = 110
+
+# Interest credited on the Retirement Account and used to price the annuity
+RA_INTEREST_RATE = 0.04
+
+# Escalating Plan payouts rise this much every year
+ESCALATION_RATE = 0.02
+
+# The Basic Plan pays from the RA until about this age, then from the annuity
+BASIC_RA_PAYOUT_UNTIL = 90
+
+# Gompertz mortality (modal age at death, dispersion in years), an
+# approximation to recent Singapore resident life tables
+MORTALITY = {
+    "male": (87.0, 9.5),
+    "female": (91.0, 8.5),
+}
+
+def survival_curve(sex: str = "male", start_age: int = PAYOUT_AGE) -> np.ndarray:
+    """
+    Probability of being alive at each month after start_age.
+
+    Under Gompertz mortality with modal age m and dispersion b,
+    S(x) = exp(-exp((x0 - m) / b) * (exp((x - x0) / b) - 1)) given alive at x0.
+
+    Returns:
+        Array over months 0 .. (MAX_AGE - start_age) * 12 - 1
+    """
+    modal_age, dispersion = MORTALITY[sex]
+    years = np.arange((MAX_AGE - start_age) * 12) / 12
+    return np.exp(-np.exp((start_age - modal_age) / dispersion) * np.expm1(years / dispersion))
+
+@functools.lru_cache(maxsize=64)
+def annuity_factor(
+    plan: str,
+    sex: str = "male",
+    interest_rate: float = RA_INTEREST_RATE,
+    escalation: float = ESCALATION_RATE
+) -> float:
+    """
+    Premium needed at PAYOUT_AGE per dollar of first monthly payout.
+
+    Each plan's factor is the present value of its payout stream:
+
+    - Standard: level payouts for life, weighted by survival;
+    - Escalating: survival-weighted payouts rising by `escalation` a year;
+    - Basic: level payouts from the RA until BASIC_RA_PAYOUT_UNTIL, which
+      are refunded to the estate on death and so are not survival
+      weighted, then from the annuity for life.
+
+    Computed once per set of arguments and cached.
+    """
+    months = np.arange((MAX_AGE - PAYOUT_AGE) * 12)
+    discount = (1 + interest_rate / 12) ** -months
+    survival = survival_curve(sex)
+    if plan == "Standard":
+        return float((survival * discount).sum())
+    if plan == "Escalating":
+        return float((survival * discount * (1 + escalation) ** (months // 12)).sum())
+    if plan == "Basic":
+        from_ra = months < (BASIC_RA_PAYOUT_UNTIL - PAYOUT_AGE) * 12
+        return float(np.where(from_ra, discount, survival * discount).sum())
+    raise ValueError(f"Unknown CPF LIFE plan: {plan}")
+
+def annuity_factors(
+    plans: Sequence[str] = PLANS,
+    sex: str = "male",
+    interest_rate: float = RA_INTEREST_RATE
+) -> np.ndarray:
+    """annuity_factor() for each plan, as an array in `plans` order."""
+    return np.array([annuity_factor(plan, sex, interest_rate) for plan in plans])
+
+def estimate_payouts(
+    ra_at_65,
+    plans: Sequence[str] = PLANS,
+    sex: str = "male",
+    interest_rate: float = RA_INTEREST_RATE
+) -> Dict[str, np.ndarray]:
+    """
+    First monthly CPF LIFE payout for each plan.
+
+    The whole RA balance at 65 is taken as the premium. Any number of
+    balances (members, simulated paths) are priced with one division by
+    the cached annuity factors.
+
+    Args:
+        ra_at_65: Retirement Account balance at 65, a number or an array
+        plans: Plans to price, from PLANS
+        sex: Key of MORTALITY
+        interest_rate: Interest used to price the annuity
+
+    Returns:
+        Dictionary of first monthly payouts per plan, shaped like ra_at_65
+    """
+    balances = np.asarray(ra_at_65, dtype=np.float64)
+    payouts = balances[..., None] / annuity_factors(plans, sex, interest_rate)
+    return {plan: payouts[..., i] for i, plan in enumerate(plans)}
+
+def ra_at_65(
+    sa_at_55,
+    oa_at_55,
+    retirement_sum,
+    interest_rate: float = RA_INTEREST_RATE,
+    monthly_top_up=0.0
+) -> np.ndarray:
+    """
+    Retirement Account balance at 65 from balances at 55.
+
+    At 55 the SA, then the OA, fill the RA up to the retirement sum the
+    member sets aside (usually the FRS in force that year). The RA then
+    earns interest for ten years, with optional monthly top-ups.
+
+    Args:
+        sa_at_55: SA balance at 55
+        oa_at_55: OA balance at 55
+        retirement_sum: Retirement sum to set aside at 55
+        interest_rate: RA interest rate
+        monthly_top_up: Monthly RA contribution between 55 and 65
+
+    Returns:
+        Array of RA balances at 65, broadcast over the inputs
+    """
+    opening = np.minimum(np.asarray(sa_at_55) + np.asarray(oa_at_55), retirement_sum)
+    n_months = (PAYOUT_AGE - RA_FORMATION_AGE) * 12
+    growth = (1 + interest_rate / 12) ** n_months
+    top_ups = np.asarray(monthly_top_up) * ((growth - 1) / (interest_rate / 12) if interest_rate else n_months)
+    return opening * growth + top_ups
+
+def ra_at_65_from_projection(
+    monthly_data: Dict[str, np.ndarray],
+    birth_date: datetime.date,
+    start_date: Optional[datetime.date] = None,
+    retirement_sum: str = "FRS"
+) -> Optional[float]:
+    """
+    RA balance at 65 for a calculate_future_balance() projection.
+
+    Takes the SA and OA in the month the member turns RA_FORMATION_AGE and
+    sets aside `retirement_sum` as scheduled by retirement_sum_schedule()
+    for that month.
+
+    Returns:
+        RA balance at 65, or None if the member is already past
+        RA_FORMATION_AGE or does not reach it within the projection
+    """
+    months = np.asarray(monthly_data["Months"])
+    formed = ages_by_month(birth_date, months, start_date) >= RA_FORMATION_AGE
+    if not formed.any() or formed[0]:
+        return None
+    month = int(formed.argmax())
+    sums = retirement_sum_schedule(months[month:month + 1], start_date)[0]
+    return float(ra_at_65(
+        monthly_data["SA"][month],
+        monthly_data["OA"][month],
+        sums[MILESTONES.index(retirement_sum)]
+    ))
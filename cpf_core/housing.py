@@ -0,0 +1,264 @@
+import datetime
+from typing import Dict, Optional
+import numpy as np
+from cpf_core.projection import DEFAULT_INTEREST_RATES, calculate_future_balance
+
+# Indicative loan terms; HDB charges 0.1% above the OA rate, bank rates float
+LOAN_TYPES = {
+    "HDB": {
+        "rate": 0.026,
+        "max_tenure": 25,
+        "loan_to_value": 0.75,
+        "min_cash_downpayment": 0.0,
+        "max_debt_ratio": 0.30,  # Mortgage Servicing Ratio
+    },
+    "Bank": {
+        "rate": 0.035,
+        "max_tenure": 30,
+        "loan_to_value": 0.75,
+        "min_cash_downpayment": 0.05,
+        "max_debt_ratio": 0.55,  # Total Debt Servicing Ratio
+    },
+}
+
+# Purchase prices searched by largest_affordable_prices()
+AFFORDABILITY_PRICES = np.arange(50_000, 2_000_001, 5_000, dtype=float)
+
+def _growth_minus_one_over_rate(monthly_rate: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """((1 + r)^t - 1) / r, equal to t when r is zero."""
+    safe_rate = np.where(monthly_rate > 0, monthly_rate, 1.0)
+    return np.where(monthly_rate > 0, np.expm1(months * np.log1p(monthly_rate)) / safe_rate, months)
+
+def monthly_installment(principal, annual_rate, tenure_years) -> np.ndarray:
+    """
+    Level monthly instalment that repays a loan over its tenure.
+
+    All arguments broadcast against each other, so one call prices a
+    whole grid of loans.
+
+    Args:
+        principal: Loan amount
+        annual_rate: Annual interest rate, compounded monthly
+        tenure_years: Loan tenure in years
+
+    Returns:
+        Array of monthly instalments
+    """
+    principal = np.asarray(principal, dtype=np.float64)
+    monthly_rate = np.asarray(annual_rate, dtype=np.float64) / 12
+    n_months = np.asarray(tenure_years) * 12
+    return principal * (1 + monthly_rate) ** n_months / _growth_minus_one_over_rate(monthly_rate, n_months)
+
+def amortization_schedule(
+    principal,
+    annual_rate,
+    tenure_years,
+    months: int
+) -> Dict[str, np.ndarray]:
+    """
+    Month-by-month repayment schedule of one or many loans.
+
+    The outstanding balance after t payments has the closed form
+    P(1 + r)^t - A((1 + r)^t - 1) / r, so every month of every loan is
+    computed at once. Months past the tenure are zero.
+
+    Args:
+        principal: Loan amount
+        annual_rate: Annual interest rate, compounded monthly
+        tenure_years: Loan tenure in years
+        months: Length of the schedule in months
+
+    Returns:
+        Dictionary of arrays shaped (..., months), broadcast over the
+        inputs: installment, interest, principal and outstanding (after
+        the month's payment)
+    """
+    principal, annual_rate, tenure_years = np.broadcast_arrays(
+        np.asarray(principal, dtype=np.float64),
+        np.asarray(annual_rate, dtype=np.float64),
+        np.asarray(tenure_years)
+    )
+    installment = monthly_installment(principal, annual_rate, tenure_years)[..., None]
+    monthly_rate = annual_rate[..., None] / 12
+    n_months = tenure_years[..., None] * 12
+    paid = np.arange(1, months + 1)
+
+    growth = (1 + monthly_rate) ** paid
+    outstanding = principal[..., None] * growth - installment * _growth_minus_one_over_rate(monthly_rate, paid)
+    outstanding = np.where(paid < n_months, np.maximum(outstanding, 0.0), 0.0)
+    opening = np.concatenate([principal[..., None], outstanding[..., :-1]], axis=-1)
+    active = paid <= n_months
+    interest = np.where(active, opening * monthly_rate, 0.0)
+    return {
+        "installment": np.where(active, installment, 0.0),
+        "interest": interest,
+        "principal": np.where(active, opening - outstanding, 0.0),
+        "outstanding": outstanding,
+    }
+
+def project_with_loan(
+    monthly_contribution: float,
+    years: int,
+    price: float,
+    loan_type: str = "HDB",
+    tenure_years: Optional[int] = None,
+    annual_rate: Optional[float] = None,
+    oa_share: float = 1.0,
+    annual_increment: float = 0.03,
+    interest_rates: Dict[str, float] = DEFAULT_INTEREST_RATES,
+    birth_date: Optional[datetime.date] = None,
+    start_date: Optional[datetime.date] = None,
+    initial_balances: Optional[Dict[str, float]] = None
+) -> Dict[str, object]:
+    """
+    CPF projection with a home bought in the first month.
+
+    The OA pays as much of the downpayment as the loan allows, then
+    `oa_share` of every instalment through calculate_future_balance();
+    whatever the OA cannot cover is paid in cash.
+
+    Args:
+        monthly_contribution: Total monthly CPF contribution
+        years: Number of years to project
+        price: Purchase price
+        loan_type: Key of LOAN_TYPES
+        tenure_years: Loan tenure (defaults to the loan type's maximum)
+        annual_rate: Loan interest rate (defaults to the loan type's)
+        oa_share: Fraction of each instalment deducted from the OA
+        annual_increment: Expected annual salary increment
+        interest_rates: Dictionary of interest rates for each account
+        birth_date: Date of birth, for age-band progression
+        start_date: First projection month (defaults to today)
+        initial_balances: Opening OA/SA/MA balances
+
+    Returns:
+        Dictionary with monthly_data (as calculate_future_balance, with
+        OA_Withdrawn), schedule (as amortization_schedule), loan,
+        oa_downpayment, cash_downpayment and cash_installments (the part
+        of each instalment paid in cash)
+    """
+    terms = LOAN_TYPES[loan_type]
+    tenure_years = terms["max_tenure"] if tenure_years is None else tenure_years
+    annual_rate = terms["rate"] if annual_rate is None else annual_rate
+    balances = dict(initial_balances or {})
+
+    loan = price * terms["loan_to_value"]
+    downpayment = price - loan
+    oa_downpayment = min(downpayment - price * terms["min_cash_downpayment"], balances.get("OA", 0.0))
+    oa_downpayment = max(oa_downpayment, 0.0)
+    balances["OA"] = balances.get("OA", 0.0) - oa_downpayment
+
+    schedule = amortization_schedule(loan, annual_rate, tenure_years, years * 12)
+    monthly_data = calculate_future_balance(
+        monthly_contribution,
+        years,
+        annual_increment,
+        interest_rates,
+        birth_date=birth_date,
+        start_date=start_date,
+        initial_balances=balances,
+        oa_withdrawals=schedule["installment"] * oa_share
+    )
+    return {
+        "monthly_data": monthly_data,
+        "schedule": schedule,
+        "loan": loan,
+        "oa_downpayment": oa_downpayment,
+        "cash_downpayment": downpayment - oa_downpayment,
+        "cash_installments": schedule["installment"] - monthly_data["OA_Withdrawn"],
+    }
+
+def affordability_grid(
+    prices,
+    tenures,
+    rates,
+    monthly_income: float,
+    oa_balance: float,
+    oa_monthly: float,
+    cash_savings: float = 0.0,
+    monthly_cash: float = 0.0,
+    loan_type: str = "HDB"
+) -> Dict[str, np.ndarray]:
+    """
+    Which purchase prices are affordable, over price x tenure x rate.
+
+    A price is affordable when the downpayment fits the OA balance and
+    cash savings (with the loan type's minimum in cash), the instalment
+    is within the debt-servicing limit for the income, and the monthly OA
+    contribution plus `monthly_cash` covers the instalment. The whole
+    grid is one broadcast computation.
+
+    Args:
+        prices: Purchase prices, shape (P,)
+        tenures: Loan tenures in years, shape (T,)
+        rates: Annual loan interest rates, shape (R,)
+        monthly_income: Gross monthly income, for the debt-servicing limit
+        oa_balance: OA balance available for the downpayment
+        oa_monthly: Monthly OA contribution available for instalments
+        cash_savings: Cash available for the downpayment
+        monthly_cash: Cash available each month for instalments
+        loan_type: Key of LOAN_TYPES, for the loan limit and ratios
+
+    Returns:
+        Dictionary with installment, downpayment, oa_share (fraction of
+        the instalment covered by the OA contribution) and affordable, all
+        (P, T, R), and max_price (T, R), NaN where no price is affordable
+    """
+    terms = LOAN_TYPES[loan_type]
+    prices = np.asarray(prices, dtype=np.float64)
+    tenures = np.asarray(tenures)
+    rates = np.asarray(rates, dtype=np.float64)
+
+    installment = monthly_installment(
+        prices[:, None, None] * terms["loan_to_value"], rates[None, None, :], tenures[None, :, None]
+    )
+    downpayment = prices * (1 - terms["loan_to_value"])
+    min_cash = prices * terms["min_cash_downpayment"]
+    downpayment_ok = (
+        (min_cash <= cash_savings)
+        & (downpayment <= oa_balance + cash_savings)
+    )[:, None, None]
+    affordable = (
+        downpayment_ok
+        & (installment <= terms["max_debt_ratio"] * monthly_income)
+        & (installment <= oa_monthly + monthly_cash)
+    )
+    max_price = np.where(affordable, prices[:, None, None], -np.inf).max(axis=0)
+    return {
+        "installment": installment,
+        "downpayment": np.broadcast_to(downpayment[:, None, None], installment.shape),
+        "oa_share": np.minimum(oa_monthly / np.maximum(installment, 1e-9), 1.0),
+        "affordable": affordable,
+        "max_price": np.where(np.isfinite(max_price), max_price, np.nan),
+    }
+
+def largest_affordable_prices(
+    monthly_income: float,
+    oa_balance: float,
+    oa_monthly: float,
+    cash_savings: float = 0.0,
+    monthly_cash: float = 0.0,
+    prices: np.ndarray = AFFORDABILITY_PRICES
+) -> Dict[str, float]:
+    """
+    Largest affordable price per loan type at its standard rate and maximum tenure.
+
+    Args:
+        monthly_income: Gross monthly income
+        oa_balance: OA balance available for the downpayment
+        oa_monthly: Monthly OA contribution available for instalments
+        cash_savings: Cash available for the downpayment
+        monthly_cash: Cash available each month for instalments
+        prices: Purchase prices to search
+
+    Returns:
+        Dictionary of the largest affordable price per LOAN_TYPES key, NaN
+        where none of the prices is affordable
+    """
+    return {
+        loan_type: float(affordability_grid(
+            prices, [terms["max_tenure"]], [terms["rate"]], monthly_income, oa_balance,
+            oa_monthly, cash_savings, monthly_cash, loan_type
+        )["max_price"][0, 0])
+        for loan_type, terms in LOAN_TYPES.items()
+    }
@@ -0,0 +1,167 @@
+import datetime
+from typing import Dict, Optional
+import numpy as np
+from cpf_core.policy import month_index
+from cpf_core.tables import POLICY
+from cpf_core.projection import (
+    ALLOCATION_TABLE,
+    ACCOUNT_COLUMNS,
+    DEFAULT_INTEREST_RATES,
+    accumulate_balances,
+    band_schedule,
+    calculate_future_balance,
+    rate_factors,
+)
+
+MILESTONES = POLICY.RETIREMENT_SUM_COLUMNS  # BRS, FRS, ERS
+
+# Assumed yearly rise in the retirement sums after the last published edition
+RETIREMENT_SUM_GROWTH = 0.03
+
+# Milestones are searched at least this far ahead, whatever the chart shows
+MIN_HORIZON_YEARS = 40
+
+def retirement_sum_schedule(
+    months: np.ndarray,
+    start_date: Optional[datetime.date] = None,
+    growth: float = RETIREMENT_SUM_GROWTH
+) -> np.ndarray:
+    """
+    BRS, FRS and ERS in force in each projection month.
+
+    Months covered by a policy edition use its published sums; after the
+    last edition the sums rise by `growth` every January.
+
+    Args:
+        months: Month offsets from the start date
+        start_date: First projection month (defaults to today)
+        growth: Yearly rise after the last published edition
+
+    Returns:
+        Array of shape (months, 3) in MILESTONES order
+    """
+    index = month_index(start_date or datetime.date.today()) + np.asarray(months)
+    last_year = POLICY.effective_months[-1] // 12
+    years_after = np.maximum(index // 12 - last_year, 0)
+    return POLICY.retirement_sums[POLICY.edition(index)] * (1 + growth) ** years_after[:, None]
+
+def first_month_reached(balances: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    Months until the balance first reaches its target, along the last axis.
+
+    Month t is the balance after t + 1 months of contributions, so a
+    result of n means "reached after n months". Both the balance and the
+    target move, so every month is checked rather than assuming the gap
+    closes monotonically.
+
+    Args:
+        balances: Month-end balances, shape (..., months)
+        targets: Target per month, broadcastable to balances
+
+    Returns:
+        Float array of months, NaN where the target is never reached
+    """
+    reached = balances >= targets
+    first = reached.argmax(axis=-1).astype(np.float64) + 1
+    return np.where(reached.any(axis=-1), first, np.nan)
+
+def _solve(sa: np.ndarray, opening_sa, months: np.ndarray, start_date, growth) -> Dict[str, np.ndarray]:
+    targets = retirement_sum_schedule(months, start_date, growth)
+    opening_targets = retirement_sum_schedule(np.zeros(1, dtype=np.int64), start_date, growth)[0]
+    result = {}
+    for i, milestone in enumerate(MILESTONES):
+        months_needed = first_month_reached(sa, targets[:, i])
+        result[milestone] = np.where(np.asarray(opening_sa) >= opening_targets[i], 0.0, months_needed)
+    return result
+
+def calculate_milestones(
+    current_balances: Dict[str, float],
+    monthly_contribution: float,
+    years: int = MIN_HORIZON_YEARS,
+    annual_increment: float = 0.03,
+    interest_rates: Dict[str, float] = DEFAULT_INTEREST_RATES,
+    birth_date: Optional[datetime.date] = None,
+    start_date: Optional[datetime.date] = None,
+    growth: float = RETIREMENT_SUM_GROWTH
+) -> Dict[str, Optional[float]]:
+    """
+    Months until the Special Account reaches each retirement sum.
+
+    Runs calculate_future_balance() with the same inputs as the
+    projection chart, over at least MIN_HORIZON_YEARS, and finds the
+    first month the SA balance is at or above the retirement sum in
+    force that month. Salary increments, age-band and policy changes and
+    rising retirement sums are all on the trajectory.
+
+    Args:
+        current_balances: Opening OA/SA/MA balances
+        monthly_contribution: Total monthly CPF contribution
+        years: Projection length shown to the member
+        annual_increment: Expected annual salary increment
+        interest_rates: Dictionary of interest rates for each account
+        birth_date: Date of birth, for age-band progression
+        start_date: First projection month (defaults to today)
+        growth: Yearly rise of the retirement sums after the last edition
+
+    Returns:
+        Dictionary of months to BRS, FRS and ERS; 0 if already reached,
+        None if not reached within the horizon
+    """
+    horizon = max(years, MIN_HORIZON_YEARS)
+    projection = calculate_future_balance(
+        monthly_contribution, horizon, annual_increment, interest_rates,
+        birth_date=birth_date, start_date=start_date, initial_balances=current_balances
+    )
+    solved = _solve(
+        projection["SA"], current_balances.get("SA", 0.0), projection["Months"], start_date, growth
+    )
+    return {
+        milestone: None if np.isnan(months) else float(months)
+        for milestone, months in solved.items()
+    }
+
+def calculate_milestones_batch(
+    monthly_contributions: np.ndarray,
+    birth_dates: np.ndarray,
+    current_sa: np.ndarray = 0.0,
+    years: int = MIN_HORIZON_YEARS,
+    annual_increment: float = 0.03,
+    sa_interest_rate: float = DEFAULT_INTEREST_RATES["SA"],
+    start_date: Optional[datetime.date] = None,
+    growth: float = RETIREMENT_SUM_GROWTH
+) -> Dict[str, np.ndarray]:
+    """
+    calculate_milestones() for many members at once.
+
+    Builds every member's SA trajectory as one (members, months) array,
+    with each member's own age bands, and scans it against the
+    retirement sum schedule.
+
+    Args:
+        monthly_contributions: Total monthly CPF contribution per member
+        birth_dates: Birth date per member
+        current_sa: Opening SA balance per member
+        years: Projection length in years
+        annual_increment: Expected annual salary increment
+        sa_interest_rate: SA interest rate
+        start_date: First projection month (defaults to today)
+        growth: Yearly rise of the retirement sums after the last edition
+
+    Returns:
+        Dictionary of float arrays of months to BRS, FRS and ERS (NaN if
+        not reached within the horizon)
+    """
+    start_date = start_date or datetime.date.today()
+    months, rows = band_schedule(max(years, MIN_HORIZON_YEARS), np.asarray(birth_dates), start_date)
+    increments = np.where((months % 12 == 0) & (months > 0), 1 + annual_increment, 1.0)
+    contribution = (
+        np.asarray(monthly_contributions, dtype=np.float64)[:, None]
+        * np.cumprod(increments) * rate_factors(rows)
+    )
+    current_sa = np.broadcast_to(np.asarray(current_sa, dtype=np.float64), contribution.shape[:1])
+    sa = accumulate_balances(
+        contribution * ALLOCATION_TABLE[rows, ACCOUNT_COLUMNS["SA"]],
+        1 + sa_interest_rate / 12,
+        current_sa
+    )
+    return _solve(sa, current_sa, months, start_date, growth)
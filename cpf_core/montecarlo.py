@@ -0,0 +1,217 @@
+import os
+import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Sequence
+import numpy as np
+from cpf_core.milestones import MILESTONES, retirement_sum_schedule
+from cpf_core.projection import (
+    ACCOUNT_COLUMNS,
+    ALLOCATION_TABLE,
+    DEFAULT_INTEREST_RATES,
+    accumulate_balances,
+    accumulate_drawdown,
+    band_schedule,
+    rate_factors,
+)
+
+# CPF pays at least these rates, whatever the simulated rate path does
+RATE_FLOORS = {"OA": 0.025, "SA": 0.04, "MA": 0.04}
+
+PERCENTILES = (10, 50, 90)
+
+# Paths simulated per chunk; bounds peak memory to a few arrays of this many rows
+DEFAULT_CHUNK_PATHS = 1000
+
+# Above this many paths, chunks are spread over a process pool
+PROCESS_POOL_THRESHOLD = 100_000
+
+# Chunks queued per worker; each pending result holds a full histogram
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+# Log-spaced balance grid used to aggregate percentiles across chunks
+_BALANCE_EDGES = np.concatenate([[0.0], np.geomspace(1.0, 1e9, 4096)])
+
+def _simulate_chunk(
+    n_paths: int,
+    seed: np.random.SeedSequence,
+    current_contribution: float,
+    months: np.ndarray,
+    rows: np.ndarray,
+    annual_increment: float,
+    increment_volatility: float,
+    gap_probability: float,
+    mean_gap_months: float,
+    interest_rates: Dict[str, float],
+    rate_volatility: float,
+    initial_balances: Dict[str, float],
+    retirement_sums: np.ndarray,
+    oa_withdrawals: Optional[np.ndarray]
+) -> Dict[str, np.ndarray]:
+    """Simulate one chunk of paths as (paths, months) arrays and aggregate it."""
+    rng = np.random.default_rng(seed)
+    n_months = len(months)
+    n_years = max(1, -(-n_months // 12))
+    year_of_month = months // 12
+
+    # Salary: one random increment per path per year, none in the first year
+    increments = rng.normal(annual_increment, increment_volatility, (n_paths, n_years))
+    increments[:, 0] = 0.0
+    salary = np.cumprod(1 + np.maximum(increments, -0.5), axis=1)[:, year_of_month]
+
+    # Employment gaps: at most one per year, starting in a random month
+    has_gap = rng.random((n_paths, n_years)) < gap_probability
+    gap_start = rng.integers(0, 12, (n_paths, n_years))
+    gap_end = gap_start + rng.geometric(1 / max(mean_gap_months, 1), (n_paths, n_years))
+    month_of_year = np.arange(12)
+    unemployed = has_gap[..., None] & (month_of_year >= gap_start[..., None]) & (month_of_year < gap_end[..., None])
+    employed = ~unemployed.reshape(n_paths, n_years * 12)[:, :n_months]
+
+    contribution = current_contribution * rate_factors(rows) * salary * employed
+
+    # Interest: a yearly random walk shared by all accounts, floored per account
+    shocks = np.cumsum(rng.normal(0, rate_volatility, (n_paths, n_years)), axis=1)[:, year_of_month]
+    allocation = ALLOCATION_TABLE[rows]
+    balances = {}
+    for account in ("OA", "SA", "MA"):
+        rate = np.maximum(RATE_FLOORS[account], interest_rates[account] + shocks)
+        account_contribution = contribution * allocation[:, ACCOUNT_COLUMNS[account]]
+        opening = initial_balances.get(account, 0.0)
+        if account == "OA" and oa_withdrawals is not None:
+            balances[account], _ = accumulate_drawdown(account_contribution, oa_withdrawals, 1 + rate / 12, opening)
+        else:
+            balances[account] = accumulate_balances(account_contribution, 1 + rate / 12, opening)
+    total = balances["OA"] + balances["SA"] + balances["MA"]
+
+    # Histogram of total balance per month, flattened into one bincount
+    n_bins = len(_BALANCE_EDGES) + 1
+    bins = np.searchsorted(_BALANCE_EDGES, total, side="right")
+    histogram = np.bincount((np.arange(n_months) * n_bins + bins).ravel(), minlength=n_months * n_bins)
+
+    # Milestones are measured on SA against the rising sums, as in calculate_milestones
+    brs = balances["SA"] >= retirement_sums[:, MILESTONES.index("BRS")]
+    frs = balances["SA"] >= retirement_sums[:, MILESTONES.index("FRS")]
+    return {
+        "histogram": histogram.reshape(n_months, n_bins),
+        "brs": brs.sum(axis=0),
+        "frs": frs.sum(axis=0),
+        "ever_brs": int(brs.any(axis=1).sum()),
+        "ever_frs": int(frs.any(axis=1).sum()),
+    }
+
+def _percentile_from_histogram(histogram: np.ndarray, q: float) -> np.ndarray:
+    """Per-month percentile, interpolated linearly inside the matching bin."""
+    counts = histogram.cumsum(axis=1)
+    total = counts[:, -1:]
+    target = q / 100 * total
+    index = np.argmax(counts >= target, axis=1)
+    below = np.where(index > 0, counts[np.arange(len(index)), index - 1], 0)
+    in_bin = histogram[np.arange(len(index)), index]
+    fraction = np.where(in_bin > 0, (target[:, 0] - below) / np.maximum(in_bin, 1), 0)
+    edges = np.concatenate([[0.0], _BALANCE_EDGES, [_BALANCE_EDGES[-1]]])
+    low, high = edges[index], edges[index + 1]
+    return low + (high - low) * np.clip(fraction, 0, 1)
+
+def _pooled_chunks(pool: ProcessPoolExecutor, workers: int, chunk_sizes, seeds, common):
+    """
+    Yield chunk results in submission order with at most a few chunks per
+    worker in flight, dropping each future once its result is handed over.
+    """
+    pending = deque()
+    for size, s in zip(chunk_sizes, seeds):
+        pending.append(pool.submit(_simulate_chunk, size, s, *common))
+        if len(pending) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def _fold(chunks) -> Dict[str, np.ndarray]:
+    """Sum chunk aggregates as they arrive, keeping only the running totals."""
+    totals = None
+    for chunk in chunks:
+        if totals is None:
+            totals = chunk
+        else:
+            for key in totals:
+                totals[key] = totals[key] + chunk[key]
+    return totals
+
+def simulate_projections(
+    current_contribution: float,
+    years: int,
+    n_paths: int = 2000,
+    annual_increment: float = 0.03,
+    increment_volatility: float = 0.02,
+    gap_probability: float = 0.05,
+    mean_gap_months: float = 4,
+    interest_rates: Dict[str, float] = DEFAULT_INTEREST_RATES,
+    rate_volatility: float = 0.0025,
+    birth_date: Optional[datetime.date] = None,
+    start_date: Optional[datetime.date] = None,
+    initial_balances: Optional[Dict[str, float]] = None,
+    percentiles: Sequence[int] = PERCENTILES,
+    seed: Optional[int] = None,
+    chunk_paths: int = DEFAULT_CHUNK_PATHS,
+    max_workers: Optional[int] = None,
+    oa_withdrawals: Optional[np.ndarray] = None
+) -> Dict[str, object]:
+    """
+    Monte Carlo CPF projection with percentile bands.
+
+    Each path draws a salary increment per year, employment gaps and a
+    random walk in interest rates (floored at the CPF minimums); policy
+    editions, ages and allocations follow calculate_future_balance. Paths are simulated
+    in chunks as 2-D arrays and folded into per-month histograms, so
+    memory stays bounded however many paths are run. Large runs are
+    spread across a process pool; results depend only on the seed.
+
+    Args:
+        current_contribution: Monthly contribution amount
+        years: Number of years to project
+        n_paths: Number of simulated paths
+        annual_increment: Mean annual salary increment
+        increment_volatility: Standard deviation of the annual increment
+        gap_probability: Chance per year of an employment gap
+        mean_gap_months: Mean gap length in months
+        interest_rates: Base interest rates for each account
+        rate_volatility: Standard deviation of the yearly rate change
+        birth_date: Date of birth, for age-band progression
+        start_date: First projection month (defaults to today)
+        initial_balances: Opening OA/SA/MA balances
+        percentiles: Percentiles of the total balance to report
+        seed: Random seed for reproducible runs
+        chunk_paths: Paths per chunk
+        max_workers: Process pool size for large runs
+        oa_withdrawals: Optional monthly amounts paid out of the OA, as in
+            calculate_future_balance
+
+    Returns:
+        Dictionary with Months, percentile arrays of the total balance
+        keyed P10/P50/P90, and the probability of SA reaching BRS/FRS
+        by each month and by the end of the projection
+    """
+    months, rows = band_schedule(years, birth_date, start_date)
+    chunk_sizes = [min(chunk_paths, n_paths - i) for i in range(0, n_paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    common = (
+        current_contribution, months, rows, annual_increment, increment_volatility,
+        gap_probability, mean_gap_months, interest_rates, rate_volatility, initial_balances or {},
+        retirement_sum_schedule(months, start_date),
+        oa_withdrawals
+    )
+
+    if n_paths > PROCESS_POOL_THRESHOLD and len(chunk_sizes) > 1:
+        workers = max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            totals = _fold(_pooled_chunks(pool, workers, chunk_sizes, seeds, common))
+    else:
+        totals = _fold(_simulate_chunk(size, s, *common) for size, s in zip(chunk_sizes, seeds))
+
+    result = {"Months": months, "n_paths": n_paths}
+    for q in percentiles:
+        result[f"P{q}"] = _percentile_from_histogram(totals["histogram"], q)
+    result["prob_brs_by_month"] = totals["brs"] / n_paths
+    result["prob_frs_by_month"] = totals["frs"] / n_paths
+    result["prob_brs"] = totals["ever_brs"] / n_paths
+    result["prob_frs"] = totals["ever_frs"] / n_paths
+    return result
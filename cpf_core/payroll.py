@@ -0,0 +1,303 @@
+"""
+Bulk CPF payroll over CSV or Parquet files.
+
+    python -m cpf_core.payroll run payroll.csv contributions.csv --month 2024-06
+    python -m cpf_core.payroll year payroll_2024.csv contributions_2024.csv --year 2024
+    python -m cpf_core.payroll benchmark --rows 1000000
+
+`run` input needs `ordinary_wages` and `birth_date` columns;
+`additional_wages` and `total_wages_ytd` default to zero. Every input
+column is passed through and the contribution and allocation columns are
+appended. Files are streamed in chunks, so memory stays flat however
+long the payroll.
+
+`year` input has one row per employee and month paid: `employee_id`,
+`month` (1-12 or YYYY-MM), `ordinary_wages`, `birth_date` and optionally
+`additional_wages`. The year is run month by month with the YTD wages
+and the Additional Wages ceiling carried forward; the output has one row
+per employee and month.
+
+`--exact` on `run` and `year` computes in integer cents with the CPF
+Board's rounding (cpf_core.cents) instead of float arithmetic.
+
+Parquet input/output needs pyarrow.
+"""
+import os
+import sys
+import time
+import argparse
+import datetime
+import tempfile
+from typing import Callable, Dict, Iterator, Optional
+import numpy as np
+import pandas as pd
+from cpf_core.batch import YEAR_OUTPUT_COLUMNS, calculate_payroll_batch, simulate_payroll_year
+
+DEFAULT_CHUNKSIZE = 100_000
+
+OUTPUT_COLUMNS = (
+    "age_group", "total_cpf", "employee_share", "employer_share",
+    "medisave", "special", "ordinary",
+)
+
+def _is_parquet(path: str) -> bool:
+    return path.lower().endswith((".parquet", ".pq"))
+
+def _pyarrow_parquet():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet files need pyarrow: pip install pyarrow") from e
+    return pq
+
+def read_chunks(path: str, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    """Yield the payroll file as DataFrames of at most chunksize rows."""
+    if _is_parquet(path):
+        pq = _pyarrow_parquet()
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+class ChunkWriter:
+    """Appends result chunks to a CSV or Parquet file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._parquet_writer = None
+        self._wrote_header = False
+
+    def write(self, df: pd.DataFrame) -> None:
+        if _is_parquet(self.path):
+            import pyarrow as pa
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = _pyarrow_parquet().ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="a" if self._wrote_header else "w",
+                      header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self) -> None:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+def process_chunk(df: pd.DataFrame, on: datetime.date, exact: bool = False) -> pd.DataFrame:
+    """Append contribution and allocation columns to one chunk."""
+    missing = {"ordinary_wages", "birth_date"} - set(df.columns)
+    if missing:
+        raise ValueError(f"Payroll input is missing column(s): {', '.join(sorted(missing))}")
+
+    def column(name):
+        if name not in df:
+            return np.zeros(len(df))
+        return df[name].fillna(0).to_numpy(dtype=np.float64)
+
+    results = calculate_payroll_batch(
+        column("ordinary_wages"),
+        column("additional_wages"),
+        pd.to_datetime(df["birth_date"]).to_numpy(dtype="datetime64[D]"),
+        on,
+        column("total_wages_ytd"),
+        exact,
+    )
+    out = df.copy()
+    for name in OUTPUT_COLUMNS:
+        out[name] = results[name]
+    return out
+
+def run_payroll(
+    input_path: str,
+    output_path: str,
+    on: datetime.date,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    progress: Optional[Callable[[int], None]] = None,
+    exact: bool = False
+) -> Dict[str, float]:
+    """
+    Stream a payroll file through the batch engine.
+
+    Args:
+        input_path: CSV or Parquet payroll file
+        output_path: CSV or Parquet file to write
+        on: Contribution month
+        chunksize: Rows per chunk
+        progress: Called with the running row count after each chunk
+        exact: Compute in integer cents with CPF rounding
+
+    Returns:
+        Dictionary with rows, seconds and rows_per_second
+    """
+    start = time.perf_counter()
+    rows = 0
+    writer = ChunkWriter(output_path)
+    try:
+        for chunk in read_chunks(input_path, chunksize):
+            writer.write(process_chunk(chunk, on, exact))
+            rows += len(chunk)
+            if progress:
+                progress(rows)
+    finally:
+        writer.close()
+    seconds = time.perf_counter() - start
+    return {"rows": rows, "seconds": seconds, "rows_per_second": rows / seconds if seconds else 0.0}
+
+def run_payroll_year(input_path: str, output_path: str, year: int, exact: bool = False) -> Dict[str, float]:
+    """
+    Run a calendar year of monthly payroll events through simulate_payroll_year().
+
+    Args:
+        input_path: CSV or Parquet file of (employee_id, month, wages, birth_date) rows;
+            YYYY-MM months must all fall in `year`
+        output_path: CSV or Parquet file to write
+        year: Calendar year of the payroll
+        exact: Compute in integer cents with CPF rounding
+
+    Returns:
+        Dictionary with employees, rows, seconds and rows_per_second
+    """
+    start = time.perf_counter()
+    df = pd.concat(read_chunks(input_path), ignore_index=True)
+    missing = {"employee_id", "month", "ordinary_wages", "birth_date"} - set(df.columns)
+    if missing:
+        raise ValueError(f"Payroll input is missing column(s): {', '.join(sorted(missing))}")
+
+    month = df["month"]
+    if not pd.api.types.is_integer_dtype(month):
+        dates = pd.to_datetime(month.astype(str), format="%Y-%m")
+        # YTD ceilings are per calendar year; another year's rows would be posted into this one
+        other_years = dates.dt.year != year
+        if other_years.any():
+            examples = ", ".join(sorted(set(df.loc[other_years, "month"].astype(str)))[:3])
+            raise ValueError(f"{int(other_years.sum())} row(s) are not in {year} (e.g. {examples})")
+        month = dates.dt.month
+    if not month.between(1, 12).all():
+        raise ValueError("month must be 1-12 or YYYY-MM")
+
+    employees, employee_index = np.unique(df["employee_id"].to_numpy(), return_inverse=True)
+    ordinary_wages = np.zeros((len(employees), 12))
+    additional_wages = np.zeros((len(employees), 12))
+    np.add.at(ordinary_wages, (employee_index, month - 1), df["ordinary_wages"].fillna(0).to_numpy(dtype=np.float64))
+    if "additional_wages" in df:
+        np.add.at(additional_wages, (employee_index, month - 1), df["additional_wages"].fillna(0).to_numpy(dtype=np.float64))
+    birth_dates = np.empty(len(employees), dtype="datetime64[D]")
+    birth_dates[employee_index] = pd.to_datetime(df["birth_date"]).to_numpy(dtype="datetime64[D]")
+
+    results = simulate_payroll_year(ordinary_wages, additional_wages, birth_dates, year, exact=exact)
+
+    out = pd.DataFrame({
+        "employee_id": np.repeat(employees, 12),
+        "month": np.tile([f"{year}-{m:02d}" for m in range(1, 13)], len(employees)),
+        "ordinary_wages": ordinary_wages.ravel(),
+        "additional_wages": additional_wages.ravel(),
+    })
+    for name in YEAR_OUTPUT_COLUMNS:
+        out[name] = results[name].ravel()
+    writer = ChunkWriter(output_path)
+    try:
+        writer.write(out)
+    finally:
+        writer.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        "employees": len(employees),
+        "rows": len(out),
+        "seconds": seconds,
+        "rows_per_second": len(out) / seconds if seconds else 0.0,
+    }
+
+def synthetic_payroll(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Random payroll rows for benchmarking."""
+    rng = np.random.default_rng(seed)
+    birth_days = rng.integers(
+        np.datetime64("1950-01-01").astype(np.int64),
+        np.datetime64("2006-12-31").astype(np.int64),
+        rows
+    )
+    return pd.DataFrame({
+        "employee_id": np.arange(rows),
+        "ordinary_wages": rng.uniform(1000, 9000, rows).round(2),
+        "additional_wages": np.where(rng.random(rows) < 0.1, rng.uniform(0, 30000, rows), 0).round(2),
+        "birth_date": birth_days.astype("datetime64[D]"),
+        "total_wages_ytd": rng.uniform(0, 110000, rows).round(2),
+    })
+
+def benchmark(rows: int = 1_000_000, chunksize: int = DEFAULT_CHUNKSIZE) -> Dict[str, float]:
+    """
+    Throughput of the in-memory kernel and of a CSV (and, with pyarrow,
+    Parquet) round trip on synthetic data, in rows per second.
+    """
+    on = datetime.date.today()
+    df = synthetic_payroll(rows)
+    results = {}
+
+    start = time.perf_counter()
+    calculate_payroll_batch(
+        df["ordinary_wages"].to_numpy(), df["additional_wages"].to_numpy(),
+        df["birth_date"].to_numpy(dtype="datetime64[D]"), on, df["total_wages_ytd"].to_numpy()
+    )
+    results["kernel_rows_per_second"] = rows / (time.perf_counter() - start)
+
+    formats = [".csv"]
+    try:
+        _pyarrow_parquet()
+        formats.append(".parquet")
+    except ImportError:
+        pass
+    with tempfile.TemporaryDirectory() as directory:
+        for suffix in formats:
+            source = os.path.join(directory, "payroll" + suffix)
+            if suffix == ".parquet":
+                df.to_parquet(source, index=False)
+            else:
+                df.to_csv(source, index=False)
+            stats = run_payroll(source, os.path.join(directory, "out" + suffix), on, chunksize)
+            results[f"{suffix[1:]}_rows_per_second"] = stats["rows_per_second"]
+    return results
+
+def _month(value: str) -> datetime.date:
+    return datetime.datetime.strptime(value, "%Y-%m").date()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk CPF payroll calculator")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="compute contributions for a payroll file")
+    run.add_argument("input")
+    run.add_argument("output")
+    run.add_argument("--month", type=_month, default=datetime.date.today().replace(day=1),
+                     help="contribution month, YYYY-MM (default: this month)")
+    run.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+
+    year = sub.add_parser("year", help="run a calendar year of monthly payroll with YTD ceilings")
+    year.add_argument("input")
+    year.add_argument("output")
+    year.add_argument("--year", type=int, default=datetime.date.today().year)
+
+    for command in (run, year):
+        command.add_argument("--exact", action="store_true",
+                             help="integer cents with CPF rounding (total to the dollar, employee share down)")
+
+    bench = sub.add_parser("benchmark", help="measure throughput on synthetic rows")
+    bench.add_argument("--rows", type=int, default=1_000_000)
+    bench.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        stats = run_payroll(args.input, args.output, args.month, args.chunksize,
+                            progress=lambda n: print(f"{n:,} rows", file=sys.stderr), exact=args.exact)
+        print(f"{stats['rows']:,} rows in {stats['seconds']:.2f}s "
+              f"({stats['rows_per_second']:,.0f} rows/s) -> {args.output}")
+    elif args.command == "year":
+        stats = run_payroll_year(args.input, args.output, args.year, args.exact)
+        print(f"{stats['employees']:,} employees, {stats['rows']:,} employee-months in "
+              f"{stats['seconds']:.2f}s -> {args.output}")
+    else:
+        for name, value in benchmark(args.rows, args.chunksize).items():
+            print(f"{name}: {value:,.0f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import datetime
+from typing import Dict, Optional
+from cpf_core.housing import project_with_loan
+from cpf_core.milestones import calculate_milestones
+from cpf_core.montecarlo import simulate_projections
+from cpf_core.projection import calculate_future_balance
+
+def project_member(
+    monthly_contribution: float,
+    projection_years: int,
+    salary_increment: float,
+    birth_date: Optional[datetime.date],
+    current_balances: Dict[str, float],
+    simulation: Optional[Dict[str, float]] = None,
+    start_date: Optional[datetime.date] = None,
+    housing: Optional[Dict[str, object]] = None
+) -> Dict[str, object]:
+    """
+    Projection, Monte Carlo bands and milestones for one member.
+
+    Everything the Future Projections tab shows, computed without any UI:
+    the deterministic projection (with a home loan drawing on the OA when
+    `housing` is given), optional Monte Carlo bands on the same loan, and
+    milestones on the same trajectory.
+
+    Args:
+        monthly_contribution: Total monthly CPF contribution
+        projection_years: Number of years to project
+        salary_increment: Expected annual salary increment
+        birth_date: Date of birth
+        current_balances: Opening OA/SA/MA balances
+        simulation: Monte Carlo settings for simulate_projections, or None
+        start_date: First projection month (defaults to today)
+        housing: Home purchase settings for project_with_loan, or None
+
+    Returns:
+        Dictionary with monthly_data, percentile_bands, milestones and
+        loan (the project_with_loan result, or None)
+    """
+    loan = None
+    if housing is not None:
+        loan = project_with_loan(
+            monthly_contribution,
+            projection_years,
+            annual_increment=salary_increment,
+            birth_date=birth_date,
+            start_date=start_date,
+            initial_balances=current_balances,
+            **housing
+        )
+        monthly_data = loan["monthly_data"]
+    else:
+        monthly_data = calculate_future_balance(
+            monthly_contribution,
+            projection_years,
+            salary_increment,
+            birth_date=birth_date,
+            start_date=start_date,
+            initial_balances=current_balances
+        )
+    
+    percentile_bands = None
+    if simulation is not None:
+        percentile_bands = simulate_projections(
+            monthly_contribution,
+            projection_years,
+            annual_increment=salary_increment,
+            birth_date=birth_date,
+            start_date=start_date,
+            initial_balances=current_balances,
+            seed=0,
+            oa_withdrawals=None if loan is None else loan["schedule"]["installment"] * housing.get("oa_share", 1.0),
+            **simulation
+        )
+    
+    # Milestones on the same trajectory as the chart
+    milestones = calculate_milestones(
+        current_balances,
+        monthly_contribution,
+        projection_years,
+        salary_increment,
+        birth_date=birth_date,
+        start_date=start_date
+    )
+    
+    return {
+        "monthly_data": monthly_data,
+        "percentile_bands": percentile_bands,
+        "milestones": milestones,
+        "loan": loan,
+    }
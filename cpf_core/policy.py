@@ -0,0 +1,93 @@
+import os
+import json
+import bisect
+import datetime
+from typing import Dict, Tuple, Optional
+
+# Versioned policy data; point CPF_POLICY_PATH at another file to try a new edition
+POLICY_PATH = os.environ.get(
+    "CPF_POLICY_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "policy_data.json")
+)
+
+def month_index(date: datetime.date) -> int:
+    """Months since year 0, the axis the policy editions are searched on."""
+    return date.year * 12 + date.month - 1
+
+def read_policy_data(path: Optional[str] = None) -> Dict:
+    """
+    Read a policy data file (defaults to POLICY_PATH) with its editions in effective order.
+
+    This module works on the raw data in plain Python so the scalar
+    calculator imports without numpy; tables.PolicyTables compiles the
+    same data into arrays for the vectorized engines.
+    """
+    with open(path or POLICY_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    data["editions"] = sorted(data["editions"], key=lambda edition: edition["effective"])
+    return data
+
+_DATA = read_policy_data()
+_EFFECTIVE_MONTHS = [
+    month_index(datetime.datetime.strptime(edition["effective"], "%Y-%m").date())
+    for edition in _DATA["editions"]
+]
+
+def edition_on(date: Optional[datetime.date] = None) -> Dict:
+    """Policy edition in force on a date (defaults to today); earlier dates use the first."""
+    index = bisect.bisect_right(_EFFECTIVE_MONTHS, month_index(date or datetime.date.today())) - 1
+    return _DATA["editions"][max(index, 0)]
+
+_CURRENT = edition_on()
+_EDITION_2024 = edition_on(datetime.date(2024, 1, 1))
+
+# Wage ceilings
+ORDINARY_WAGES_CEILING = float(_CURRENT["ceilings"]["ordinary_wages"])
+ADDITIONAL_WAGES_CEILING = float(_CURRENT["ceilings"]["additional_wages"])
+TOTAL_WAGES_CEILING = float(_CURRENT["ceilings"]["total_wages"])
+
+# CPF Life milestone constants
+BRS_2024, FRS_2024, ERS_2024 = (float(_EDITION_2024["retirement_sums"][s]) for s in ("BRS", "FRS", "ERS"))
+
+# Age groups in band order, with the upper age (inclusive) of each band
+AGE_GROUPS = tuple(band["label"] for band in _DATA["age_bands"])
+AGE_BAND_UPPER = tuple(band["upper_age"] for band in _DATA["age_bands"][:-1])
+
+# Current edition keyed by age group, for callers that work with group names
+CPF_RATES: Dict[str, Tuple[float, float, float]] = {
+    group: tuple(rates) for group, rates in zip(AGE_GROUPS, _CURRENT["rates"]["bands"])
+}
+ALLOCATIONS: Dict[str, Tuple[float, float, float]] = {
+    group: tuple(ratios) for group, ratios in zip(AGE_GROUPS, _CURRENT["allocations"]["bands"])
+}
+
+def age_on(birth_date: datetime.date, on: Optional[datetime.date] = None) -> int:
+    """
+    Age in completed years.
+
+    Args:
+        birth_date: Date of birth
+        on: Date to measure age at (defaults to today)
+
+    Returns:
+        int: Age in years
+    """
+    on = on or datetime.date.today()
+    return on.year - birth_date.year - ((on.month, on.day) < (birth_date.month, birth_date.day))
+
+def age_group_for_age(age: int) -> str:
+    """Age group category for an age in completed years."""
+    return AGE_GROUPS[bisect.bisect_left(AGE_BAND_UPPER, age)]
+
+def get_age_group(birth_date: datetime.date, on: Optional[datetime.date] = None) -> str:
+    """
+    Determine age group based on birth date.
+
+    Args:
+        birth_date: Date of birth
+        on: Date to measure age at (defaults to today)
+
+    Returns:
+        str: Age group category
+    """
+    return age_group_for_age(age_on(birth_date, on))
@@ -0,0 +1,279 @@
+import calendar
+import datetime
+from typing import Dict, Optional, Tuple
+import numpy as np
+from cpf_core.policy import age_on, month_index
+from cpf_core.tables import POLICY
+
+DEFAULT_INTEREST_RATES = {"OA": 0.025, "SA": 0.04, "MA": 0.04}
+
+# Lookup tables indexed by policy row (edition and age band, see PolicyTables)
+RATE_TABLE = POLICY.rates[:, 0]
+ALLOCATION_TABLE = POLICY.allocations  # MA, SA, OA
+
+# Column of each account in ALLOCATION_TABLE
+ACCOUNT_COLUMNS = {"MA": 0, "SA": 1, "OA": 2}
+
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+def add_months(start: datetime.date, months: int) -> datetime.date:
+    """Same day-of-month `months` later, clamped to the end of shorter months."""
+    month_index = start.year * 12 + start.month - 1 + months
+    year, month = divmod(month_index, 12)
+    day = min(start.day, calendar.monthrange(year, month + 1)[1])
+    return datetime.date(year, month + 1, day)
+
+def date_parts(dates: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Month index (as policy.month_index) and day of month for an array of dates.
+
+    Args:
+        dates: Dates (anything convertible to datetime64[D])
+
+    Returns:
+        Tuple of integer arrays (month_index, day)
+    """
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    months = dates.astype("datetime64[M]")
+    day = (dates - months.astype("datetime64[D]")).astype(np.int64) + 1
+    return months.astype(np.int64) + 1970 * 12, day
+
+def ages_by_month(
+    birth_date,
+    months: np.ndarray,
+    start_date: Optional[datetime.date] = None
+) -> np.ndarray:
+    """
+    Age in completed years at each projection month.
+
+    Month m is dated add_months(start_date, m); the result matches
+    policy.age_on() on those dates.
+
+    Args:
+        birth_date: Date of birth, or an array of birth dates
+        months: Month offsets from the start date
+        start_date: First projection month (defaults to today)
+
+    Returns:
+        Integer array of ages, same shape as months, or
+        (members, months) for an array of birth dates
+    """
+    start_date = start_date or datetime.date.today()
+    month_index = start_date.year * 12 + start_date.month - 1 + np.asarray(months)
+    year, month = np.divmod(month_index, 12)
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    day = np.minimum(start_date.day, _DAYS_IN_MONTH[month] + ((month == 1) & leap))
+    if isinstance(birth_date, datetime.date):
+        birth_index, birth_day = birth_date.year * 12 + birth_date.month - 1, birth_date.day
+    else:
+        birth_index, birth_day = date_parts(birth_date)
+        birth_index, birth_day = birth_index[:, None], birth_day[:, None]
+    elapsed = month_index - birth_index - (day < birth_day)
+    return elapsed // 12
+
+def age_bands(ages: np.ndarray) -> np.ndarray:
+    """Row index into AGE_GROUPS for each age."""
+    return POLICY.band(ages)
+
+def band_schedule(
+    years: int,
+    birth_date=None,
+    start_date: Optional[datetime.date] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Month axis and the policy table row in force in each month.
+
+    The row combines the policy edition effective that month with the
+    member's age band. Without a birth date the youngest band is used
+    throughout; an array of birth dates gives one row of table rows per
+    member.
+    """
+    start_date = start_date or datetime.date.today()
+    months = np.arange(years * 12)
+    editions = POLICY.edition(month_index(start_date) + months)
+    if birth_date is None:
+        return months, editions * POLICY.n_bands
+    return months, editions * POLICY.n_bands + age_bands(ages_by_month(birth_date, months, start_date))
+
+def rate_factors(rows: np.ndarray) -> np.ndarray:
+    """Total contribution rate in each month relative to the first month's (along the last axis)."""
+    if not rows.shape[-1]:
+        return np.ones(rows.shape)
+    return RATE_TABLE[rows] / RATE_TABLE[rows[..., :1]]
+
+def accumulate_balances(
+    contributions: np.ndarray,
+    growth: np.ndarray,
+    initial: np.ndarray = 0.0
+) -> np.ndarray:
+    """
+    Solve b[t] = (b[t-1] + c[t]) * g[t] along the last axis without a loop.
+
+    With G[t] = g[0] * ... * g[t], the recurrence unrolls to
+    b[t] = G[t] * (b[-1] + sum_{k<=t} c[k] / G[k-1]).
+
+    Args:
+        contributions: Contributions per month, shape (..., months)
+        growth: Monthly growth factors, broadcastable to contributions
+        initial: Opening balance, broadcastable to contributions[..., 0]
+
+    Returns:
+        Month-end balances, same shape as contributions
+    """
+    growth = np.broadcast_to(growth, contributions.shape)
+    cumulative = np.cumprod(growth, axis=-1)
+    previous = np.concatenate([np.ones_like(cumulative[..., :1]), cumulative[..., :-1]], axis=-1)
+    return cumulative * (np.expand_dims(initial, -1) + np.cumsum(contributions / previous, axis=-1))
+
+def accumulate_drawdown(
+    contributions: np.ndarray,
+    withdrawals: np.ndarray,
+    growth: np.ndarray,
+    initial: np.ndarray = 0.0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    accumulate_balances() with a withdrawal each month that cannot overdraw.
+
+    Each month withdraws min(w[t], b[t-1] + c[t]), so
+    b[t] = max(0, b[t-1] + c[t] - w[t]) * g[t]. Divided by G[t-1] this is
+    a walk reflected at zero, which is the running sum minus its running
+    minimum (where negative), so it is still solved without a loop.
+
+    Args:
+        contributions: Contributions per month, shape (..., months)
+        withdrawals: Requested withdrawals per month, broadcastable to contributions
+        growth: Monthly growth factors, broadcastable to contributions
+        initial: Opening balance, broadcastable to contributions[..., 0]
+
+    Returns:
+        Tuple of month-end balances and the amount actually withdrawn each
+        month, both the same shape as contributions
+    """
+    withdrawals = np.broadcast_to(withdrawals, contributions.shape)
+    growth = np.broadcast_to(growth, contributions.shape)
+    cumulative = np.cumprod(growth, axis=-1)
+    previous = np.concatenate([np.ones_like(cumulative[..., :1]), cumulative[..., :-1]], axis=-1)
+    unfloored = np.expand_dims(initial, -1) + np.cumsum((contributions - withdrawals) / previous, axis=-1)
+    # Amount the floor has added back so far, in start-of-projection dollars
+    refilled = -np.minimum(np.minimum.accumulate(unfloored, axis=-1), 0)
+    shortfall = np.diff(refilled, axis=-1, prepend=0) * previous
+    return cumulative * (unfloored + refilled), withdrawals - shortfall
+
+def calculate_future_balance(
+    current_contribution: float,
+    years: int,
+    annual_increment: float = 0.03,
+    interest_rates: Dict[str, float] = DEFAULT_INTEREST_RATES,
+    birth_date: Optional[datetime.date] = None,
+    start_date: Optional[datetime.date] = None,
+    initial_balances: Optional[Dict[str, float]] = None,
+    oa_withdrawals: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Project future CPF balances based on current contribution patterns.
+
+    The month axis, the policy table row in every month, the allocation
+    ratios and the salary-increment factors are built as arrays and the
+    balances come from accumulate_balances(). Each month uses the policy
+    edition in force then; when a birth date is given, the member also
+    ages through the projection. Allocations follow each month's row and
+    the contribution follows the row's total rate.
+
+    Args:
+        current_contribution: Monthly contribution amount
+        years: Number of years to project
+        annual_increment: Expected annual salary increment
+        interest_rates: Dictionary of interest rates for each account
+        birth_date: Date of birth; without it the youngest band is used throughout
+        start_date: First projection month (defaults to today)
+        initial_balances: Opening OA/SA/MA balances (default zero)
+        oa_withdrawals: Optional monthly amounts paid out of the OA, such
+            as housing loan instalments; the OA never goes below zero
+
+    Returns:
+        Dictionary containing projected balances for each account, plus
+        OA_Withdrawn (the amount the OA actually paid each month) when
+        oa_withdrawals is given
+    """
+    months, rows = band_schedule(years, birth_date, start_date)
+
+    # Salary increments compound once every 12 months
+    increments = np.where((months % 12 == 0) & (months > 0), 1 + annual_increment, 1.0)
+    contribution = current_contribution * np.cumprod(increments) * rate_factors(rows)
+    allocation = ALLOCATION_TABLE[rows]
+
+    # One row per account, in ALLOCATION_TABLE column order
+    initial_balances = initial_balances or {}
+    accounts = ("MA", "SA", "OA")
+    balances = accumulate_balances(
+        contribution * allocation.T,
+        np.array([[1 + interest_rates[account] / 12] for account in accounts]),
+        np.array([initial_balances.get(account, 0.0) for account in accounts])
+    )
+
+    monthly_data = {account: balances[i] for i, account in enumerate(accounts)}
+    if oa_withdrawals is not None:
+        oa = accounts.index("OA")
+        monthly_data["OA"], monthly_data["OA_Withdrawn"] = accumulate_drawdown(
+            contribution * allocation[:, oa],
+            np.broadcast_to(oa_withdrawals, months.shape),
+            1 + interest_rates["OA"] / 12,
+            initial_balances.get("OA", 0.0)
+        )
+    monthly_data["Total"] = monthly_data["OA"] + monthly_data["SA"] + monthly_data["MA"]
+    monthly_data["Months"] = months
+    return monthly_data
+
+def calculate_future_balance_reference(
+    current_contribution: float,
+    years: int,
+    annual_increment: float = 0.03,
+    interest_rates: Dict[str, float] = DEFAULT_INTEREST_RATES,
+    birth_date: Optional[datetime.date] = None,
+    start_date: Optional[datetime.date] = None,
+    initial_balances: Optional[Dict[str, float]] = None,
+    oa_withdrawals: Optional[np.ndarray] = None
+) -> Dict[str, list]:
+    """
+    Month-by-month scalar version of calculate_future_balance(), kept as
+    the reference the vectorized engine is checked against.
+    """
+    start_date = start_date or datetime.date.today()
+    initial_balances = initial_balances or {}
+    monthly_data = {"OA": [], "SA": [], "MA": [], "Total": [], "Months": []}
+    if oa_withdrawals is not None:
+        monthly_data["OA_Withdrawn"] = []
+
+    oa_balance = initial_balances.get("OA", 0.0)
+    sa_balance = initial_balances.get("SA", 0.0)
+    ma_balance = initial_balances.get("MA", 0.0)
+    monthly_contribution = current_contribution
+    first_row = None
+
+    for month in range(years * 12):
+        if month % 12 == 0 and month > 0:
+            monthly_contribution *= (1 + annual_increment)
+
+        date = add_months(start_date, month)
+        age = age_on(birth_date, date) if birth_date is not None else 0
+        row = int(POLICY.rows(age, month_index(date)))
+        first_row = row if first_row is None else first_row
+        contribution = monthly_contribution * (RATE_TABLE[row] / RATE_TABLE[first_row])
+
+        medisave_rate, special_rate, ordinary_rate = ALLOCATION_TABLE[row]
+        oa_balance += contribution * ordinary_rate
+        if oa_withdrawals is not None:
+            withdrawn = min(float(oa_withdrawals[month]), oa_balance)
+            oa_balance -= withdrawn
+            monthly_data["OA_Withdrawn"].append(withdrawn)
+        oa_balance *= (1 + interest_rates["OA"]/12)
+        sa_balance = (sa_balance + contribution * special_rate) * (1 + interest_rates["SA"]/12)
+        ma_balance = (ma_balance + contribution * medisave_rate) * (1 + interest_rates["MA"]/12)
+
+        monthly_data["OA"].append(oa_balance)
+        monthly_data["SA"].append(sa_balance)
+        monthly_data["MA"].append(ma_balance)
+        monthly_data["Total"].append(oa_balance + sa_balance + ma_balance)
+        monthly_data["Months"].append(month)
+
+    return monthly_data
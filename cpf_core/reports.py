@@ -0,0 +1,377 @@
+"""
+Bulk member projection reports: a chart and CSV tables per member.
+
+    python -m cpf_core.reports run members.csv reports/ --years 30 --workers 8
+
+Input (CSV or Parquet) needs `member_id`, `birth_date` and either
+`monthly_contribution` or `ordinary_wages` (the contribution is then
+computed for --month, as the payroll job does). `oa_balance`,
+`sa_balance`, `ma_balance` and `salary_increment` are optional.
+
+Each member gets a directory `<output>/<member_id>/` (characters
+outside A-Z, a-z, 0-9, ".", "_" and "-" become "_" and a short hash of
+the id is appended) with projection.png, monthly.csv and yearly.csv.
+Members whose directory would clash with an earlier row's are reported
+as errors rather than overwriting it. `<output>/summary.csv`
+has one row per member, in input order, with the final balances, the
+months to each retirement sum and an error column for members that could
+not be projected.
+
+Members are read in chunks and rendered across a process pool with a
+bounded number of batches in flight, so memory stays flat however long
+the file. Each worker builds the chart figure once and only swaps the
+data for every member.
+"""
+import os
+import re
+import sys
+import csv
+import time
+import hashlib
+import argparse
+import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from cpf_core.milestones import MILESTONES, retirement_sum_schedule
+from cpf_core.planning import project_member
+
+DEFAULT_YEARS = 30
+
+# Members sent to a worker at a time
+DEFAULT_BATCH_SIZE = 32
+
+# Batches queued per worker; bounds memory and keeps every worker busy
+BATCHES_IN_FLIGHT_PER_WORKER = 2
+
+CHART_SIZE_INCHES = (8, 4.5)
+CHART_DPI = 100
+
+ACCOUNTS = ("OA", "SA", "MA")
+
+ACCOUNT_NAMES = {"OA": "Ordinary Account", "SA": "Special Account", "MA": "MediSave Account"}
+
+SUMMARY_COLUMNS = (
+    ("member_id", "final_oa", "final_sa", "final_ma", "final_total")
+    + tuple(f"months_to_{name}" for name in MILESTONES)
+    + ("error",)
+)
+
+class ProjectionChart:
+    """
+    Reusable projection figure for one worker process.
+
+    The figure, axes, labels, legend and line artists are created once;
+    render() replaces the line data and the fills, which is much cheaper
+    than building a new figure per member. Draws the same series as the
+    calculator page's plot_future_projections: the three accounts, each
+    filled down to the previous one, and the BRS and FRS in force.
+    """
+
+    def __init__(self, size=CHART_SIZE_INCHES, dpi: int = CHART_DPI):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        self.dpi = dpi
+        self.figure = Figure(figsize=size, dpi=dpi)
+        # A canvas of its own spares savefig() from attaching one per call
+        FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        self.axes.set_xlabel("Months")
+        self.axes.set_ylabel("Balance (SGD)")
+        self.axes.grid(alpha=0.3)
+        self.axes.yaxis.set_major_formatter("${x:,.0f}")
+        self.lines = {account: self.axes.plot([], [], label=ACCOUNT_NAMES[account])[0] for account in ACCOUNTS}
+        self.reference_lines = [
+            self.axes.plot([], [], linestyle="--", color="grey", drawstyle="steps-post",
+                           label=label)[0]
+            for label in ("Basic Retirement Sum", "Full Retirement Sum")
+        ]
+        self.axes.legend(loc="upper left", fontsize="small")
+        self.figure.tight_layout()
+        self._fills = []
+
+    def render(self, path: str, title: str, monthly_data: Dict[str, np.ndarray], retirement_sums: np.ndarray) -> None:
+        """Draw one member's projection and save it as a PNG."""
+        for fill in self._fills:
+            fill.remove()
+        self._fills = []
+
+        months = monthly_data["Months"]
+        previous = np.zeros(len(months))
+        for account in ACCOUNTS:
+            line = self.lines[account]
+            line.set_data(months, monthly_data[account])
+            self._fills.append(self.axes.fill_between(
+                months, previous, monthly_data[account], color=line.get_color(), alpha=0.25, linewidth=0
+            ))
+            previous = monthly_data[account]
+        for column, line in enumerate(self.reference_lines):
+            line.set_data(months, retirement_sums[:, column])
+
+        self.axes.set_title(title)
+        self.axes.relim()
+        self.axes.autoscale_view()
+        self.axes.set_xlim(months[0], months[-1])
+        self.axes.set_ylim(bottom=0)
+        self.figure.savefig(path, dpi=self.dpi)
+
+# Each worker process builds its chart once, in _init_worker
+_chart: Optional[ProjectionChart] = None
+
+def _init_worker(dpi: int) -> None:
+    global _chart
+    _chart = ProjectionChart(dpi=dpi)
+
+def _safe_name(member_id) -> str:
+    """
+    Member id usable as a directory name. Ids that had to be changed get a
+    hash of the raw id appended, so "a/b" and "a_b" stay apart.
+    """
+    raw = str(member_id)
+    name = re.sub(r"[^A-Za-z0-9._-]", "_", raw).strip(".")
+    if not name:
+        raise ValueError(f"member_id {member_id!r} cannot be used as a directory name")
+    if name != raw:
+        name = f"{name}-{hashlib.sha1(raw.encode('utf-8')).hexdigest()[:8]}"
+    return name
+
+def _write_tables(directory: str, monthly_data: Dict[str, np.ndarray], retirement_sums: np.ndarray,
+                  start_date: datetime.date) -> None:
+    months = monthly_data["Months"]
+    dates = [
+        f"{start_date.year + (start_date.month - 1 + m) // 12}-{(start_date.month - 1 + m) % 12 + 1:02d}"
+        for m in months.tolist()
+    ]
+    balances = np.round(np.column_stack([monthly_data[name] for name in ACCOUNTS + ("Total",)]), 2)
+    with open(os.path.join(directory, "monthly.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("month", "date") + ACCOUNTS + ("Total",))
+        writer.writerows([m, d, *row] for m, d, row in zip(months.tolist(), dates, balances.tolist()))
+
+    year_end = slice(11, None, 12)
+    sums = np.round(retirement_sums[year_end], 2)
+    with open(os.path.join(directory, "yearly.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("year", "date") + ACCOUNTS + ("Total",) + MILESTONES)
+        writer.writerows(
+            [year, date, *row, *targets]
+            for year, date, row, targets in zip(
+                range(1, len(sums) + 1), dates[year_end], balances[year_end].tolist(), sums.tolist()
+            )
+        )
+
+def render_member(member: Dict[str, object], output_dir: str, years: int, start_date: datetime.date,
+                  chart: ProjectionChart) -> Dict[str, object]:
+    """
+    Project one member and write their chart and tables.
+
+    Args:
+        member: Input row with member_id, birth_date, monthly_contribution
+            and the optional balance and increment fields
+        output_dir: Directory holding one subdirectory per member
+        years: Projection length
+        start_date: First projection month
+        chart: Figure template to draw into
+
+    Returns:
+        Summary row (see SUMMARY_COLUMNS)
+    """
+    if member.get("input_error"):
+        raise ValueError(member["input_error"])
+    if member.get("birth_date") is None:
+        raise ValueError("birth_date is required")
+    birth_date = datetime.date.fromisoformat(str(member["birth_date"])[:10])
+    increment = member.get("salary_increment")
+    balances = {account: float(member.get(f"{account.lower()}_balance") or 0.0) for account in ACCOUNTS}
+    projections = project_member(
+        float(member["monthly_contribution"]),
+        years,
+        0.03 if increment is None else float(increment),
+        birth_date,
+        balances,
+        start_date=start_date
+    )
+    monthly_data = projections["monthly_data"]
+    retirement_sums = retirement_sum_schedule(monthly_data["Months"], start_date)
+
+    directory = os.path.join(output_dir, _safe_name(member["member_id"]))
+    os.makedirs(directory, exist_ok=True)
+    _write_tables(directory, monthly_data, retirement_sums, start_date)
+    chart.render(
+        os.path.join(directory, "projection.png"),
+        f"Projected CPF Balance – member {member['member_id']}",
+        monthly_data,
+        retirement_sums
+    )
+
+    final = [round(float(monthly_data[name][-1]), 2) for name in ACCOUNTS + ("Total",)]
+    months_to = [projections["milestones"][name] for name in MILESTONES]
+    return dict(zip(SUMMARY_COLUMNS, [member["member_id"], *final, *months_to, ""]))
+
+def _render_batch(members: List[Dict[str, object]], output_dir: str, years: int,
+                  start_date: datetime.date) -> List[Dict[str, object]]:
+    """Worker task: render a batch, reporting per-member failures in the summary."""
+    rows = []
+    for member in members:
+        try:
+            rows.append(render_member(member, output_dir, years, start_date, _chart))
+        except (KeyError, TypeError, ValueError, OSError) as e:
+            row = dict.fromkeys(SUMMARY_COLUMNS, "")
+            row.update(member_id=member.get("member_id", ""), error=f"{type(e).__name__}: {e}")
+            rows.append(row)
+    return rows
+
+def _input_errors(chunk) -> "pd.Series":
+    """
+    Per-row reason a member's contribution cannot be computed from wages
+    ("" for valid rows), so one bad value fails that member, not the job.
+    """
+    import pandas as pd
+    errors = pd.Series("", index=chunk.index, dtype=object)
+    checks = [("birth_date", pd.to_datetime(chunk["birth_date"], errors="coerce"))]
+    checks += [(name, pd.to_numeric(chunk[name], errors="coerce"))
+               for name in ("ordinary_wages", "additional_wages", "total_wages_ytd") if name in chunk]
+    for name, parsed in checks:
+        bad = parsed.isna() & chunk[name].notna() & (errors == "")
+        errors[bad] = [f"invalid {name} {value!r}" for value in chunk.loc[bad, name]]
+    return errors
+
+def read_members(path: str, on: datetime.date, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Yield the member file as lists of row dicts with monthly_contribution
+    filled in. Rows whose wages or birth date cannot be read, or whose
+    report directory is already taken by an earlier row, carry an
+    input_error instead, reported for that member in the summary.
+    """
+    from cpf_core.payroll import process_chunk, read_chunks
+    # Directory names handed out so far, case-folded for case-insensitive filesystems
+    directories = {}
+    for chunk in read_chunks(path):
+        missing = {"member_id", "birth_date"} - set(chunk.columns)
+        if missing:
+            raise ValueError(f"Member file is missing column(s): {', '.join(sorted(missing))}")
+        input_errors = None
+        if "monthly_contribution" not in chunk:
+            if "ordinary_wages" not in chunk:
+                raise ValueError("Member file needs monthly_contribution or ordinary_wages")
+            input_errors = _input_errors(chunk)
+            # Missing birth dates are left to render_member to report
+            valid = (input_errors == "") & chunk["birth_date"].notna()
+            contributions = process_chunk(chunk[valid], on)["total_cpf"] if valid.any() else None
+            chunk = chunk.assign(monthly_contribution=contributions)
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        records = chunk.to_dict("records")
+        if input_errors is not None:
+            for record, error in zip(records, input_errors.tolist()):
+                if error:
+                    record["input_error"] = error
+        for record in records:
+            try:
+                name = _safe_name(record["member_id"]).lower()
+            except ValueError:
+                continue  # render_member reports it
+            if name in directories:
+                record["input_error"] = (f"member_id {record['member_id']!r} has the same report directory "
+                                         f"as member_id {directories[name]!r}")
+            else:
+                directories[name] = record["member_id"]
+        for start in range(0, len(records), batch_size):
+            yield records[start:start + batch_size]
+
+def generate_reports(
+    input_path: str,
+    output_dir: str,
+    years: int = DEFAULT_YEARS,
+    start_date: Optional[datetime.date] = None,
+    workers: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dpi: int = CHART_DPI,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> Dict[str, float]:
+    """
+    Render a projection report for every member in a file.
+
+    Args:
+        input_path: CSV or Parquet member file
+        output_dir: Directory for the member reports and summary.csv
+        years: Projection length
+        start_date: First projection month, also the contribution month
+            when wages are given (defaults to this month)
+        workers: Worker processes (defaults to the CPU count)
+        batch_size: Members per worker task
+        dpi: Chart resolution
+        progress: Called with the running member and error counts after each batch
+
+    Returns:
+        Dictionary with members, errors, seconds and members_per_second
+    """
+    start = time.perf_counter()
+    start_date = start_date or datetime.date.today().replace(day=1)
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+
+    members = errors = 0
+    with open(os.path.join(output_dir, "summary.csv"), "w", newline="") as f, \
+            ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(dpi,)) as pool:
+        summary = csv.DictWriter(f, SUMMARY_COLUMNS)
+        summary.writeheader()
+        pending = deque()
+
+        def collect():
+            nonlocal members, errors
+            rows = pending.popleft().result()
+            summary.writerows(rows)
+            members += len(rows)
+            errors += sum(1 for row in rows if row["error"])
+            if progress:
+                progress(members, errors)
+
+        # Batches are collected in submission order, so summary.csv follows the input
+        for batch in read_members(input_path, start_date, batch_size):
+            pending.append(pool.submit(_render_batch, batch, output_dir, years, start_date))
+            if len(pending) >= workers * BATCHES_IN_FLIGHT_PER_WORKER:
+                collect()
+        while pending:
+            collect()
+
+    seconds = time.perf_counter() - start
+    return {
+        "members": members,
+        "errors": errors,
+        "seconds": seconds,
+        "members_per_second": members / seconds if seconds else 0.0,
+    }
+
+def _month(value: str) -> datetime.date:
+    return datetime.datetime.strptime(value, "%Y-%m").date()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk CPF member projection reports")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="render a report for every member in a file")
+    run.add_argument("input")
+    run.add_argument("output_dir")
+    run.add_argument("--years", type=int, default=DEFAULT_YEARS)
+    run.add_argument("--month", type=_month, default=datetime.date.today().replace(day=1),
+                     help="first projection month, YYYY-MM (default: this month)")
+    run.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    run.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    run.add_argument("--dpi", type=int, default=CHART_DPI)
+
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+
+    def report_progress(members, errors):
+        rate = members / (time.perf_counter() - started)
+        print(f"{members:,} members ({errors:,} errors, {rate:,.0f}/s)", file=sys.stderr)
+
+    stats = generate_reports(args.input, args.output_dir, args.years, args.month, args.workers,
+                             args.batch_size, args.dpi, progress=report_progress)
+    print(f"{stats['members']:,} reports ({stats['errors']:,} errors) in {stats['seconds']:.2f}s "
+          f"({stats['members_per_second']:,.1f}/s) -> {args.output_dir}")
+    return 1 if stats["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+import datetime
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence
+import numpy as np
+from cpf_core.policy import ORDINARY_WAGES_CEILING
+from cpf_core.milestones import MILESTONES, first_month_reached, retirement_sum_schedule
+from cpf_core.projection import (
+    ALLOCATION_TABLE,
+    DEFAULT_INTEREST_RATES,
+    RATE_TABLE,
+    accumulate_balances,
+    band_schedule,
+    rate_factors,
+)
+
+# Accounts in ALLOCATION_TABLE column order
+ACCOUNTS = ("MA", "SA", "OA")
+
+# Unit-wage balance paths kept between sweeps
+MAX_CACHED_PATHS = 2048
+
+# Paths are computed at least this far ahead, so lengthening a sweep stays cached
+MIN_HORIZON_YEARS = 40
+
+class UnitPathCache:
+    """
+    Balance paths for a wage of $1, keyed by salary increment and interest rates.
+
+    Balances are linear in the wage, so a path computed once serves every
+    wage and every projection length up to its horizon. A sweep only
+    computes the (increment, rates) pairs it has not seen before, and it
+    computes all of them in one broadcast call. Safe to share between
+    threads; missing paths are computed outside the lock.
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHED_PATHS):
+        self.max_entries = max_entries
+        self._paths = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(
+        self,
+        increments: Sequence[float],
+        rate_scenarios: Sequence[Dict[str, float]],
+        years: int,
+        birth_date: Optional[datetime.date],
+        start_date: datetime.date
+    ) -> np.ndarray:
+        """Unit paths with shape (rate scenarios, increments, accounts, years * 12)."""
+        n_months = years * 12
+        keys = [
+            [(float(inc), tuple(rates[a] for a in ACCOUNTS), birth_date, start_date) for inc in increments]
+            for rates in rate_scenarios
+        ]
+        # A cached path also covers every shorter projection
+        found = {}
+        with self._lock:
+            for row in keys:
+                for key in row:
+                    path = self._paths.get(key)
+                    if path is not None and path.shape[-1] >= n_months:
+                        found[key] = path
+            missing = list(OrderedDict.fromkeys(key for row in keys for key in row if key not in found))
+            self.hits += sum(len(row) for row in keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            months, rows = band_schedule(max(years, MIN_HORIZON_YEARS), birth_date, start_date)
+            paths = unit_paths(
+                np.array([key[0] for key in missing]),
+                np.array([key[1] for key in missing]),
+                months,
+                rows
+            )
+            found.update(zip(missing, paths))
+
+        result = np.stack([
+            np.stack([found[key][:, :n_months] for key in row]) for row in keys
+        ])
+        with self._lock:
+            for key in missing:
+                self._paths[key] = found[key]
+            for row in keys:
+                for key in row:
+                    if key in self._paths:
+                        self._paths.move_to_end(key)
+            while len(self._paths) > self.max_entries:
+                self._paths.popitem(last=False)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._paths), "hits": self.hits, "misses": self.misses}
+
+_cache = UnitPathCache()
+
+def unit_paths(
+    increments: np.ndarray,
+    rates: np.ndarray,
+    months: np.ndarray,
+    rows: np.ndarray
+) -> np.ndarray:
+    """
+    Balance paths per dollar of monthly ordinary wage, all in one broadcast.
+
+    Args:
+        increments: Annual salary increments, shape (k,)
+        rates: Annual interest rates in ACCOUNTS order, shape (k, 3)
+        months: Month axis from band_schedule
+        rows: Policy table row per month from band_schedule
+
+    Returns:
+        Array of shape (k, 3, months)
+    """
+    if not len(months):
+        return np.zeros((len(increments), len(ACCOUNTS), 0))
+    salary = (1 + increments[:, None]) ** (months // 12)
+    contribution = RATE_TABLE[rows[0]] * rate_factors(rows) * salary
+    return accumulate_balances(
+        contribution[:, None, :] * ALLOCATION_TABLE[rows].T,
+        1 + rates[:, :, None] / 12
+    )
+
+def sweep_projections(
+    wages: Sequence[float],
+    increments: Sequence[float],
+    years: Sequence[int],
+    rate_scenarios: Sequence[Dict[str, float]] = (DEFAULT_INTEREST_RATES,),
+    birth_date: Optional[datetime.date] = None,
+    start_date: Optional[datetime.date] = None,
+    initial_balances: Optional[Dict[str, float]] = None,
+    target: Optional[np.ndarray] = None,
+    cache: Optional[UnitPathCache] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Final balances and time to a retirement sum over a grid of scenarios.
+
+    Every combination of rate scenario, salary increment, projection
+    length and monthly wage is evaluated with array operations instead of
+    one calculate_future_balance() call each. Contributions follow the
+    projection page: the monthly wage (capped at the OW ceiling) times the
+    total rate of the starting age band. Only (increment, rates) pairs not
+    already in the cache are computed, so changing the wage or years
+    ranges costs a multiply and an index.
+
+    Args:
+        wages: Monthly ordinary wages
+        increments: Annual salary increments
+        years: Projection lengths in years
+        rate_scenarios: Interest rates per account, one dict per scenario
+        birth_date: Date of birth, for age-band progression
+        start_date: First projection month (defaults to today)
+        initial_balances: Opening OA/SA/MA balances
+        target: SA balance to measure the time to, a number or one per
+            month (default the FRS from retirement_sum_schedule)
+        cache: Unit path cache (defaults to the shared one)
+
+    Returns:
+        Dictionary with final_total (rates, increments, years, wages) and
+        months_to_target (rates, increments, wages), NaN where the target
+        is not reached within the longest projection
+    """
+    cache = cache or _cache
+    start_date = start_date or datetime.date.today()
+    wages = np.minimum(np.asarray(wages, dtype=np.float64), ORDINARY_WAGES_CEILING)
+    years = np.asarray(years, dtype=np.int64)
+    horizon = int(years.max()) if len(years) else 0
+    initial = np.array([(initial_balances or {}).get(a, 0.0) for a in ACCOUNTS])
+
+    # (rates, increments, accounts, months), per dollar of wage
+    paths = cache.get_many(increments, rate_scenarios, horizon, birth_date, start_date)
+
+    # Opening balances only earn interest: (rates, accounts, months)
+    rates = np.array([[scenario[a] for a in ACCOUNTS] for scenario in rate_scenarios])
+    opening = initial[None, :, None] * np.cumprod(
+        np.broadcast_to(1 + rates[:, :, None] / 12, (len(rates), len(ACCOUNTS), horizon * 12)),
+        axis=-1
+    )
+
+    # Final totals: index the month axis at each projection length, then scale by wage
+    last = np.maximum(years * 12 - 1, 0)
+    unit_total = paths.sum(axis=2)[..., last]
+    opening_total = opening.sum(axis=1)[:, None, last]
+    final_total = unit_total[..., None] * wages + opening_total[..., None]
+    final_total[..., years == 0, :] = initial.sum()
+
+    # First month the SA balance is at or above the target in force that month
+    if target is None:
+        schedule = retirement_sum_schedule(np.arange(horizon * 12), start_date)
+        target = schedule[:, MILESTONES.index("FRS")]
+    target = np.broadcast_to(np.asarray(target, dtype=np.float64), (horizon * 12,))
+    sa = ACCOUNTS.index("SA")
+    sa_paths = paths[:, :, sa, None, :] * wages[:, None] + opening[:, None, sa, None, :]
+    months_to_target = first_month_reached(sa_paths, target)
+    if len(target) and initial[sa] >= target[0]:
+        months_to_target[:] = 0.0
+
+    return {
+        "wages": wages,
+        "increments": np.asarray(increments, dtype=np.float64),
+        "years": years,
+        "final_total": final_total,
+        "months_to_target": months_to_target,
+    }
+
+def cache_stats() -> Dict[str, int]:
+    """Hit and miss counts of the shared unit path cache."""
+    return _cache.stats()
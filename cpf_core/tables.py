@@ -0,0 +1,99 @@
+import datetime
+from typing import Dict, Tuple, Optional
+import numpy as np
+from cpf_core.policy import month_index, read_policy_data
+
+class PolicyTables:
+    """
+    Policy editions compiled into array lookup tables.
+
+    Rates and allocations are stacked into one row per (edition, age band),
+    so a month's table row is edition * n_bands + band and a whole
+    projection resolves with two np.searchsorted calls: on the age band
+    upper bounds, and on the editions' effective months.
+
+    Attributes:
+        version: Version string of the policy data
+        age_groups: Age group labels in band order
+        band_upper: Upper age (inclusive) of every band but the last
+        effective: Effective month of each edition, as "YYYY-MM"
+        effective_months: Effective months as month_index() values
+        rates: (editions * bands, 3) total, employee and employer rates
+        allocations: (editions * bands, 3) MA, SA and OA allocation ratios
+        ceilings: (editions, 3) ordinary, additional and total wage ceilings
+        retirement_sums: (editions, 3) BRS, FRS and ERS
+    """
+
+    RATE_COLUMNS = ("total", "employee", "employer")
+    ALLOCATION_COLUMNS = ("MA", "SA", "OA")
+    CEILING_COLUMNS = ("ordinary_wages", "additional_wages", "total_wages")
+    RETIREMENT_SUM_COLUMNS = ("BRS", "FRS", "ERS")
+
+    def __init__(self, data: Dict):
+        bands = data["age_bands"]
+        editions = sorted(data["editions"], key=lambda edition: edition["effective"])
+        if not editions:
+            raise ValueError("Policy data has no editions")
+        if any(band["upper_age"] is None for band in bands[:-1]) or bands[-1]["upper_age"] is not None:
+            raise ValueError("Only the last age band may be open-ended")
+
+        self.version = data["version"]
+        self.age_groups = tuple(band["label"] for band in bands)
+        self.band_upper = np.array([band["upper_age"] for band in bands[:-1]])
+        self.n_bands = len(bands)
+        self.effective = tuple(edition["effective"] for edition in editions)
+        self.effective_months = np.array([
+            month_index(datetime.datetime.strptime(effective, "%Y-%m").date())
+            for effective in self.effective
+        ])
+
+        def table(key, columns):
+            rows = []
+            for edition in editions:
+                if tuple(edition[key]["columns"]) != columns:
+                    raise ValueError(f"{key} columns must be {columns}")
+                if len(edition[key]["bands"]) != self.n_bands:
+                    raise ValueError(f"{key} for {edition['effective']} needs one row per age band")
+                rows.extend(edition[key]["bands"])
+            return np.array(rows, dtype=np.float64)
+
+        self.rates = table("rates", self.RATE_COLUMNS)
+        self.allocations = table("allocations", self.ALLOCATION_COLUMNS)
+        self.ceilings = np.array([
+            [edition["ceilings"][c] for c in self.CEILING_COLUMNS] for edition in editions
+        ], dtype=np.float64)
+        self.retirement_sums = np.array([
+            [edition["retirement_sums"][c] for c in self.RETIREMENT_SUM_COLUMNS] for edition in editions
+        ], dtype=np.float64)
+
+    def band(self, ages):
+        """Age band index for an age or array of ages (upper bounds inclusive)."""
+        return np.searchsorted(self.band_upper, ages, side="left")
+
+    def edition(self, months):
+        """Edition in force for a month_index() value or array; earlier months use the first."""
+        return np.maximum(np.searchsorted(self.effective_months, months, side="right") - 1, 0)
+
+    def edition_on(self, date: Optional[datetime.date] = None) -> int:
+        """Edition in force on a date (defaults to today)."""
+        return int(self.edition(month_index(date or datetime.date.today())))
+
+    def rows(self, ages, months):
+        """Table row for each (age, month_index) pair."""
+        return self.edition(months) * self.n_bands + self.band(ages)
+
+    def rates_by_group(self, edition: int) -> Dict[str, Tuple[float, float, float]]:
+        """One edition's (total, employee, employer) rates keyed by age group."""
+        start = edition * self.n_bands
+        return {group: tuple(self.rates[start + i].tolist()) for i, group in enumerate(self.age_groups)}
+
+    def allocations_by_group(self, edition: int) -> Dict[str, Tuple[float, float, float]]:
+        """One edition's (MA, SA, OA) allocation ratios keyed by age group."""
+        start = edition * self.n_bands
+        return {group: tuple(self.allocations[start + i].tolist()) for i, group in enumerate(self.age_groups)}
+
+def load_policy(path: Optional[str] = None) -> PolicyTables:
+    """Load and compile a policy data file (defaults to policy.POLICY_PATH)."""
+    return PolicyTables(read_policy_data(path))
+
+POLICY = load_policy()
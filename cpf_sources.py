@@ -0,0 +1,249 @@
+"""
+CPF source pages and the keyword helpers that pick among them.
+
+Plain functions with no Streamlit, OpenAI or CrewAI imports, so offline
+jobs and benchmarks can use them directly; cpf_assistant wraps them with
+tracing for the app.
+"""
+import time
+import codecs
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup
+
+# Parsed page text is reused this long, by the app and the crawler alike
+PAGE_CACHE_TTL_SECONDS = 6 * 60 * 60
+
+# Streamed fetches stop reading after this many bytes of a page
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+FETCH_CHUNK_BYTES = 64 * 1024
+
+# Elements dropped before extracting text, and the classes marking a content div
+SKIPPED_TAGS = {'script', 'style', 'nav', 'footer'}
+CONTENT_CLASSES = {'content', 'main-content'}
+
+# CPF-related keywords for query validation
+CPF_KEYWORDS = {
+    'cpf', 'central provident fund', 'housing', 'hdb', 'bto', 'resale', 
+    'mortgage', 'loan', 'interest', 'property', 'retirement', 'medisave',
+    'ordinary account', 'special account', 'retirement account', 'home ownership',
+    'public housing', 'private property', 'downpayment', 'grant'
+}
+
+def is_cpf_related(query):
+    """Check if the query is CPF-related based on keywords"""
+    query_words = set(query.lower().split())
+    return bool(query_words.intersection(CPF_KEYWORDS))
+
+CPF_URLS = {
+    "housing_policies": [
+        "https://www.cpf.gov.sg/member/infohub/cpf-clarifies/policy-faqs/why-do-i-need-to-pay-interest-on-cpf-used-for-housing-after-property-sale",
+"https://www.cpf.gov.sg/member/infohub/news/news-releases/cpf-members-to-enjoy-lower-premiums-for-home-protection-insurance",
+"https://www.cpf.gov.sg/member/infohub/news/news-releases/cpf-members-to-enjoy-lower-premiums-for-home-protection-insurance-26-june-2018",
+"https://www.cpf.gov.sg/member/infohub/news/news-releases/over-760000-cpf-members-to-receive-premium-rebates-under-home-protection-scheme",
+"https://www.cpf.gov.sg/member/infohub/news/news-releases/cpf-board-awards-tender-on-sale-of-building-at-79-robinson-road-to-southernwood-property-pte-ltd",
+"https://www.cpf.gov.sg/member/infohub/news/news-releases/premium-rebates-for-cpf-members-under-home-protection-scheme",
+"https://www.cpf.gov.sg/member/infohub/news/forum-replies/eligibility-for-home-insurance-is-reassessed-in-certain-cases",
+"https://www.cpf.gov.sg/member/infohub/news/cpf-related-announcements/more-flexibility-to-buy-a-home-for-life-while-safeguarding-retir",
+"https://www.cpf.gov.sg/member/infohub/reports-and-statistics/cpf-statistics/home-ownership-statistics",
+"https://www.cpf.gov.sg/member/infohub/reports-and-statistics/cpf-statistics/home-ownership-statistics/cumulative-cpf-savings-withdrawn-for-housing",
+"https://www.cpf.gov.sg/member/infohub/reports-and-statistics/cpf-statistics/home-ownership-statistics/home-protection-scheme-participation",
+"https://www.cpf.gov.sg/member/infohub/reports-and-statistics/cpf-statistics/home-ownership-statistics/home-protection-scheme-claims",
+"https://www.cpf.gov.sg/member/infohub/reports-and-statistics/cpf-trends/home-financing",
+"https://www.cpf.gov.sg/member/infohub/educational-resources/property-purchase-in-a-pandemic",
+"https://www.cpf.gov.sg/member/infohub/educational-resources/financially-savvy-budgeting-tips-for-your-home",
+"https://www.cpf.gov.sg/member/infohub/educational-resources/hdb-flat-eligibility-letter-what-to-know",
+"https://www.cpf.gov.sg/member/infohub/educational-resources/3-benefits-of-the-home-protection-scheme",
+"https://www.cpf.gov.sg/member/infohub/educational-resources/3-differences-between-hdb-loan-and-bank-loan",
+"https://www.cpf.gov.sg/member/infohub/educational-resources/sales-proceeds-after-selling-your-home",
+"https://www.cpf.gov.sg/member/infohub/educational-resources/protect-your-home-insurance-for-your-hdb-flat",
+"https://www.cpf.gov.sg/member/infohub/educational-resources/make-work-from-home-work-for-you",
+"https://www.cpf.gov.sg/member/infohub/educational-resources/keep-your-family-close-when-choosing-your-next-home",
+"https://www.cpf.gov.sg/member/infohub/educational-resources/roll-smoothly-into-your-hdb-resale-flat-in-4-steps",
+"https://www.cpf.gov.sg/member/infohub/educational-resources/how-to-avoid-regret-when-buying-your-dream-home",
+"https://www.cpf.gov.sg/member/infohub/educational-resources/easy-tips-to-freshen-up-your-home",
+"https://www.cpf.gov.sg/member/infohub/educational-resources/using-cpf-to-budget-for-house-and-renovations",
+"https://www.cpf.gov.sg/member/infohub/educational-resources/a-heart-decision-buying-your-first-home",
+"https://www.cpf.gov.sg/member/infohub/educational-resources/hdb-option-fee-and-housing-expenses-you-should-know",
+"https://www.cpf.gov.sg/member/infohub/educational-resources/home-improvement-programme-what-to-know",
+"https://www.cpf.gov.sg/member/infohub/be-ready/budget-for-my-home",
+"https://www.cpf.gov.sg/member/ds/dashboards/home-ownership",
+"https://www.cpf.gov.sg/member/home-ownership",
+"https://www.cpf.gov.sg/member/home-ownership/using-your-cpf-to-buy-a-home",
+"https://www.cpf.gov.sg/member/home-ownership/using-your-cpf-to-buy-a-home/considerations-when-using-cpf-to-buy-property",
+"https://www.cpf.gov.sg/member/home-ownership/using-your-cpf-to-buy-a-home/apply-to-use-cpf-for-your-property",
+"https://www.cpf.gov.sg/member/home-ownership/using-your-cpf-to-buy-a-home/cpf-refund-when-selling-or-transferring-property",
+"https://www.cpf.gov.sg/member/home-ownership/using-your-cpf-to-buy-a-home/retain-20000-in-your-oa-if-you-are-taking-a-housing-loan",
+"https://www.cpf.gov.sg/member/home-ownership/protecting-against-losing-your-home",
+"https://www.cpf.gov.sg/member/home-ownership/protecting-against-losing-your-home/claiming-under-the-home-protection-scheme",
+"https://www.cpf.gov.sg/member/home-ownership/protecting-against-losing-your-home/single-premium-home-protection-scheme-cover",
+"https://www.cpf.gov.sg/member/home-ownership/plan-your-housing-journey",
+"https://www.cpf.gov.sg/member/home-ownership/plan-your-housing-journey/upgrading-your-home",
+"https://www.cpf.gov.sg/member/home-ownership/plan-your-housing-journey/upgrading-your-home/housing-case-study",
+"https://www.cpf.gov.sg/member/tnc/information-for-exemption-from-home-protection-scheme",
+"https://www.cpf.gov.sg/member/tnc/important-notes-on-home-protection-scheme",
+"https://www.cpf.gov.sg/member/plan-with-cpf/home-ownership-planning",
+"https://www.cpf.gov.sg/employer/infohub/reports-and-statistics/cpf-statistics/home-ownership-statistics",
+"https://www.cpf.gov.sg/employer/infohub/reports-and-statistics/cpf-statistics/home-ownership-statistics/cumulative-cpf-savings-withdrawn-for-housing",
+"https://www.cpf.gov.sg/employer/infohub/reports-and-statistics/cpf-statistics/home-ownership-statistics/home-protection-scheme-participation",
+"https://www.cpf.gov.sg/employer/infohub/reports-and-statistics/cpf-statistics/home-ownership-statistics/home-protection-scheme-claims",
+"https://www.cpf.gov.sg/employer/infohub/reports-and-statistics/cpf-trends/home-financing",
+    ],
+    "general_info": [
+        "https://www.cpf.gov.sg/"
+    ]
+}
+
+def identify_relevant_url(user_message, urls_dict=CPF_URLS,limit=5):
+    """
+    Identify relevant URLs based on user query using keyword matching
+    """
+    relevant_urls = []
+    keywords = user_message.lower().split()
+    
+    for category, urls in urls_dict.items():
+        for url in urls:
+            # Check if any keyword from the user message appears in the URL
+            if any(keyword in url.lower() for keyword in keywords):
+                relevant_urls.append(url)
+            if len(relevant_urls) >= limit:  # Limit the number of relevant URLs
+                return relevant_urls
+    
+    # If no specific URLs found, return general info URLs
+    return relevant_urls if relevant_urls else urls_dict["general_info"]
+
+def extract_text(html):
+    """
+    Readable text of a CPF page: the main content without scripts,
+    styles, navigation or footers
+    """
+    # Parse HTML content
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Remove unwanted elements
+    for element in soup(['script', 'style', 'nav', 'footer']):
+        element.decompose()
+    
+    # Extract main content
+    main_content = soup.find('main') or soup.find('article') or soup.find('div', {'class': ['content', 'main-content']})
+    
+    if main_content:
+        # Clean and normalize text
+        text = ' '.join(main_content.stripped_strings)
+        return text
+    return ' '.join(soup.stripped_strings)
+
+class _ContentParser(HTMLParser):
+    """
+    Incremental version of extract_text()'s rules: collects the stripped
+    strings of the whole page and of the first main, article and content
+    div, outside script, style, nav and footer elements.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.skip_depth = 0
+        self.strings = []
+        self.regions = {}  # 'main' / 'article' / 'div' -> strings
+        self._open = []  # [region, tag, nesting depth] being collected
+        self._pending = []  # pieces of the current text node, split across feeds
+        self.main_closed = False
+
+    def _end_text(self):
+        if not self._pending:
+            return
+        text = ''.join(self._pending).strip()
+        self._pending = []
+        if text:
+            self.strings.append(text)
+            for region in self._open:
+                self.regions[region[0]].append(text)
+
+    def handle_starttag(self, tag, attrs):
+        self._end_text()
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+            return
+        if self.skip_depth:
+            return
+        for region in self._open:
+            if region[1] == tag:
+                region[2] += 1
+        if tag in ('main', 'article'):
+            kind = tag
+        elif tag == 'div' and CONTENT_CLASSES.intersection((dict(attrs).get('class') or '').split()):
+            kind = 'div'
+        else:
+            return
+        if kind not in self.regions:
+            self.regions[kind] = []
+            self._open.append([kind, tag, 1])
+
+    def handle_endtag(self, tag):
+        self._end_text()
+        if tag in SKIPPED_TAGS:
+            self.skip_depth = max(self.skip_depth - 1, 0)
+            return
+        if self.skip_depth:
+            return
+        for region in list(self._open):
+            if region[1] == tag:
+                region[2] -= 1
+                if region[2] == 0:
+                    self._open.remove(region)
+                    self.main_closed = self.main_closed or region[0] == 'main'
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self._pending.append(data)
+
+    def handle_comment(self, data):
+        self._end_text()
+
+    def handle_decl(self, decl):
+        self._end_text()
+
+    def handle_pi(self, data):
+        self._end_text()
+
+    def text(self):
+        self._end_text()
+        # Same precedence as extract_text(): main, then article, then a content div
+        for kind in ('main', 'article', 'div'):
+            if kind in self.regions:
+                return ' '.join(self.regions[kind])
+        return ' '.join(self.strings)
+
+def extract_text_stream(chunks, encoding=None, max_bytes=MAX_PAGE_BYTES, max_seconds=None):
+    """
+    extract_text() over a page arriving in chunks of bytes, parsed as they
+    come. Reading stops once the <main> element has closed (nothing after
+    it can change the result), after max_bytes, or after max_seconds, so
+    neither memory nor time grows with the size of the page.
+
+    Returns:
+        (text, stats) where stats has bytes (read) and stopped (why
+        reading ended early: main_closed, max_bytes, max_seconds, or None)
+    """
+    try:
+        decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    parser = _ContentParser()
+    deadline = None if max_seconds is None else time.monotonic() + max_seconds
+    read = 0
+    stopped = None
+    for chunk in chunks:
+        chunk = chunk[:max_bytes - read]
+        read += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        if parser.main_closed:
+            stopped = 'main_closed'
+        elif read >= max_bytes:
+            stopped = 'max_bytes'
+        elif deadline is not None and time.monotonic() > deadline:
+            stopped = 'max_seconds'
+        if stopped:
+            break
+    parser.feed(decoder.decode(b'', final=True))
+    parser.close()
+    return parser.text(), {'bytes': read, 'stopped': stopped}
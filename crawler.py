@@ -0,0 +1,399 @@
+"""
+Polite bulk crawler for the CPF source pages.
+
+    python crawler.py crawl [--output pages.jsonl] [--stats-json crawl_stats.json]
+
+Fetches every URL in CPF_URLS (or a file of URLs) with a concurrency
+window per host that adapts by additive increase / multiplicative
+decrease: each success widens the window by about one request per
+round trip, while a 429 or 503, a timeout, or time to response headers
+staying well above the host's recent baseline for a round trip halves
+it. robots.txt is read once per
+host: disallowed URLs are skipped, Crawl-delay spaces out request
+starts, and Retry-After pauses the host. The window settles near the
+most the host serves without throttling, with no per-host tuning.
+
+Extracted page text goes into the app's shared "pages" cache, so the
+assistant answers from it without fetching, and optionally to a JSONL
+file. stats() reports live per-host windows, latencies and counts; the
+CLI prints a line every few seconds and can keep a JSON copy up to date.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+from cpf_sources import CPF_URLS, PAGE_CACHE_TTL_SECONDS, extract_text
+
+USER_AGENT = "CPFInfoHubCrawler/1.0"
+
+# AIMD window bounds, in concurrent requests per host
+INITIAL_CONCURRENCY = 2
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 32
+DECREASE_FACTOR = 0.5
+
+# After congestion at n concurrent requests, stay below n this long before probing again
+PROBE_INTERVAL_SECONDS = 30.0
+
+# Latency above this multiple of the host's baseline counts as congestion
+LATENCY_CONGESTION_FACTOR = 3.0
+
+# The baseline is the lower quartile of this many recent latencies, so it
+# follows the host as it changes and one unusually fast response is outvoted
+LATENCY_BASELINE_SAMPLES = 50
+LATENCY_MIN_SAMPLES = 8
+
+# Weight of the newest sample in the smoothed latency
+LATENCY_SMOOTHING = 0.2
+
+REQUEST_TIMEOUT_SECONDS = 20
+MAX_ATTEMPTS = 4
+
+# Pause after a throttled or failed attempt when the host gives no Retry-After
+RETRY_BACKOFF_SECONDS = 2.0
+MAX_RETRY_AFTER_SECONDS = 300
+
+THROTTLE_STATUSES = {429, 503}
+
+STATS_INTERVAL_SECONDS = 2.0
+
+class AIMDWindow:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit.
+
+    The limit grows by 1/limit per success (one request per window's
+    worth of successes) and is multiplied by DECREASE_FACTOR on a
+    congestion signal, at most once per smoothed round trip so that one
+    burst of failures from requests already in flight counts once. The
+    window size that drew the signal is then off limits for
+    PROBE_INTERVAL_SECONDS, so the window refills to just below it and
+    stays there instead of being throttled again every few round trips.
+
+    Latency counts as congestion only once every response for a full
+    smoothed round trip has been above LATENCY_CONGESTION_FACTOR times
+    the baseline, so a single slow response is not a signal.
+    """
+
+    def __init__(self, initial: float = INITIAL_CONCURRENCY, minimum: float = MIN_CONCURRENCY,
+                 maximum: float = MAX_CONCURRENCY):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency = None
+        self.samples = deque(maxlen=LATENCY_BASELINE_SAMPLES)
+        self.decreases = 0
+        self.ceiling = None  # most slots allowed until ceiling_until
+        self.ceiling_until = 0.0
+        self._last_decrease = 0.0
+        self._high_since = None  # when latency last went above the congestion threshold
+
+    @property
+    def slots(self) -> int:
+        return max(int(self.limit), 1)
+
+    @property
+    def base_latency(self) -> Optional[float]:
+        """Lower quartile of the recent latencies, once there are enough of them."""
+        if len(self.samples) < LATENCY_MIN_SAMPLES:
+            return None
+        return sorted(self.samples)[len(self.samples) // 4]
+
+    def on_success(self, latency: float) -> None:
+        """Record a successful request's time to response headers."""
+        now = time.monotonic()
+        self.latency = latency if self.latency is None else (
+            (1 - LATENCY_SMOOTHING) * self.latency + LATENCY_SMOOTHING * latency
+        )
+        self.samples.append(latency)
+        base = self.base_latency
+        if base is None or latency <= LATENCY_CONGESTION_FACTOR * base:
+            self._high_since = None
+        elif self._high_since is None:
+            self._high_since = now
+        if self._high_since is not None and now - self._high_since >= self.latency:
+            self._high_since = None
+            self.on_congestion()
+        else:
+            maximum = self.maximum
+            if self.ceiling is not None and time.monotonic() < self.ceiling_until:
+                maximum = min(maximum, self.ceiling + 0.99)
+            self.limit = min(self.limit + 1 / self.limit, maximum)
+
+    def on_congestion(self) -> None:
+        now = time.monotonic()
+        if self.latency is not None and now - self._last_decrease < self.latency:
+            return
+        self._last_decrease = now
+        self.ceiling = max(self.slots - 1, self.minimum)
+        self.ceiling_until = now + PROBE_INTERVAL_SECONDS
+        self.limit = max(self.limit * DECREASE_FACTOR, self.minimum)
+        self.decreases += 1
+
+class HostState:
+    """Queue, window, robots rules and counters for one host."""
+
+    def __init__(self, origin: str):
+        self.origin = origin
+        self.queue = deque()  # (url, attempt)
+        self.window = AIMDWindow()
+        self.robots = None
+        self.crawl_delay = 0.0
+        self.ready_at = 0.0  # no request starts before this (monotonic)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.counts = {"ok": 0, "throttled": 0, "errors": 0, "failed": 0, "disallowed": 0}
+
+    def stats(self) -> Dict[str, object]:
+        window = self.window
+        return {
+            "queued": len(self.queue),
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "window": round(window.limit, 2),
+            "window_decreases": window.decreases,
+            "latency_ms": None if window.latency is None else round(window.latency * 1000, 1),
+            "base_latency_ms": None if window.base_latency is None else round(window.base_latency * 1000, 1),
+            "crawl_delay": self.crawl_delay,
+            **self.counts,
+        }
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After in seconds; HTTP-date values fall back to the default backoff."""
+    try:
+        return min(max(float(value), 0.0), MAX_RETRY_AFTER_SECONDS)
+    except (TypeError, ValueError):
+        return None
+
+class Crawler:
+    """
+    Crawl URLs with one adaptive window per host.
+
+    Args:
+        urls: URLs to fetch; duplicates are fetched once
+        on_page: Called with (url, text) for each page fetched
+        user_agent: Sent with every request and matched against robots.txt
+        max_concurrency: Upper bound on any host's window
+    """
+
+    def __init__(self, urls: Iterable[str], on_page: Optional[Callable[[str, str], None]] = None,
+                 user_agent: str = USER_AGENT, max_concurrency: int = MAX_CONCURRENCY):
+        self.on_page = on_page
+        self.user_agent = user_agent
+        self.hosts: Dict[str, HostState] = {}
+        self.total = 0
+        for url in dict.fromkeys(urls):
+            parts = urlsplit(url)
+            origin = f"{parts.scheme}://{parts.netloc}"
+            if origin not in self.hosts:
+                self.hosts[origin] = HostState(origin)
+                self.hosts[origin].window.maximum = max_concurrency
+            self.hosts[origin].queue.append((url, 1))
+            self.total += 1
+        self.started = None
+        self.finished = None
+        self.bytes = 0
+
+    @property
+    def done(self) -> int:
+        return sum(
+            state.counts["ok"] + state.counts["failed"] + state.counts["disallowed"]
+            for state in self.hosts.values()
+        )
+
+    def stats(self) -> Dict[str, object]:
+        """Live crawl progress, overall and per host."""
+        elapsed = ((self.finished or time.monotonic()) - self.started) if self.started else 0.0
+        done = self.done
+        return {
+            "elapsed_seconds": round(elapsed, 2),
+            "total": self.total,
+            "done": done,
+            "pages_per_second": round(done / elapsed, 2) if elapsed else 0.0,
+            "megabytes": round(self.bytes / 1e6, 2),
+            "hosts": {origin: state.stats() for origin, state in self.hosts.items()},
+        }
+
+    async def run(self) -> Dict[str, object]:
+        """Crawl every URL and return the final stats()."""
+        import aiohttp
+        self.started = time.monotonic()
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS)
+        # Windows, not the connector, limit concurrency
+        connector = aiohttp.TCPConnector(limit=0, limit_per_host=0)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector,
+                                         headers={"User-Agent": self.user_agent}) as session:
+            await asyncio.gather(*(self._crawl_host(session, state) for state in self.hosts.values()))
+        self.finished = time.monotonic()
+        return self.stats()
+
+    async def _load_robots(self, session, state: HostState) -> None:
+        import aiohttp
+        try:
+            async with session.get(f"{state.origin}/robots.txt") as response:
+                if response.status >= 400:
+                    return  # no robots.txt: everything allowed
+                text = await response.text(errors="replace")
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return
+        robots = RobotFileParser()
+        robots.parse(text.splitlines())
+        state.robots = robots
+        state.crawl_delay = float(robots.crawl_delay(self.user_agent) or 0.0)
+        if state.crawl_delay:
+            # Requests are spaced by the delay anyway; more in flight only queues at the host
+            state.window.maximum = state.window.minimum
+            state.window.limit = state.window.minimum
+
+    async def _crawl_host(self, session, state: HostState) -> None:
+        await self._load_robots(session, state)
+        tasks = set()
+        while state.queue or tasks:
+            now = time.monotonic()
+            if state.queue and state.in_flight < state.window.slots and now >= state.ready_at:
+                url, attempt = state.queue.popleft()
+                if state.robots is not None and not state.robots.can_fetch(self.user_agent, url):
+                    state.counts["disallowed"] += 1
+                    continue
+                state.ready_at = now + state.crawl_delay
+                # Counted here, not when the task starts, so the next pass sees the slot taken
+                state.in_flight += 1
+                state.peak_in_flight = max(state.peak_in_flight, state.in_flight)
+                task = asyncio.ensure_future(self._fetch(session, state, url, attempt))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                continue
+
+            # Wait for a request to finish or, with a free slot, for the host to be ready
+            timeout = None
+            if state.queue and state.in_flight < state.window.slots:
+                timeout = max(state.ready_at - now, 0.0)
+            if tasks:
+                await asyncio.wait(set(tasks), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            else:
+                await asyncio.sleep(timeout or 0.0)
+
+    async def _fetch(self, session, state: HostState, url: str, attempt: int) -> None:
+        import aiohttp
+        start = time.monotonic()
+        latency = None
+        retry_after = None
+        try:
+            async with session.get(url) as response:
+                # Time to headers: the body's download time depends on the page, not the host's load
+                latency = time.monotonic() - start
+                body = await response.read()
+                status = response.status
+                retry_after = _retry_after(response.headers.get("Retry-After"))
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            status = None
+        finally:
+            state.in_flight -= 1
+
+        if status is not None and status < 400:
+            state.window.on_success(latency)
+            state.counts["ok"] += 1
+            self.bytes += len(body)
+            text = await asyncio.get_running_loop().run_in_executor(
+                None, extract_text, body.decode("utf-8", errors="replace")
+            )
+            if self.on_page is not None:
+                self.on_page(url, text)
+            return
+
+        if status is None or status in THROTTLE_STATUSES:
+            state.window.on_congestion()
+            state.counts["throttled" if status else "errors"] += 1
+            if attempt < MAX_ATTEMPTS:
+                backoff = retry_after if retry_after is not None else RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+                state.ready_at = max(state.ready_at, time.monotonic() + backoff)
+                state.queue.append((url, attempt + 1))
+                return
+        else:
+            state.counts["errors"] += 1
+        state.counts["failed"] += 1
+
+def crawl(urls: Iterable[str], on_page: Optional[Callable[[str, str], None]] = None,
+          user_agent: str = USER_AGENT, max_concurrency: int = MAX_CONCURRENCY,
+          on_stats: Optional[Callable[[Dict[str, object]], None]] = None,
+          stats_interval: float = STATS_INTERVAL_SECONDS) -> Dict[str, object]:
+    """
+    Run a Crawler to completion, calling on_stats with its live stats every stats_interval seconds.
+
+    Returns:
+        The final stats
+    """
+    crawler = Crawler(urls, on_page, user_agent, max_concurrency)
+
+    async def main():
+        run = asyncio.ensure_future(crawler.run())
+        while on_stats is not None and not run.done():
+            await asyncio.wait({run}, timeout=stats_interval)
+            on_stats(crawler.stats())
+        return await run
+
+    return asyncio.run(main())
+
+def source_urls() -> List[str]:
+    return [url for urls in CPF_URLS.values() for url in urls]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crawl the CPF source pages into the page cache")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("crawl", help="fetch every source page")
+    run.add_argument("--urls", help="file with one URL per line (default: CPF_URLS)")
+    run.add_argument("--output", help="also write {url, text} lines to this JSONL file")
+    run.add_argument("--no-cache", action="store_true", help="do not store pages in the shared page cache")
+    run.add_argument("--stats-json", help="keep the live stats in this JSON file")
+    run.add_argument("--user-agent", default=USER_AGENT)
+    run.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    if args.urls:
+        with open(args.urls) as f:
+            urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    else:
+        urls = source_urls()
+
+    page_cache = None
+    if not args.no_cache:
+        from tiered_cache import TieredCache
+        page_cache = TieredCache("pages", ttl_seconds=PAGE_CACHE_TTL_SECONDS)
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+
+    def on_page(url, text):
+        if page_cache is not None and text:
+            page_cache.set(url, text)
+        if output is not None:
+            output.write(json.dumps({"url": url, "text": text}) + "\n")
+
+    def on_stats(stats):
+        hosts = ", ".join(
+            f"{urlsplit(origin).netloc} window {host['window']:g} in flight {host['in_flight']} "
+            f"latency {host['latency_ms']}ms throttled {host['throttled']}"
+            for origin, host in stats["hosts"].items()
+        )
+        print(f"{stats['done']}/{stats['total']} pages, {stats['pages_per_second']}/s; {hosts}", file=sys.stderr)
+        if args.stats_json:
+            tmp = args.stats_json + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(stats, f, indent=2)
+            os.replace(tmp, args.stats_json)
+
+    try:
+        stats = crawl(urls, on_page, args.user_agent, args.max_concurrency, on_stats)
+    finally:
+        if output is not None:
+            output.close()
+    on_stats(stats)
+    failed = sum(host["failed"] for host in stats["hosts"].values())
+    print(f"{stats['done']} of {stats['total']} pages in {stats['elapsed_seconds']}s, {failed} failed")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import json
+import hashlib
+from answer_bank import STOPWORDS, TOKEN_RE
+from tiered_cache import TieredCache
+
+def corpus_version(urls_dict):
+    """Short hash identifying the set of source URLs the agents research from"""
+    payload = json.dumps(urls_dict, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:12]
+
+def topic_terms(query):
+    """
+    The topic of a question: its content words, lowercased, without
+    stopwords or a plural "s", sorted and deduplicated. "Can I use my CPF
+    savings to buy a home?" and "How do I use CPF savings to buy a home"
+    share a topic.
+    """
+    words = [w for w in TOKEN_RE.findall(query.lower()) if w not in STOPWORDS]
+    return sorted({w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words})
+
+def topic_signature(terms, version):
+    """Key a topic by its terms and the corpus version researched from"""
+    payload = "\n".join([version] + sorted(set(terms))).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+class TaskResultCache:
+    """
+    Research/analysis task outputs keyed by topic signature. Backed by the
+    two-tier cache, so every server process sees research done by any of
+    them, and the entries survive Streamlit reruns.
+    """
+
+    def __init__(self, ttl_seconds=6 * 60 * 60, memory_entries=256):
+        self._cache = TieredCache("crew_tasks", ttl_seconds=ttl_seconds, memory_entries=memory_entries)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, signature):
+        """Return {"research": ..., "analysis": ...} or None"""
+        entry = self._cache.get(signature)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, signature, research, analysis):
+        if not research or not analysis:
+            return
+        self._cache.set(signature, {"research": research, "analysis": analysis})
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return dict(self._cache.stats(), hits=self.hits, misses=self.misses)
+
+# Shared by all sessions and server processes
+task_cache = TaskResultCache()
@@ -0,0 +1,165 @@
+import os
+import time
+import sqlite3
+import threading
+
+HISTORY_DB_PATH = os.getenv("CPF_HISTORY_DB_PATH", os.path.join("history", "history.db"))
+
+# Retention limits: newest N entries per session, and a maximum age for all
+MAX_ENTRIES_PER_SESSION = int(os.getenv("CPF_HISTORY_MAX_PER_SESSION", "200"))
+MAX_AGE_DAYS = float(os.getenv("CPF_HISTORY_MAX_AGE_DAYS", "30"))
+
+# add() prunes expired entries at most this often per process
+PRUNE_INTERVAL_SECONDS = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id);
+CREATE INDEX IF NOT EXISTS messages_created ON messages (created_at);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    question, answer, content='messages', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, question, answer) VALUES (new.id, new.question, new.answer);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, question, answer)
+    VALUES ('delete', old.id, old.question, old.answer);
+END;
+"""
+
+class HistoryStore:
+    """
+    Conversation history in SQLite, bounded per session. Uses FTS5 for
+    search when the SQLite build has it, otherwise falls back to LIKE.
+    """
+
+    def __init__(self, path=HISTORY_DB_PATH, max_entries=MAX_ENTRIES_PER_SESSION, max_age_days=MAX_AGE_DAYS):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self._local = threading.local()
+        self._prune_lock = threading.Lock()
+        self._next_prune = 0.0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        try:
+            conn.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False
+        self.prune_expired()
+
+    def _connect(self):
+        # One connection per thread; Streamlit serves sessions on separate threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, session_id, question, answer):
+        """
+        Store a Q&A and drop the session's entries beyond the retention
+        limit; expired entries of all sessions are pruned hourly from here.
+        """
+        self._prune_if_due()
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO messages (session_id, question, answer, created_at) VALUES (?, ?, ?, ?)",
+                (session_id, question, answer, time.time())
+            )
+            conn.execute(
+                """DELETE FROM messages WHERE session_id = ? AND id NOT IN (
+                       SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?)""",
+                (session_id, session_id, self.max_entries)
+            )
+        return cursor.lastrowid
+
+    def prune_expired(self):
+        """Delete entries older than the maximum age, across all sessions"""
+        cutoff = time.time() - self.max_age_days * 86400
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM messages WHERE created_at < ?", (cutoff,))
+        self._next_prune = time.time() + PRUNE_INTERVAL_SECONDS
+
+    def _prune_if_due(self):
+        if time.time() < self._next_prune or not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            if time.time() >= self._next_prune:
+                self.prune_expired()
+        finally:
+            self._prune_lock.release()
+
+    def count(self, session_id):
+        row = self._connect().execute(
+            "SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0]
+
+    def page(self, session_id, page=1, page_size=5):
+        """Entries for a 1-based page, newest first"""
+        rows = self._connect().execute(
+            """SELECT id, question, answer, created_at FROM messages
+               WHERE session_id = ? ORDER BY id DESC LIMIT ? OFFSET ?""",
+            (session_id, page_size, (page - 1) * page_size)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def recent(self, session_id, n=5):
+        return self.page(session_id, 1, n)
+
+    def search(self, session_id, query, limit=20):
+        """Full-text search over this session's questions and answers"""
+        conn = self._connect()
+        if self.has_fts:
+            # Quote each term so user input cannot inject FTS query syntax
+            terms = " ".join('"{}"'.format(t.replace('"', '""')) for t in query.split())
+            if not terms:
+                return []
+            rows = conn.execute(
+                """SELECT m.id, m.question, m.answer, m.created_at,
+                          snippet(messages_fts, 1, '**', '**', ' … ', 12) AS snippet
+                   FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+                   WHERE messages_fts MATCH ? AND m.session_id = ?
+                   ORDER BY bm25(messages_fts) LIMIT ?""",
+                (terms, session_id, limit)
+            ).fetchall()
+        else:
+            pattern = f"%{query}%"
+            rows = conn.execute(
+                """SELECT id, question, answer, created_at, NULL AS snippet FROM messages
+                   WHERE session_id = ? AND (question LIKE ? OR answer LIKE ?)
+                   ORDER BY id DESC LIMIT ?""",
+                (session_id, pattern, pattern, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_history_store():
+    """Process-wide store, created on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore()
+        return _store
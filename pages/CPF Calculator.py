@@ -1,10 +1,45 @@
 import streamlit as st
-import matplotlib.pyplot as plt
 import numpy as np
 import datetime
-from typing import Tuple, Dict, Union
+from typing import Tuple, Dict, Optional
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import pandas as pd
+from cpf_core.policy import (
+    ORDINARY_WAGES_CEILING,
+    BRS_2024,
+    FRS_2024,
+    ERS_2024,
+    CPF_RATES,
+    ALLOCATIONS,
+    get_age_group,
+)
+from cpf_core.calculator import (
+    calculate_allocations,
+    calculate_contributions,
+    format_milestone,
+    generate_explanation,
+)
+from cpf_core.projection import DEFAULT_INTEREST_RATES
+from cpf_core.housing import LOAN_TYPES, largest_affordable_prices
+from cpf_core.cpflife import MORTALITY, PLANS, estimate_payouts, ra_at_65, ra_at_65_from_projection
+from cpf_core.planning import project_member
+from cpf_core.sweep import sweep_projections
+from cpf_core.milestones import MIN_HORIZON_YEARS, retirement_sum_schedule
+from tiered_cache import memoized
+
+# Memoized results and figures are shared by all sessions for this long
+CACHE_TTL_SECONDS = 3600
+
+# Entries each memoized namespace keeps in the shared disk cache; figures are the bulkiest
+RESULT_DISK_ENTRIES = 2000
+FIGURE_DISK_ENTRIES = 500
+
+# Longest stretch of a projection chart drawn month by month
+MAX_MONTHLY_POINTS = 120
+
+# Charts with at least this many series use WebGL traces
+WEBGL_MIN_TRACES = 8
 
 # Streamlit page config
 st.set_page_config(
@@ -13,137 +48,45 @@ st.set_page_config(
     page_icon="🌐"
 )
 
-# Add the missing wage ceiling constants
-ORDINARY_WAGES_CEILING = 6000.00  # Monthly ceiling
-ADDITIONAL_WAGES_CEILING = 102000.00  # Yearly ceiling
-TOTAL_WAGES_CEILING = 102000.00  # Total annual ceiling
-
-# CPF Life milestone constants
-BRS_2024 = 102000
-FRS_2024 = 198800
-ERS_2024 = 298800
-
-
-# Constants (keeping your existing constants)
-# Constants (keeping your existing constants)
-CPF_RATES: Dict[str, Tuple[float, float, float]] = {
-    "35 years and below": (0.37, 0.20, 0.17),
-    "Above 35 to 45 years": (0.37, 0.20, 0.17),
-    "Above 45 to 50 years": (0.37, 0.20, 0.17),
-    "Above 50 to 55 years": (0.37, 0.20, 0.17),
-    "Above 55 to 60 years": (0.31, 0.16, 0.15),
-    "Above 60 to 65 years": (0.22, 0.105, 0.115),
-    "Above 65 to 70 years": (0.165, 0.075, 0.09),
-    "Above 70 years": (0.125, 0.05, 0.075)
-}
-
-ALLOCATIONS: Dict[str, Tuple[float, float, float]] = {
-    "35 years and below": (0.6217, 0.1621, 0.2162),
-    "Above 35 to 45 years": (0.5677, 0.1891, 0.2432),
-    "Above 45 to 50 years": (0.5136, 0.2162, 0.2702),
-    "Above 50 to 55 years": (0.4055, 0.3108, 0.2837),
-    "Above 55 to 60 years": (0.3872, 0.2741, 0.3387),
-    "Above 60 to 65 years": (0.1592, 0.3636, 0.4772),
-    "Above 65 to 70 years": (0.0607, 0.303, 0.6363),
-    "Above 70 years": (0.08, 0.08, 0.84)
-}
-
-# CPF Life milestone constants
-BRS_2024 = 102000
-FRS_2024 = 198800
-ERS_2024 = 298800
-
-def get_age_group(birth_date: datetime.date) -> str:
-    """
-    Determine age group based on birth date.
-    
-    Args:
-        birth_date: Date of birth
-    
-    Returns:
-        str: Age group category
-    """
-    today = datetime.date.today()
-    age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-    
-    if age <= 35:
-        return "35 years and below"
-    elif age <= 45:
-        return "Above 35 to 45 years"
-    elif age <= 50:
-        return "Above 45 to 50 years"
-    elif age <= 55:
-        return "Above 50 to 55 years"
-    elif age <= 60:
-        return "Above 55 to 60 years"
-    elif age <= 65:
-        return "Above 60 to 65 years"
-    elif age <= 70:
-        return "Above 65 to 70 years"
-    else:
-        return "Above 70 years"
-
-def calculate_contributions(
-    ordinary_wages: float,
-    additional_wages: float,
-    age_group: str,
-    total_wages_ytd: float = 0.0
-) -> Tuple[float, float, float]:
-    """
-    Calculate CPF contributions with consideration for YTD wages.
-    
-    Args:
-        ordinary_wages: Monthly ordinary wages
-        additional_wages: Additional wages (bonus, etc.)
-        age_group: Age group category
-        total_wages_ytd: Year-to-date wages before current contribution
-        
-    Returns:
-        Tuple containing total CPF, employee share, and employer share
-    """
-    rate, employee_rate, employer_rate = CPF_RATES[age_group]
-    
-    # Check total wages ceiling
-    remaining_ceiling = max(0, TOTAL_WAGES_CEILING - total_wages_ytd)
-    
-    # Cap ordinary wages
-    capped_ordinary_wages = min(ordinary_wages, ORDINARY_WAGES_CEILING)
-    
-    # Calculate remaining ceiling for additional wages
-    remaining_aw_ceiling = max(0, remaining_ceiling - capped_ordinary_wages)
-    capped_additional_wages = min(additional_wages, remaining_aw_ceiling)
-    
-    # Calculate contributions
-    total_cpf = (rate * capped_ordinary_wages) + (rate * capped_additional_wages)
-    employee_share = (employee_rate * capped_ordinary_wages) + (employee_rate * capped_additional_wages)
-    employer_share = total_cpf - employee_share
-    
-    return total_cpf, employee_share, employer_share
-
-def calculate_allocations(
-    total_cpf: float,
-    age_group: str
-) -> Tuple[float, float, float]:
-    """
-    Calculate allocations for CPF accounts.
-    
-    Args:
-        total_cpf: Total CPF contribution amount
-        age_group: Age group category
+@memoized("contribution_pies", ttl_seconds=CACHE_TTL_SECONDS, disk_entries=FIGURE_DISK_ENTRIES)
+def contribution_pies_figure(
+    employee_share: float,
+    employer_share: float,
+    medisave: float,
+    special: float,
+    ordinary: float
+) -> go.Figure:
+    """Contribution and allocation pie charts, drawn in the browser by plotly."""
+    fig = make_subplots(
+        rows=1,
+        cols=2,
+        specs=[[{"type": "domain"}, {"type": "domain"}]],
+        subplot_titles=("Contribution Shares", "Account Allocations")
+    )
     
-    Returns:
-        Tuple containing Medisave, Special, and Ordinary account allocations
-    """
-    if total_cpf <= 0:
-        return 0, 0, 0
-
-    medisave_rate, special_rate, ordinary_rate = ALLOCATIONS[age_group]
+    # Percentage and amount on each slice
+    texttemplate = "%{label}<br>%{percent:.1%}<br>($%{value:,.2f})"
     
-    medisave_allocation = round(medisave_rate * total_cpf, 2)
-    special_allocation = round(special_rate * total_cpf, 2)
-    ordinary_allocation = round(total_cpf - medisave_allocation - special_allocation, 2)
+    # First pie chart: Contribution shares
+    fig.add_trace(go.Pie(
+        labels=['Employee Share', 'Employer Share'],
+        values=[round(employee_share, 2), round(employer_share, 2)],
+        marker=dict(colors=['#FF9999', '#66B2FF']),
+        texttemplate=texttemplate,
+        sort=False
+    ), row=1, col=1)
     
-    return medisave_allocation, special_allocation, ordinary_allocation
+    # Second pie chart: Account allocations
+    fig.add_trace(go.Pie(
+        labels=['MediSave', 'Special', 'Ordinary'],
+        values=[round(medisave, 2), round(special, 2), round(ordinary, 2)],
+        marker=dict(colors=['#99FF99', '#FFCC99', '#FF99CC']),
+        texttemplate=texttemplate,
+        sort=False
+    ), row=1, col=2)
+    
+    fig.update_layout(showlegend=False, margin=dict(t=60, b=20))
+    return fig
 
 def plot_contributions(
     total_cpf: float,
@@ -154,124 +97,114 @@ def plot_contributions(
     ordinary: float
 ) -> None:
     """Generate interactive pie charts to visualize CPF contributions."""
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-    
-    # Custom autopct function to display both percentage and value
-    def make_autopct(values):
-        def autopct(pct):
-            total = sum(values)
-            val = int(round(pct*total/100.0))
-            return f'{pct:.1f}%\n(${val:.2f})'
-        return autopct
-    
-    # First pie chart: Contribution shares
-    contribution_labels = ['Employee Share', 'Employer Share']
-    contribution_sizes = [employee_share, employer_share]
-    contribution_colors = ['#FF9999', '#66B2FF']
-    
-    ax1.pie(contribution_sizes, labels=contribution_labels, colors=contribution_colors,
-            autopct=make_autopct(contribution_sizes), shadow=True, startangle=90)
-    ax1.set_title('Contribution Shares')
-    
-    # Second pie chart: Account allocations
-    allocation_labels = ['MediSave', 'Special', 'Ordinary']
-    allocation_sizes = [medisave, special, ordinary]
-    allocation_colors = ['#99FF99', '#FFCC99', '#FF99CC']
-    
-    ax2.pie(allocation_sizes, labels=allocation_labels, colors=allocation_colors,
-            autopct=make_autopct(allocation_sizes), shadow=True, startangle=90)
-    ax2.set_title('Account Allocations')
-    
-    plt.tight_layout()
-    st.pyplot(fig)
-
-def calculate_future_balance(
-    current_contribution: float,
-    years: int,
-    annual_increment: float = 0.03,
-    interest_rates: Dict[str, float] = {"OA": 0.025, "SA": 0.04, "MA": 0.04}
-) -> Dict[str, list]:
+    fig = contribution_pies_figure(employee_share, employer_share, medisave, special, ordinary)
+    st.plotly_chart(fig, use_container_width=True)
+
+def sample_months(n_months: int, window: Optional[Tuple[int, int]] = None) -> np.ndarray:
     """
-    Project future CPF balances based on current contribution patterns.
-    
-    Args:
-        current_contribution: Monthly contribution amount
-        years: Number of years to project
-        annual_increment: Expected annual salary increment
-        interest_rates: Dictionary of interest rates for each account
-    
-    Returns:
-        Dictionary containing projected balances for each account
+    Month indices to plot.
+
+    Year-end months and the final month are always kept. Every month is
+    kept inside the zoom window (start, end) when it spans at most
+    MAX_MONTHLY_POINTS months, or everywhere when the whole projection does.
     """
-    monthly_data = {
-        "OA": [],
-        "SA": [],
-        "MA": [],
-        "Total": [],
-        "Months": []
-    }
-    
-    oa_balance = 0
-    sa_balance = 0
-    ma_balance = 0
-    monthly_contribution = current_contribution
-    
-    for month in range(years * 12):
-        # Apply annual increment
-        if month % 12 == 0 and month > 0:
-            monthly_contribution *= (1 + annual_increment)
-        
-        # Calculate monthly allocation based on new allocation ratios
-        medisave_rate, special_rate, ordinary_rate = ALLOCATIONS[get_age_group(datetime.date.today())]
-        oa_contribution = monthly_contribution * ordinary_rate
-        sa_contribution = monthly_contribution * special_rate
-        ma_contribution = monthly_contribution * medisave_rate
+    months = np.arange(n_months)
+    keep = (months % 12 == 11) | (months == n_months - 1)
+    if window is None:
+        window = (0, n_months)
+    start, end = window
+    if end - start <= MAX_MONTHLY_POINTS:
+        keep |= (months >= start) & (months < end)
+    return months[keep]
+
+def plot_future_projections(
+    monthly_data: Dict[str, list],
+    percentile_bands: Optional[Dict[str, np.ndarray]] = None,
+    retirement_sums: Optional[np.ndarray] = None,
+    window: Optional[Tuple[int, int]] = None
+) -> go.Figure:
+    """
+    Create an interactive plot showing CPF balance projections.
 
-        
-        # Add interest (monthly)
-        oa_balance = (oa_balance + oa_contribution) * (1 + interest_rates["OA"]/12)
-        sa_balance = (sa_balance + sa_contribution) * (1 + interest_rates["SA"]/12)
-        ma_balance = (ma_balance + ma_contribution) * (1 + interest_rates["MA"]/12)
-        
-        total_balance = oa_balance + sa_balance + ma_balance
-        
-        monthly_data["OA"].append(oa_balance)
-        monthly_data["SA"].append(sa_balance)
-        monthly_data["MA"].append(ma_balance)
-        monthly_data["Total"].append(total_balance)
-        monthly_data["Months"].append(month)
-    
-    return monthly_data
+    Long projections are sent as year-end points, with monthly detail
+    inside the zoom window (see sample_months), and balances are rounded
+    to cents to keep the figure small.
 
-def plot_future_projections(monthly_data: Dict[str, list]) -> go.Figure:
-    """Create an interactive plot showing CPF balance projections."""
+    Args:
+        monthly_data: Deterministic projection from calculate_future_balance
+        percentile_bands: Optional Monte Carlo result with P10/P50/P90 totals
+        retirement_sums: Optional BRS/FRS/ERS per month from retirement_sum_schedule
+        window: Optional (start, end) months to zoom into
+    """
     fig = go.Figure()
+    index = sample_months(len(monthly_data["Months"]), window)
+    months = np.asarray(monthly_data["Months"])[index]
+    
+    def sampled(values):
+        return np.round(np.asarray(values)[index], 2)
+    
+    # WebGL renders many series faster than SVG
+    n_traces = 3 + (3 if percentile_bands is not None else 0) + (2 if retirement_sums is not None else 0)
+    Scatter = go.Scattergl if n_traces >= WEBGL_MIN_TRACES else go.Scatter
     
     # Add traces for each account
-    fig.add_trace(go.Scatter(
-        x=monthly_data["Months"],
-        y=monthly_data["OA"],
+    fig.add_trace(Scatter(
+        x=months,
+        y=sampled(monthly_data["OA"]),
         name="Ordinary Account",
         fill='tonexty'
     ))
     
-    fig.add_trace(go.Scatter(
-        x=monthly_data["Months"],
-        y=monthly_data["SA"],
+    fig.add_trace(Scatter(
+        x=months,
+        y=sampled(monthly_data["SA"]),
         name="Special Account",
         fill='tonexty'
     ))
     
-    fig.add_trace(go.Scatter(
-        x=monthly_data["Months"],
-        y=monthly_data["MA"],
+    fig.add_trace(Scatter(
+        x=months,
+        y=sampled(monthly_data["MA"]),
         name="MediSave Account",
         fill='tonexty'
     ))
     
-    # Add milestone reference lines
-    fig.add_hline(y=BRS_2024, line_dash="dash", annotation_text="Basic Retirement Sum")
-    fig.add_hline(y=FRS_2024, line_dash="dash", annotation_text="Full Retirement Sum")
+    # Total balance range across simulated paths
+    if percentile_bands is not None:
+        fig.add_trace(Scatter(
+            x=months,
+            y=sampled(percentile_bands["P90"]),
+            name="Total (90th percentile)",
+            line=dict(width=0),
+            showlegend=False
+        ))
+        fig.add_trace(Scatter(
+            x=months,
+            y=sampled(percentile_bands["P10"]),
+            name="Total (10th-90th percentile)",
+            fill='tonexty',
+            fillcolor="rgba(99, 110, 250, 0.2)",
+            line=dict(width=0)
+        ))
+        fig.add_trace(Scatter(
+            x=months,
+            y=sampled(percentile_bands["P50"]),
+            name="Total (median)",
+            line=dict(dash="dot", color="rgb(99, 110, 250)")
+        ))
+    
+    # Add milestone reference lines, rising with the retirement sums when given
+    if retirement_sums is not None:
+        for column, name in ((0, "Basic Retirement Sum"), (1, "Full Retirement Sum")):
+            fig.add_trace(Scatter(
+                x=months,
+                y=sampled(retirement_sums[:, column]),
+                name=name,
+                line=dict(dash="dash", color="grey", shape="hv")
+            ))
+    else:
+        fig.add_hline(y=BRS_2024, line_dash="dash", annotation_text="Basic Retirement Sum")
+        fig.add_hline(y=FRS_2024, line_dash="dash", annotation_text="Full Retirement Sum")
     
     fig.update_layout(
         title="Projected CPF Balance Over Time",
@@ -279,109 +212,188 @@ def plot_future_projections(monthly_data: Dict[str, list]) -> go.Figure:
         yaxis_title="Balance (SGD)",
         hovermode='x unified'
     )
+    if window is not None:
+        fig.update_xaxes(range=[window[0], window[1] - 1])
     
     return fig
 
-def generate_explanation(
-    ordinary_wages: float,
-    total_cpf: float,
-    employee_share: float,
-    employer_share: float,
-    age_group: str,
-    medisave: float,
-    special: float,
-    ordinary: float
-) -> str:
-    """Generate a detailed explanation of the CPF contribution calculation."""
-    
-    total_rate, employee_rate, employer_rate = CPF_RATES[age_group]
-    
-    explanation = f"""
-    ### 📊 Understanding Your CPF Contribution
+@memoized("projections", ttl_seconds=CACHE_TTL_SECONDS, disk_entries=RESULT_DISK_ENTRIES)
+def build_projections(
+    monthly_contribution: float,
+    projection_years: int,
+    salary_increment: float,
+    birth_date: datetime.date,
+    current_balances: Dict[str, float],
+    simulation: Optional[Dict[str, float]],
+    start_date: datetime.date,
+    housing: Optional[Dict[str, object]] = None
+) -> Dict[str, object]:
+    """project_member() for one set of inputs, shared across sessions."""
+    return project_member(
+        monthly_contribution, projection_years, salary_increment, birth_date,
+        current_balances, simulation, start_date, housing
+    )
 
-    #### 💰 Contribution Breakdown
-    Based on your monthly ordinary wages of ${ordinary_wages:,.2f}:
-    
-    * Your contribution rate is {employee_rate*100:.1f}% = ${employee_share:,.2f}
-    * Your employer's contribution rate is {employer_rate*100:.1f}% = ${employer_share:,.2f}
-    * Total contribution rate is {total_rate*100:.1f}% = ${total_cpf:,.2f}
+@memoized("projection_figures", ttl_seconds=CACHE_TTL_SECONDS, disk_entries=FIGURE_DISK_ENTRIES)
+def build_projection_figure(
+    monthly_contribution: float,
+    projection_years: int,
+    salary_increment: float,
+    birth_date: datetime.date,
+    current_balances: Dict[str, float],
+    simulation: Optional[Dict[str, float]],
+    start_date: datetime.date,
+    housing: Optional[Dict[str, object]] = None,
+    window: Optional[Tuple[int, int]] = None
+) -> go.Figure:
+    """Projection chart for build_projections() inputs, zoomed to window."""
+    projections = build_projections(
+        monthly_contribution, projection_years, salary_increment, birth_date,
+        current_balances, simulation, start_date, housing
+    )
+    monthly_data = projections["monthly_data"]
+    return plot_future_projections(
+        monthly_data,
+        projections["percentile_bands"],
+        retirement_sum_schedule(monthly_data["Months"], start_date),
+        window
+    )
 
-    #### 🏦 Account Allocation Details
-    Your monthly contribution of ${total_cpf:,.2f} is distributed as follows:
-    
-    * Ordinary Account (for housing, investment, education):
-        * {ALLOCATIONS[age_group][2]*100:.1f}% = ${ordinary:,.2f}
-    * Special Account (for retirement):
-        * {ALLOCATIONS[age_group][1]*100:.1f}% = ${special:,.2f}
-    * MediSave Account (for healthcare):
-        * {ALLOCATIONS[age_group][0]*100:.1f}% = ${medisave:,.2f}
-
-    #### 📈 Key Financial Insights
-    * Your annual CPF contribution (excluding bonuses) would be: ${total_cpf*12:,.2f}
-    * This represents ${(total_cpf/ordinary_wages*100):.1f}% of your monthly income
-    """
-    
-    return explanation
+@memoized("sweep_figures", ttl_seconds=CACHE_TTL_SECONDS, disk_entries=FIGURE_DISK_ENTRIES)
+def build_sweep_figures(
+    wages: Tuple[float, ...],
+    increments: Tuple[float, ...],
+    years: Tuple[int, ...],
+    extra_rates: Tuple[float, ...],
+    selected_years: int,
+    selected_extra: float,
+    birth_date: datetime.date,
+    start_date: datetime.date
+) -> Tuple[go.Figure, go.Figure]:
+    """Final-balance and time-to-FRS heatmaps for one sweep and selection."""
+    rate_scenarios = [
+        {account: rate + extra / 100 for account, rate in DEFAULT_INTEREST_RATES.items()}
+        for extra in extra_rates
+    ]
+    
+    # One broadcast over every scenario; unchanged scenarios come from the sweep's own cache
+    sweep = sweep_projections(
+        wages, increments, years, rate_scenarios, birth_date=birth_date, start_date=start_date
+    )
+    rate_index = list(extra_rates).index(selected_extra)
+    year_index = list(years).index(selected_years)
+    
+    balance_figure = plot_sweep_heatmap(
+        sweep["final_total"][rate_index, :, year_index, :],
+        sweep["wages"],
+        sweep["increments"],
+        f"Projected Total CPF Balance after {selected_years} Years",
+        "Balance ($)"
+    )
+    frs_figure = plot_sweep_heatmap(
+        sweep["months_to_target"][rate_index] / 12,
+        sweep["wages"],
+        sweep["increments"],
+        f"Years for Special Account to Reach the FRS (${FRS_2024:,.0f}, rising yearly)",
+        "Years"
+    )
+    return balance_figure, frs_figure
+
+def plot_sweep_heatmap(
+    z: np.ndarray,
+    wages: np.ndarray,
+    increments: np.ndarray,
+    title: str,
+    colorbar_title: str
+) -> go.Figure:
+    """Heatmap of a sweep result over monthly wage (x) and salary increment (y)."""
+    fig = go.Figure(go.Heatmap(
+        z=z,
+        x=wages,
+        y=increments * 100,
+        colorscale="Viridis",
+        colorbar=dict(title=colorbar_title),
+        hovertemplate="Wage: $%{x:,.0f}<br>Increment: %{y:.1f}%<br>" + colorbar_title + ": %{z:,.1f}<extra></extra>"
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title="Monthly Ordinary Wages ($)",
+        yaxis_title="Annual Salary Increment (%)"
+    )
+    return fig
 
-def calculate_milestones(
-    current_balance: Dict[str, float],
-    monthly_contribution: float,
-    age_group: str
-) -> Dict[str, Union[float, str]]:
-    """
-    Calculate time to reach various CPF milestones.
-    
-    Args:
-        current_balance: Dictionary with current balances for each account
-        monthly_contribution: Total monthly CPF contribution
-        age_group: Age group for allocation rates
-    
-    Returns:
-        Dictionary with years to reach BRS and FRS
-    """
-    # Get SA allocation rate for the age group
-    sa_allocation_rate = ALLOCATIONS[age_group][1]  # Special Account allocation rate
-    monthly_sa_contribution = monthly_contribution * sa_allocation_rate
-    
-    def years_to_target(target: float, current: float, monthly: float) -> Union[float, str]:
-        if current >= target:
-            return "Already achieved"
-            
-        # Calculate how much more is needed
-        remaining = target - current
-        
-        # Calculate years needed considering compound interest
-        # Using simplified compound interest formula with monthly contributions
-        r = 0.04  # SA interest rate (4% per annum)
-        r_monthly = r / 12
-        
-        # Using formula: FV = PMT * ((1 + r)^n - 1) / r
-        # Solving for n: n = log(1 + (FV * r) / PMT) / log(1 + r)
-        # Where FV is remaining amount needed, PMT is monthly contribution
-        
-        if monthly_sa_contribution <= 0:
-            return "Cannot be achieved with current contribution"
-            
-        try:
-            n_months = np.log(1 + (remaining * r_monthly) / monthly_sa_contribution) / np.log(1 + r_monthly)
-            years = n_months / 12
-            
-            if years < 0 or years > 100:  # Sanity check
-                return "Cannot be achieved with current contribution"
-            
-            return round(years, 1)
-        except:
-            return "Cannot be achieved with current contribution"
-    
-    # Calculate years to reach each milestone
-    brs_years = years_to_target(BRS_2024, current_balance['SA'], monthly_sa_contribution)
-    frs_years = years_to_target(FRS_2024, current_balance['SA'], monthly_sa_contribution)
+def show_scenario_sweep(birth_date: datetime.date):
+    """Heatmaps of final balance and time to FRS across many projection scenarios."""
+    st.subheader("Scenario Sweep")
+    st.markdown("""
+    See how your final CPF balance and the time for your Special Account to reach the
+    Full Retirement Sum change across a range of wages, salary increments and projection periods.
+    """)
     
-    return {
-        "BRS": brs_years,
-        "FRS": frs_years
-    }
-            
+    col1, col2 = st.columns(2)
+    with col1:
+        wage_range = st.slider(
+            "Monthly Ordinary Wages ($)",
+            min_value=500,
+            max_value=int(ORDINARY_WAGES_CEILING),
+            value=(1000, int(ORDINARY_WAGES_CEILING)),
+            step=250,
+            key="sweep_wages"
+        )
+        increment_range = st.slider(
+            "Annual Salary Increment (%)",
+            min_value=0.0,
+            max_value=10.0,
+            value=(0.0, 6.0),
+            step=0.5,
+            key="sweep_increments"
+        )
+    with col2:
+        year_range = st.slider(
+            "Projection Period (Years)",
+            min_value=1,
+            max_value=40,
+            value=(5, 30),
+            key="sweep_years"
+        )
+        extra_rates = st.multiselect(
+            "Extra interest above the base rates (% per annum)",
+            options=[0.0, 0.25, 0.5, 0.75, 1.0],
+            default=[0.0],
+            key="sweep_rates"
+        ) or [0.0]
+    
+    wages = np.arange(wage_range[0], wage_range[1] + 1, 250, dtype=float)
+    increments = np.round(np.arange(increment_range[0], increment_range[1] + 0.25, 0.5), 1) / 100
+    years = np.arange(year_range[0], year_range[1] + 1)
+    col1, col2 = st.columns(2)
+    with col1:
+        selected_years = st.select_slider(
+            "Show final balance after (years)",
+            options=list(years),
+            value=years[-1],
+            key="sweep_selected_years"
+        )
+    with col2:
+        selected_extra = st.selectbox(
+            "Interest rate scenario",
+            options=extra_rates,
+            format_func=lambda extra: "Base rates" if extra == 0 else f"Base + {extra:.2f}%",
+            key="sweep_selected_rate"
+        )
+    balance_figure, frs_figure = build_sweep_figures(
+        tuple(wages.tolist()),
+        tuple(increments.tolist()),
+        tuple(years.tolist()),
+        tuple(extra_rates),
+        int(selected_years),
+        selected_extra,
+        birth_date,
+        datetime.date.today()
+    )
+    st.plotly_chart(balance_figure, use_container_width=True)
+    st.plotly_chart(frs_figure, use_container_width=True)
+    st.caption(f"Blank cells do not reach the FRS within {years[-1]} years.")
 
 def main():
     """Main function to run the enhanced Streamlit app."""
@@ -393,7 +405,7 @@ def main():
     * IMPORTANT: Please key in your Date of Birth at the sidebar on the left before using Calculator or Future Projections""")
     
     # Create tabs for different sections
-    tab1, tab2, tab3 = st.tabs(["Calculator", "Future Projections", "Educational Resources"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Calculator", "Future Projections", "Scenario Sweep", "Educational Resources"])
     
     # Common inputs that will be needed across tabs
     st.sidebar.subheader("Personal Information")
@@ -402,6 +414,12 @@ def main():
         min_value=datetime.date(1900, 1, 1),
         max_value=datetime.date.today()
     )
+    sex = st.sidebar.radio(
+        "Sex (for CPF LIFE payout estimates)",
+        options=list(MORTALITY),
+        format_func=str.title,
+        horizontal=True
+    )
     
     # Calculate age group once - will be used in multiple places
     age_group = get_age_group(birth_date)
@@ -520,6 +538,73 @@ def main():
             current_ma = st.number_input("Current MediSave Account Balance ($)", 
                                        min_value=0.0, format="%.2f")
         
+        simulate = st.checkbox(
+            "Show uncertainty range (Monte Carlo)",
+            help="Simulate salary growth, employment gaps and interest rate changes"
+        )
+        if simulate:
+            with st.expander("Simulation settings", expanded=False):
+                sim_col1, sim_col2 = st.columns(2)
+                with sim_col1:
+                    n_paths = st.select_slider(
+                        "Simulated paths",
+                        options=[500, 1000, 2000, 5000, 10000, 20000],
+                        value=2000
+                    )
+                    increment_volatility = st.slider(
+                        "Salary increment variability (% per year)",
+                        min_value=0.0, max_value=5.0, value=2.0, step=0.5
+                    ) / 100
+                    rate_volatility = st.slider(
+                        "Interest rate variability (% per year)",
+                        min_value=0.0, max_value=1.0, value=0.25, step=0.05
+                    ) / 100
+                with sim_col2:
+                    gap_probability = st.slider(
+                        "Chance of an employment gap each year (%)",
+                        min_value=0.0, max_value=30.0, value=5.0, step=1.0
+                    ) / 100
+                    mean_gap_months = st.slider(
+                        "Average gap length (months)",
+                        min_value=1, max_value=24, value=4
+                    )
+        
+        buy_home = st.checkbox(
+            "Include a home purchase",
+            help="Buy a home in the first month and pay the loan from your Ordinary Account"
+        )
+        if buy_home:
+            with st.expander("Home purchase settings", expanded=True):
+                home_col1, home_col2 = st.columns(2)
+                with home_col1:
+                    loan_type = st.radio("Loan", options=list(LOAN_TYPES), horizontal=True)
+                    property_price = st.number_input(
+                        "Purchase price ($)",
+                        min_value=0.0,
+                        value=500000.0,
+                        step=10000.0,
+                        format="%.2f"
+                    )
+                    oa_share = st.slider(
+                        "Share of each instalment paid from the OA (%)",
+                        min_value=0, max_value=100, value=100, step=5
+                    ) / 100
+                with home_col2:
+                    loan_tenure = st.slider(
+                        "Loan tenure (years)",
+                        min_value=5,
+                        max_value=LOAN_TYPES[loan_type]["max_tenure"],
+                        value=LOAN_TYPES[loan_type]["max_tenure"]
+                    )
+                    loan_rate = st.number_input(
+                        "Loan interest rate (% per annum)",
+                        min_value=0.0,
+                        max_value=10.0,
+                        value=LOAN_TYPES[loan_type]["rate"] * 100,
+                        step=0.05,
+                        format="%.2f"
+                    ) / 100
+        
         if st.button("Generate Projections", type="primary"):
             current_balances = {
                 "OA": current_oa,
@@ -531,52 +616,130 @@ def main():
             total_rate, _, _ = CPF_RATES[age_group]
             monthly_contribution = monthly_wage * total_rate
             
-            # Calculate projections
-            monthly_data = calculate_future_balance(
-                monthly_contribution,
-                projection_years,
-                salary_increment
-            )
+            simulation = None
+            if simulate:
+                simulation = dict(
+                    n_paths=n_paths,
+                    increment_volatility=increment_volatility,
+                    gap_probability=gap_probability,
+                    mean_gap_months=mean_gap_months,
+                    rate_volatility=rate_volatility
+                )
+            
+            housing = None
+            if buy_home:
+                housing = dict(
+                    price=property_price,
+                    loan_type=loan_type,
+                    tenure_years=loan_tenure,
+                    annual_rate=loan_rate,
+                    oa_share=oa_share
+                )
             
-            # Calculate milestones
-            milestones = calculate_milestones(
-                current_balances,
-                monthly_contribution,
-                age_group
+            # Kept so the results survive reruns, e.g. when zooming the chart
+            st.session_state["projection_inputs"] = dict(
+                monthly_contribution=monthly_contribution,
+                projection_years=projection_years,
+                salary_increment=salary_increment,
+                birth_date=birth_date,
+                current_balances=current_balances,
+                simulation=simulation,
+                start_date=datetime.date.today(),
+                housing=housing
             )
+        
+        inputs = st.session_state.get("projection_inputs")
+        if inputs is not None:
+            # Projections and milestones, shared across sessions with the same inputs
+            with st.spinner("Calculating projections..."):
+                projections = build_projections(**inputs)
+            monthly_data = projections["monthly_data"]
+            percentile_bands = projections["percentile_bands"]
+            milestones = projections["milestones"]
+            loan = projections["loan"]
+            shown_years = inputs["projection_years"]
+            milestone_horizon = max(shown_years, MIN_HORIZON_YEARS)
             
             # Display milestone information
             st.markdown(f"""
             ### 🎯 CPF Milestones
-            Based on your current contribution patterns:
+            Based on your current contribution patterns, salary increments and age:
             
-            * Basic Retirement Sum (${BRS_2024:,.2f}): {
-                f"Will reach in approximately {milestones['BRS']} years" 
-                if isinstance(milestones['BRS'], (int, float)) 
-                else milestones['BRS']
-            }
-            * Full Retirement Sum (${FRS_2024:,.2f}): {
-                f"Will reach in approximately {milestones['FRS']} years" 
-                if isinstance(milestones['FRS'], (int, float)) 
-                else milestones['FRS']
-            }
+            * Basic Retirement Sum (${BRS_2024:,.2f}): {format_milestone(milestones['BRS'], milestone_horizon)}
+            * Full Retirement Sum (${FRS_2024:,.2f}): {format_milestone(milestones['FRS'], milestone_horizon)}
+            
+            Milestones are measured on your Special Account against retirement sums that rise each year.
             """)
             
-            # Display projection chart
-            fig = plot_future_projections(monthly_data)
-            st.plotly_chart(fig, use_container_width=True)
+            if percentile_bands is not None:
+                st.markdown(f"""
+                Across {inputs['simulation']['n_paths']:,} simulated paths over {shown_years} years:
+                
+                * Chance of reaching the Basic Retirement Sum: {percentile_bands['prob_brs']:.0%}
+                * Chance of reaching the Full Retirement Sum: {percentile_bands['prob_frs']:.0%}
+                """)
+            
+            if loan is not None:
+                paid_from_oa = monthly_data["OA_Withdrawn"].sum()
+                st.markdown(f"""
+                ### 🏠 Home Loan
+                
+                * Loan of ${loan['loan']:,.2f} at {inputs['housing']['annual_rate']:.2%} over {inputs['housing']['tenure_years']} years: ${loan['schedule']['installment'][0]:,.2f} a month
+                * Downpayment: ${loan['oa_downpayment']:,.2f} from your OA and ${loan['cash_downpayment']:,.2f} in cash
+                * Instalments over the projection: ${paid_from_oa:,.2f} from your OA and ${loan['cash_installments'].sum():,.2f} in cash
+                """)
+            
+            # Display projection chart; zooming in to a short stretch shows every month
+            zoom = st.slider(
+                "Zoom (years)",
+                min_value=0,
+                max_value=shown_years,
+                value=(0, shown_years),
+                key=f"projection_zoom_{shown_years}"
+            )
+            window = None if zoom == (0, shown_years) else (zoom[0] * 12, max(zoom[1], zoom[0] + 1) * 12)
+            st.plotly_chart(build_projection_figure(window=window, **inputs), use_container_width=True)
+            
+            # Largest home each loan type supports with today's OA balance and OA contribution
+            monthly_income = inputs["monthly_contribution"] / CPF_RATES[age_group][0]
+            affordable = largest_affordable_prices(
+                monthly_income,
+                inputs["current_balances"]["OA"],
+                inputs["monthly_contribution"] * ALLOCATIONS[age_group][2]
+            )
+            affordability = ", ".join(
+                f"{loan_type} loan ${price:,.0f}" if not np.isnan(price) else f"{loan_type} loan not yet"
+                for loan_type, price in affordable.items()
+            )
             
             # Display key insights
             st.markdown(f"""
             ### 📊 Key Insights
             
-            * By year {projection_years}, your projected total CPF balance will be: ${monthly_data['Total'][-1]:,.2f}
-            * Your Ordinary Account can potentially fund a property worth up to: ${min(monthly_data['OA'][-1] * 4, 1000000):,.2f}
+            * By year {shown_years}, your projected total CPF balance will be: ${monthly_data['Total'][-1]:,.2f}{
+                f" (likely between ${percentile_bands['P10'][-1]:,.0f} and ${percentile_bands['P90'][-1]:,.0f})"
+                if percentile_bands is not None else ""
+            }
+            * With your current OA balance and OA contributions alone, the largest home you could finance today: {affordability}
             * Your Special Account growth benefits from the higher interest rate of 4% per annum
             * MediSave provides a healthcare safety net with a projected balance of ${monthly_data['MA'][-1]:,.2f}
             """)
+            
+            # CPF LIFE payouts once the projection reaches RA formation at 55
+            ra_balance = ra_at_65_from_projection(monthly_data, inputs["birth_date"], inputs["start_date"])
+            if ra_balance is not None:
+                payouts = estimate_payouts(ra_balance, sex=sex)
+                st.markdown(f"""
+                ### 🧓 CPF LIFE
+                
+                Setting aside up to the Full Retirement Sum at 55 gives an estimated Retirement Account of ${ra_balance:,.0f} at 65, with first monthly payouts of:
+                """)
+                st.markdown("\n".join(f"* {plan} Plan: ${payouts[plan]:,.0f}" for plan in PLANS))
     
     with tab3:
+        show_scenario_sweep(birth_date)
+    
+    with tab4:
         st.subheader("CPF Educational Resources")
         
         # CPF Knowledge Base
@@ -683,7 +846,22 @@ def main():
                 * Basic Plan
                 * Standard Plan
                 * Escalating Plan
+            
+            #### Estimated First Monthly Payouts
+            Retirement sum set aside at 55, earning 4% a year until payouts start at 65:
             """)
+            
+            # All sums and plans priced in one call
+            sums = np.array([BRS_2024, FRS_2024, ERS_2024])
+            payouts = estimate_payouts(ra_at_65(sums, 0.0, sums), sex=sex)
+            st.table(pd.DataFrame(
+                {f"{plan} Plan": [f"${payout:,.0f}" for payout in payouts[plan]] for plan in PLANS},
+                index=["BRS", "FRS", "ERS"]
+            ))
+            st.caption(
+                "Estimates from survival-weighted annuity factors; "
+                "your actual payouts are set by the CPF Board when you join CPF LIFE."
+            )
 
         # Investment Options
         with st.expander("CPF Investment Options"):
@@ -0,0 +1,165 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from telemetry import load_spans, TELEMETRY_PATH
+from tiered_cache import all_stats, disk_summary
+from warmup import readiness
+
+# Pipeline stages in the order they run for a query
+STAGES = [
+    "is_cpf_related",
+    "answer_bank_lookup",
+    "identify_relevant_url",
+    "fetch_webpage_content",
+    "process_crew_query",
+    "crew_task",
+    "agent_llm_call",
+    "get_openai_response",
+    "query",
+]
+
+def spans_dataframe(spans):
+    """Flatten exported spans into a DataFrame, leaving out the warm-up's page fetches"""
+    spans = [s for s in spans if not (s.get("attributes") or {}).get("warmup")]
+    if not spans:
+        return pd.DataFrame()
+    df = pd.DataFrame(spans)
+    df["start"] = pd.to_datetime(df["start"], unit="s")
+    df["estimated"] = df["attributes"].apply(lambda a: bool((a or {}).get("estimated")))
+    return df
+
+def per_query_costs(df):
+    """
+    Aggregate spans into one row per query. Estimated token counts from
+    crew task/step spans are left out so the crew's reported usage is not
+    counted twice.
+    """
+    roots = df[df["name"] == "query"].set_index("trace_id")
+    billed = df[~df["estimated"]]
+    totals = billed.groupby("trace_id").agg(
+        prompt_tokens=("prompt_tokens", "sum"),
+        completion_tokens=("completion_tokens", "sum"),
+        cost_usd=("cost_usd", "sum"),
+        bytes_fetched=("bytes", "sum"),
+    )
+    totals = totals.join(roots[["start", "duration_ms", "attributes"]], how="inner")
+    totals["query"] = totals["attributes"].apply(lambda a: (a or {}).get("query", ""))
+    return totals.drop(columns="attributes").sort_values("start", ascending=False)
+
+def cache_stats_dataframe():
+    """One row per cache tier: this process's memory tier and the shared disk tier"""
+    rows = []
+    for namespace, stats in all_stats().items():
+        for tier in ("memory", "disk"):
+            tier_stats = stats[tier]
+            lookups = tier_stats["hits"] + tier_stats["misses"]
+            rows.append(dict(
+                cache=namespace, tier=tier, **tier_stats,
+                hit_rate=tier_stats["hits"] / lookups if lookups else None,
+                computations=stats["compute"]["computations"] if tier == "disk" else None,
+                lock_waits=stats["compute"]["lock_waits"] if tier == "disk" else None,
+            ))
+    return pd.DataFrame(rows)
+
+def show_cache_section():
+    st.header("Caches")
+    st.write("Memory-tier counters are for this server process; the disk tier is shared by all of them.")
+    df = cache_stats_dataframe()
+    if not df.empty:
+        st.dataframe(df.set_index(["cache", "tier"]), use_container_width=True)
+    shared = disk_summary()
+    if shared:
+        st.write("Shared disk tier contents:")
+        st.dataframe(pd.DataFrame(shared).T, use_container_width=True)
+    elif df.empty:
+        st.info("No caches in use yet.")
+
+def show_warmup_section():
+    st.header("Warm-up")
+    status = readiness()
+    if status["started"] is None:
+        st.info("The warm-up worker has not started in this server process.")
+        return
+    st.write("Ready." if status["ready"] else f"Warming up: {status['done']} of {status['total']} steps done.")
+    st.dataframe(pd.DataFrame(status["steps"]).T, use_container_width=True)
+
+def show_metrics_page():
+    st.set_page_config(
+        page_title="Metrics - CPF Information Hub",
+        page_icon="⏱️",
+        layout="wide"
+    )
+
+    st.title("Query Pipeline Metrics")
+    st.write(f"Per-stage latency, bytes fetched, token usage and estimated cost, read from `{TELEMETRY_PATH}`.")
+
+    show_warmup_section()
+    show_cache_section()
+
+    spans = load_spans()
+    df = spans_dataframe(spans)
+    if df.empty:
+        st.info("No spans recorded yet. Ask a question on the main page to generate some.")
+        return
+
+    # Stage summary
+    st.header("Stage Summary")
+    summary = df.groupby("name").agg(
+        calls=("span_id", "count"),
+        p50_ms=("duration_ms", "median"),
+        p95_ms=("duration_ms", lambda d: d.quantile(0.95)),
+        max_ms=("duration_ms", "max"),
+        bytes=("bytes", "sum"),
+        prompt_tokens=("prompt_tokens", "sum"),
+        completion_tokens=("completion_tokens", "sum"),
+        cost_usd=("cost_usd", "sum"),
+        errors=("status", lambda s: int((s == "error").sum())),
+    )
+    summary = summary.reindex([s for s in STAGES if s in summary.index] +
+                              [s for s in summary.index if s not in STAGES])
+    st.dataframe(summary.style.format({
+        "p50_ms": "{:,.1f}", "p95_ms": "{:,.1f}", "max_ms": "{:,.1f}", "cost_usd": "${:,.4f}"
+    }), use_container_width=True)
+
+    # Latency histograms
+    st.header("Latency by Stage")
+    stages = [s for s in summary.index]
+    selected = st.multiselect("Stages", stages, default=stages)
+    log_x = st.checkbox("Log scale", value=True)
+    if selected:
+        fig = px.histogram(
+            df[df["name"].isin(selected)],
+            x="duration_ms",
+            color="name",
+            facet_row="name",
+            nbins=40,
+            log_x=log_x,
+            height=max(300, 180 * len(selected)),
+        )
+        fig.update_yaxes(matches=None, title_text="")
+        fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+        fig.update_layout(showlegend=False, xaxis_title="Wall time (ms)")
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Cost per query
+    st.header("Cost per Query")
+    queries = per_query_costs(df)
+    if queries.empty:
+        st.info("No completed queries recorded yet.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Queries", f"{len(queries):,}")
+    col2.metric("Mean cost", f"${queries['cost_usd'].mean():,.4f}")
+    col3.metric("Mean latency", f"{queries['duration_ms'].mean() / 1000:,.1f} s")
+
+    fig = px.histogram(queries, x="cost_usd", nbins=30)
+    fig.update_layout(xaxis_title="Estimated cost per query (USD)", yaxis_title="Queries")
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.dataframe(queries.style.format({
+        "cost_usd": "${:,.4f}", "duration_ms": "{:,.0f}"
+    }), use_container_width=True)
+
+if __name__ == "__main__":
+    show_metrics_page()
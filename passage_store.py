@@ -0,0 +1,361 @@
+"""
+Compressed, memory-mapped store of the chunked CPF corpus.
+
+    python passage_store.py build pages.jsonl   # {url, text} lines, e.g. from crawler.py --output
+    python passage_store.py stats
+    python passage_store.py get https://www.cpf.gov.sg/member/home-ownership
+
+Pages are split into passages of about PASSAGE_CHARS characters, and the
+passages are packed into zlib frames of about FRAME_BYTES each in one blob
+file. Two numpy index files hold, per passage, its frame, offset and
+length within the decompressed frame and its source page, and per frame,
+its offset and length in the blob.
+
+Readers memory-map the blob and the indexes, so opening the store loads
+no text at all: a lookup decompresses only the frames holding the
+requested passages, straight from the mapped pages, and keeps a few
+recently used frames. Every Streamlit worker shares the mapped files
+through the OS page cache, so per-worker memory stays flat however
+large the corpus.
+
+Each build writes files under a new build id and swaps the manifest in
+last, so readers never see a half-written store.
+"""
+import os
+import re
+import sys
+import json
+import mmap
+import zlib
+import uuid
+import argparse
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+CORPUS_DIR = os.getenv("CPF_CORPUS_DIR", "corpus")
+MANIFEST_NAME = "manifest.json"
+
+# Target passage length; passages break at sentence ends where possible
+PASSAGE_CHARS = 800
+
+# Uncompressed bytes per frame: larger frames compress better, smaller ones read less per lookup
+FRAME_BYTES = 64 * 1024
+COMPRESSION_LEVEL = 6
+
+# Decompressed frames kept per reader
+CACHED_FRAMES = 16
+
+PASSAGE_DTYPE = np.dtype([
+    ("source", "<u4"),  # index into the manifest's sources
+    ("chunk", "<u4"),   # passage number within its source
+    ("frame", "<u4"),
+    ("start", "<u4"),   # byte offset in the decompressed frame
+    ("length", "<u4"),  # bytes of UTF-8
+])
+
+FRAME_DTYPE = np.dtype([
+    ("offset", "<u8"),  # byte offset in the blob
+    ("length", "<u4"),  # compressed bytes
+])
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def chunk_text(text: str, max_chars: int = PASSAGE_CHARS) -> List[str]:
+    """Split text into passages of at most about max_chars, breaking at sentence ends."""
+    passages = []
+    current = ""
+    for sentence in _SENTENCE_END.split(" ".join(text.split())):
+        while len(sentence) > max_chars:
+            # A sentence longer than a passage breaks at the last space that fits
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                passages.append(current)
+                current = ""
+            passages.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            passages.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        passages.append(current)
+    return passages
+
+def build_store(
+    pages: Iterable[Tuple[str, str]],
+    directory: str = CORPUS_DIR,
+    max_chars: int = PASSAGE_CHARS,
+    frame_bytes: int = FRAME_BYTES
+) -> Dict[str, object]:
+    """
+    Chunk pages and write them as a new build of the store.
+
+    Passages are written in source order, so each source's passages are
+    one contiguous run of the index. Files of the previous build are
+    removed once the new manifest is in place.
+
+    Args:
+        pages: (url, text) pairs; a repeated url keeps its last text
+        directory: Store directory
+        max_chars: Target passage length
+        frame_bytes: Uncompressed bytes per frame
+
+    Returns:
+        The new manifest
+    """
+    os.makedirs(directory, exist_ok=True)
+    texts = dict(pages)
+    sources = sorted(texts)
+    build = uuid.uuid4().hex[:12]
+    names = {"blob": f"blob-{build}.bin", "passages": f"passages-{build}.npy", "frames": f"frames-{build}.npy"}
+
+    passages, frames = [], []
+    frame, frame_size = [], 0
+    raw_bytes = 0
+    with open(os.path.join(directory, names["blob"]), "wb") as blob:
+
+        def flush():
+            nonlocal frame, frame_size
+            data = zlib.compress(b"".join(frame), COMPRESSION_LEVEL)
+            frames.append((blob.tell(), len(data)))
+            blob.write(data)
+            frame, frame_size = [], 0
+
+        for source, url in enumerate(sources):
+            for chunk, passage in enumerate(chunk_text(texts[url], max_chars)):
+                encoded = passage.encode("utf-8")
+                if frame and frame_size + len(encoded) > frame_bytes:
+                    flush()
+                passages.append((source, chunk, len(frames), frame_size, len(encoded)))
+                frame.append(encoded)
+                frame_size += len(encoded)
+                raw_bytes += len(encoded)
+        if frame:
+            flush()
+        compressed_bytes = blob.tell()
+
+    np.save(os.path.join(directory, names["passages"]), np.array(passages, dtype=PASSAGE_DTYPE))
+    np.save(os.path.join(directory, names["frames"]), np.array(frames, dtype=FRAME_DTYPE))
+
+    manifest = {
+        "build": build,
+        "files": names,
+        "sources": sources,
+        "passages": len(passages),
+        "frames": len(frames),
+        "passage_chars": max_chars,
+        "frame_bytes": frame_bytes,
+        "raw_bytes": raw_bytes,
+        "compressed_bytes": compressed_bytes,
+    }
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    previous = _read_manifest(manifest_path)
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+    # Open readers keep their mappings of the old files after the unlink
+    if previous is not None:
+        for name in previous["files"].values():
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+    return manifest
+
+def _read_manifest(path: str) -> Optional[Dict[str, object]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+class PassageStore:
+    """
+    Read-only view of one build of the store.
+
+    Passages are addressed by their position in the index; passage_id()
+    gives the stable "url#chunk" form. Safe to share between threads.
+    """
+
+    def __init__(self, directory: str = CORPUS_DIR, cached_frames: int = CACHED_FRAMES):
+        manifest = _read_manifest(os.path.join(directory, MANIFEST_NAME))
+        if manifest is None:
+            raise FileNotFoundError(f"No passage store in {directory}; run: python passage_store.py build")
+        self.manifest = manifest
+        self.sources = manifest["sources"]
+        self._source_index = {url: i for i, url in enumerate(self.sources)}
+        files = {kind: os.path.join(directory, name) for kind, name in manifest["files"].items()}
+        self.passages = np.load(files["passages"], mmap_mode="r")
+        self.frames = np.load(files["frames"], mmap_mode="r")
+        with open(files["blob"], "rb") as f:
+            # An empty corpus has an empty blob, which cannot be mapped
+            self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if manifest["compressed_bytes"] else b""
+        self._cached_frames = cached_frames
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+        self.frame_reads = 0
+        self.frame_hits = 0
+
+    def __len__(self) -> int:
+        return len(self.passages)
+
+    def _frame(self, i: int) -> bytes:
+        with self._lock:
+            data = self._frames.get(i)
+            if data is not None:
+                self._frames.move_to_end(i)
+                self.frame_hits += 1
+                return data
+        offset, length = int(self.frames[i]["offset"]), int(self.frames[i]["length"])
+        # Decompress straight from the mapped pages, without copying the compressed bytes
+        with memoryview(self._blob) as view:
+            data = zlib.decompress(view[offset:offset + length])
+        with self._lock:
+            self.frame_reads += 1
+            self._frames[i] = data
+            while len(self._frames) > self._cached_frames:
+                self._frames.popitem(last=False)
+        return data
+
+    def get(self, i: int) -> str:
+        """Text of passage i."""
+        entry = self.passages[i]
+        start = int(entry["start"])
+        return self._frame(int(entry["frame"]))[start:start + int(entry["length"])].decode("utf-8")
+
+    def get_many(self, indices: Iterable[int]) -> List[str]:
+        """Texts of several passages, decompressing each frame involved once."""
+        indices = list(indices)
+        texts = [None] * len(indices)
+        order = sorted(range(len(indices)), key=lambda k: int(self.passages[indices[k]]["frame"]))
+        for k in order:
+            texts[k] = self.get(indices[k])
+        return texts
+
+    def passage_id(self, i: int) -> str:
+        entry = self.passages[i]
+        return f"{self.sources[int(entry['source'])]}#{int(entry['chunk'])}"
+
+    def source_range(self, url: str) -> range:
+        """Indices of the passages from one source page (empty if not stored)."""
+        source = self._source_index.get(url)
+        if source is None:
+            return range(0)
+        column = self.passages["source"]
+        return range(
+            int(np.searchsorted(column, source, side="left")),
+            int(np.searchsorted(column, source, side="right"))
+        )
+
+    def page_text(self, url: str, max_chars: Optional[int] = None) -> Optional[str]:
+        """
+        A source page's text, or None if the page is not stored.
+
+        With max_chars, only the passages needed to reach it are read.
+        """
+        indices = self.source_range(url)
+        if not indices:
+            return None
+        parts, length = [], 0
+        for i in indices:
+            parts.append(self.get(i))
+            length += len(parts[-1]) + 1
+            if max_chars is not None and length > max_chars:
+                break
+        text = " ".join(parts)
+        return text if max_chars is None else text[:max_chars]
+
+    def stats(self) -> Dict[str, object]:
+        manifest = self.manifest
+        return {
+            "build": manifest["build"],
+            "sources": len(self.sources),
+            "passages": manifest["passages"],
+            "frames": manifest["frames"],
+            "raw_bytes": manifest["raw_bytes"],
+            "compressed_bytes": manifest["compressed_bytes"],
+            "compression_ratio": manifest["raw_bytes"] / manifest["compressed_bytes"] if manifest["compressed_bytes"] else 0.0,
+            "cached_frames": len(self._frames),
+            "frame_reads": self.frame_reads,
+            "frame_hits": self.frame_hits,
+        }
+
+    def close(self) -> None:
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+
+_store = None
+_store_version = None
+_store_lock = threading.Lock()
+
+def get_store(directory: str = CORPUS_DIR) -> Optional[PassageStore]:
+    """
+    The process-wide store, reopened when a new build is published, or
+    None when no store has been built.
+    """
+    global _store, _store_version
+    try:
+        version = os.stat(os.path.join(directory, MANIFEST_NAME)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _store_lock:
+        if _store is None or _store_version != version:
+            try:
+                _store = PassageStore(directory)
+            except FileNotFoundError:
+                # Swapped between reading the manifest and opening its files
+                return _store
+            _store_version = version
+        return _store
+
+def read_pages(path: str) -> Iterable[Tuple[str, str]]:
+    """(url, text) pairs from a JSONL file of {"url", "text"} objects."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                page = json.loads(line)
+                yield page["url"], page["text"]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the compressed passage store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="chunk and compress pages into a new build")
+    build.add_argument("pages", nargs="+", help="JSONL files of {url, text} (crawler.py --output)")
+    build.add_argument("--passage-chars", type=int, default=PASSAGE_CHARS)
+    build.add_argument("--frame-bytes", type=int, default=FRAME_BYTES)
+    sub.add_parser("stats", help="show the current build")
+    get = sub.add_parser("get", help="print a stored page's passages")
+    get.add_argument("url")
+    for command in (build, get, sub.choices["stats"]):
+        command.add_argument("--dir", default=CORPUS_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        pages = (page for path in args.pages for page in read_pages(path))
+        manifest = build_store(pages, args.dir, args.passage_chars, args.frame_bytes)
+        print(f"{len(manifest['sources'])} pages, {manifest['passages']} passages in "
+              f"{manifest['frames']} frames, {manifest['raw_bytes']:,} -> "
+              f"{manifest['compressed_bytes']:,} bytes -> {args.dir}")
+        return 0
+
+    store = PassageStore(args.dir)
+    if args.command == "stats":
+        for name, value in store.stats().items():
+            print(f"{name}: {value:,.2f}" if isinstance(value, float) else f"{name}: {value}")
+        return 0
+
+    indices = store.source_range(args.url)
+    if not indices:
+        print(f"{args.url} is not in the store", file=sys.stderr)
+        return 1
+    for i in indices:
+        print(f"[{store.passage_id(i)}]\n{store.get(i)}\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
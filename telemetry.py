@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import uuid
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+
+# Where spans are exported, one JSON object per line
+TELEMETRY_PATH = os.getenv("CPF_TELEMETRY_PATH", os.path.join("telemetry", "spans.jsonl"))
+
+# Model used by CrewAI agents when OPENAI_MODEL_NAME is not set
+DEFAULT_MODEL = os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini")
+
+# USD per 1K tokens: (prompt, completion)
+MODEL_PRICING = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+}
+
+_current_span = contextvars.ContextVar("cpf_current_span", default=None)
+_export_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=8)
+def get_encoding(model=DEFAULT_MODEL):
+    """Load (once) the tiktoken encoding for a model"""
+    import tiktoken
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text, model=DEFAULT_MODEL):
+    """Count tokens in text with the model's tokenizer"""
+    if not text:
+        return 0
+    return len(get_encoding(model).encode(str(text)))
+
+
+def estimate_cost(prompt_tokens, completion_tokens, model=DEFAULT_MODEL):
+    """Estimate the USD cost of a call from its token counts"""
+    prompt_price, completion_price = MODEL_PRICING.get(model, MODEL_PRICING[DEFAULT_MODEL])
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+class Span:
+    """A timed stage of the query pipeline"""
+
+    def __init__(self, name, trace_id=None, parent_id=None, **attributes):
+        self.name = name
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.duration_ms = None
+        self.bytes = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+        self.status = "ok"
+        self.error = None
+        self.attributes = attributes
+        self._t0 = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add_bytes(self, n):
+        self.bytes += n
+
+    def add_tokens(self, prompt_tokens=0, completion_tokens=0, model=DEFAULT_MODEL):
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost_usd += estimate_cost(prompt_tokens, completion_tokens, model)
+        self.attributes.setdefault("model", model)
+
+    def end(self, duration_ms=None):
+        if self.duration_ms is None:
+            self.duration_ms = duration_ms if duration_ms is not None else (time.perf_counter() - self._t0) * 1000
+        export_span(self)
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "bytes": self.bytes,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": self.cost_usd,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+def current_span():
+    """Return the innermost active span, or None outside a trace"""
+    return _current_span.get()
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time a block as a span. Nested spans share the enclosing trace;
+    a span opened outside any trace starts a new one.
+    """
+    parent = _current_span.get()
+    s = Span(
+        name,
+        trace_id=parent.trace_id if parent else None,
+        parent_id=parent.span_id if parent else None,
+        **attributes
+    )
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.status = "error"
+        s.error = str(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        s.end()
+
+
+def traced(name=None):
+    """Decorator form of span()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_span(name, duration_ms, parent=None, prompt_tokens=0, completion_tokens=0,
+                model=DEFAULT_MODEL, **attributes):
+    """
+    Export an already-measured span. Used from callbacks that run on
+    worker threads, where the context variable is not inherited.
+    """
+    s = Span(
+        name,
+        trace_id=parent.trace_id if parent else None,
+        parent_id=parent.span_id if parent else None,
+        **attributes
+    )
+    s.start -= duration_ms / 1000
+    if prompt_tokens or completion_tokens:
+        s.add_tokens(prompt_tokens, completion_tokens, model)
+    s.end(duration_ms)
+    return s
+
+
+def export_span(s):
+    """Append a finished span to the JSON lines file"""
+    if os.getenv("CPF_TELEMETRY_DISABLED"):
+        return
+    line = json.dumps(s.to_dict(), default=str)
+    directory = os.path.dirname(TELEMETRY_PATH)
+    with _export_lock:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(TELEMETRY_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def load_spans(path=TELEMETRY_PATH):
+    """Read exported spans, skipping lines that fail to parse"""
+    spans = []
+    if not os.path.exists(path):
+        return spans
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except ValueError:
+                continue
+    return spans
@@ -0,0 +1,397 @@
+"""
+Two-tier cache shared by every Streamlit server process on a host.
+
+Tier 1 is an in-process LRU; tier 2 is a SQLite database in WAL mode that
+all workers read and write. get_or_compute() guards misses with a lease
+row in the same database so that only one process (and one thread within
+it) recomputes a key while the others wait for its result. Writers purge
+expired rows and trim each namespace to its row cap every
+PURGE_INTERVAL_SECONDS, or after a tenth of the cap in writes, so the
+file stays bounded.
+"""
+import os
+import time
+import pickle
+import sqlite3
+import datetime
+import hashlib
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+CACHE_DB_PATH = os.getenv("CPF_CACHE_DB_PATH", os.path.join("cache", "cache.db"))
+
+# How long a recomputation may hold a key before others take over
+LEASE_SECONDS = 120
+POLL_SECONDS = 0.05
+
+# Rows kept per namespace in the shared tier; the soonest to expire go first
+DEFAULT_DISK_ENTRIES = 10_000
+
+# Minimum time between one process's purges of a namespace
+PURGE_INTERVAL_SECONDS = 60
+
+_MISSING = object()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS entries_expiry ON entries (namespace, expires_at);
+CREATE TABLE IF NOT EXISTS leases (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+"""
+
+class MemoryTier:
+    """Thread-safe LRU with per-entry expiry"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, count=True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += count
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += count
+            return entry[0]
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions}
+
+class SQLiteTier:
+    """Cross-process tier: pickled values in a WAL-mode SQLite file"""
+
+    def __init__(self, path, namespace, max_entries=DEFAULT_DISK_ENTRIES):
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._next_purge = 0.0
+        self._writes_since_purge = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, count=True):
+        """Return (value, expires_at) or _MISSING"""
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ? AND expires_at >= ?",
+            (self.namespace, key, time.time())
+        ).fetchone()
+        if row is None:
+            self.misses += count
+            return _MISSING
+        self.hits += count
+        return pickle.loads(row[0]), row[1]
+
+    def set(self, key, value, expires_at):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (self.namespace, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), expires_at)
+        )
+        self.writes += 1
+        self._writes_since_purge += 1
+        # Purging after a tenth of the cap in writes keeps the row count within 10% of it
+        if time.time() >= self._next_purge or (
+                self.max_entries is not None and self._writes_since_purge * 10 >= self.max_entries):
+            self._next_purge = time.time() + PURGE_INTERVAL_SECONDS
+            self._writes_since_purge = 0
+            self.purge()
+
+    def delete(self, key):
+        self._connect().execute(
+            "DELETE FROM entries WHERE namespace = ? AND key = ?", (self.namespace, key)
+        )
+
+    def clear(self):
+        self._connect().execute("DELETE FROM entries WHERE namespace = ?", (self.namespace,))
+
+    def purge_expired(self):
+        self._connect().execute(
+            "DELETE FROM entries WHERE namespace = ? AND expires_at < ?", (self.namespace, time.time())
+        )
+
+    def purge(self):
+        """Drop expired rows, then the soonest-expiring rows over max_entries"""
+        self.purge_expired()
+        if self.max_entries is None:
+            return
+        cursor = self._connect().execute(
+            """DELETE FROM entries WHERE namespace = ? AND key IN (
+                   SELECT key FROM entries WHERE namespace = ?
+                   ORDER BY expires_at DESC LIMIT -1 OFFSET ?)""",
+            (self.namespace, self.namespace, self.max_entries)
+        )
+        self.evictions += max(cursor.rowcount, 0)
+
+    def try_lease(self, key, owner):
+        """Claim the right to recompute key; True if this owner holds it"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM leases WHERE namespace = ? AND key = ? AND expires_at < ?",
+                (self.namespace, key, now)
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO leases (namespace, key, owner, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, owner, now + LEASE_SECONDS)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def lease_held(self, key):
+        row = self._connect().execute(
+            "SELECT 1 FROM leases WHERE namespace = ? AND key = ? AND expires_at >= ?",
+            (self.namespace, key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def release_lease(self, key, owner):
+        self._connect().execute(
+            "DELETE FROM leases WHERE namespace = ? AND key = ? AND owner = ?",
+            (self.namespace, key, owner)
+        )
+
+    def stats(self):
+        count = self._connect().execute(
+            "SELECT COUNT(*) FROM entries WHERE namespace = ? AND expires_at >= ?",
+            (self.namespace, time.time())
+        ).fetchone()[0]
+        return {"entries": count, "hits": self.hits, "misses": self.misses, "writes": self.writes,
+                "evictions": self.evictions}
+
+class TieredCache:
+    """In-memory LRU in front of the shared SQLite tier, one namespace per use"""
+
+    def __init__(self, namespace, ttl_seconds=3600, memory_entries=512, path=CACHE_DB_PATH,
+                 disk_entries=DEFAULT_DISK_ENTRIES):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.memory = MemoryTier(memory_entries)
+        self.disk = SQLiteTier(path, namespace, disk_entries)
+        self._owner = f"{os.getpid()}-{id(self)}"
+        # key -> [lock, waiters] for keys being computed in this process
+        self._key_locks = {}
+        self._key_locks_lock = threading.Lock()
+        self.computations = 0
+        self.lock_waits = 0
+        _registry[namespace] = self
+
+    def get(self, key, default=None):
+        value = self._get(key)
+        return default if value is _MISSING else value
+
+    def _get(self, key, count=True):
+        value = self.memory.get(key, count)
+        if value is not _MISSING:
+            return value
+        found = self.disk.get(key, count)
+        if found is _MISSING:
+            return _MISSING
+        value, expires_at = found
+        self.memory.set(key, value, expires_at)
+        return value
+
+    def set(self, key, value, ttl_seconds=None):
+        expires_at = time.time() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        self.memory.set(key, value, expires_at)
+        self.disk.set(key, value, expires_at)
+
+    def delete(self, key):
+        self.memory.delete(key)
+        self.disk.delete(key)
+
+    def clear(self):
+        self.memory.clear()
+        self.disk.clear()
+
+    @contextmanager
+    def _key_lock(self, key):
+        """
+        Hold a lock of this key's own, so threads of one worker queue up per
+        key without blocking unrelated keys during a long compute. The lock
+        lives only while some thread holds or waits for it.
+        """
+        with self._key_locks_lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._key_locks_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[key]
+
+    def get_or_compute(self, key, compute, ttl_seconds=None, cacheable=None):
+        """
+        Return the cached value for key, or compute, store and return it.
+        Concurrent misses for the same key (across threads and processes)
+        wait for a single computation instead of all recomputing. Values
+        for which cacheable(value) is false are returned but not stored.
+        """
+        value = self._get(key)
+        if value is not _MISSING:
+            return value
+
+        with self._key_lock(key):
+            deadline = time.time() + LEASE_SECONDS
+            while True:
+                # Recheck without counting: this lookup was already counted as a miss above
+                value = self._get(key, count=False)
+                if value is not _MISSING:
+                    return value
+                if self.disk.try_lease(key, self._owner):
+                    break
+                # Another process is computing this key; wait for its result
+                self.lock_waits += 1
+                while self.disk.lease_held(key) and time.time() < deadline:
+                    time.sleep(POLL_SECONDS)
+                if time.time() >= deadline:
+                    break
+
+            try:
+                self.computations += 1
+                value = compute()
+                if cacheable is None or cacheable(value):
+                    self.set(key, value, ttl_seconds)
+                return value
+            finally:
+                self.disk.release_lease(key, self._owner)
+
+    def stats(self):
+        return {
+            "memory": self.memory.stats(),
+            "disk": self.disk.stats(),
+            "compute": {"computations": self.computations, "lock_waits": self.lock_waits},
+        }
+
+# Caches created in this process, by namespace
+_registry = {}
+
+def normalize_key(value):
+    """
+    Canonical form of a function argument for use in a cache key: numbers
+    compare by value (5000 and 5000.0 match, float noise is rounded off),
+    dicts by sorted items and sequences element-wise.
+    """
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return round(float(value), 6)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), normalize_key(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize_key(v) for v in value)
+    if hasattr(value, "tolist"):  # numpy scalars and arrays
+        return normalize_key(value.tolist())
+    return repr(value)
+
+def memoized(namespace, ttl_seconds=3600, memory_entries=128, disk_entries=DEFAULT_DISK_ENTRIES):
+    """
+    Cache a function's results in a TieredCache keyed on its normalized
+    arguments, so identical calls from any session or worker reuse one
+    result, keeping at most disk_entries of them in the shared tier. Hits
+    and misses show up in all_stats() under the namespace.
+    Streamlit re-executes page scripts on every rerun, so decorating again
+    reuses the namespace's existing cache rather than starting cold.
+    """
+    def decorator(func):
+        cache = _registry.get(namespace) or TieredCache(
+            namespace, ttl_seconds, memory_entries, disk_entries=disk_entries
+        )
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = normalize_key(tuple(bound.arguments.items()))
+            key = hashlib.sha256(repr((func.__qualname__, arguments)).encode("utf-8")).hexdigest()
+            return cache.get_or_compute(key, lambda: func(*bound.args, **bound.kwargs))
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+def all_stats():
+    """Per-tier stats for every cache created in this process"""
+    return {namespace: cache.stats() for namespace, cache in _registry.items()}
+
+def disk_summary(path=CACHE_DB_PATH):
+    """Live entry counts and bytes per namespace in the shared tier"""
+    if not os.path.exists(path):
+        return {}
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        rows = conn.execute(
+            """SELECT namespace, COUNT(*), SUM(LENGTH(value)) FROM entries
+               WHERE expires_at >= ? GROUP BY namespace""",
+            (time.time(),)
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    finally:
+        conn.close()
+    return {namespace: {"entries": count, "bytes": size or 0} for namespace, count, size in rows}
@@ -0,0 +1,154 @@
+"""
+Background warm-up of the query pipeline's cold paths.
+
+Started by the app on its first script run, so the login page renders
+at once while a daemon thread, once per server process:
+
+    tokenizer      loads the tiktoken encoding used for token counts
+    answer_bank    loads the precomputed answer bank and its index
+    passage_store  maps the compressed passage store, if one is built
+    agents         imports cpf_assistant: CrewAI, the OpenAI client, agents
+    pages          fills the shared page cache for the most-requested URLs
+
+readiness() reports each step's status and timing. A query that arrives
+first simply pays for whatever is not warm yet, as it would without the
+worker; a failed step is reported and never retried in the background.
+
+    python warmup.py   # run the steps in the foreground, e.g. from a deploy hook
+"""
+import os
+import sys
+import time
+import threading
+import functools
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+# Set CPF_WARMUP=0 to start the app cold
+WARMUP_ENABLED = os.getenv("CPF_WARMUP", "1") != "0"
+
+# Source pages fetched into the page cache, most requested first
+WARMUP_PAGES = int(os.getenv("CPF_WARMUP_PAGES", "20"))
+PAGE_FETCH_WORKERS = 4
+
+STEPS = ("tokenizer", "answer_bank", "passage_store", "agents", "pages")
+
+def most_requested_urls(limit: int = WARMUP_PAGES, spans: Optional[List[dict]] = None) -> List[str]:
+    """
+    Source URLs ranked by how often queries fetched them (from the
+    telemetry spans, leaving out the warm-up's own fetches), topped up
+    with CPF_URLS in listed order, general pages first.
+    """
+    from cpf_sources import CPF_URLS
+    from telemetry import load_spans
+    if spans is None:
+        spans = load_spans()
+    counts = Counter(
+        (span.get("attributes") or {}).get("url")
+        for span in spans
+        if span.get("name") == "fetch_webpage_content" and not (span.get("attributes") or {}).get("warmup")
+    )
+    counts.pop(None, None)
+    sources = CPF_URLS["general_info"] + [url for urls in CPF_URLS.values() for url in urls]
+    known = set(sources)
+    ranked = [url for url, _ in counts.most_common() if url in known]
+    return list(dict.fromkeys(ranked + sources))[:limit]
+
+def _warm_tokenizer():
+    from telemetry import get_encoding
+    get_encoding()
+
+def _warm_answer_bank():
+    from answer_bank import get_answer_bank
+    get_answer_bank()
+
+def _warm_passage_store():
+    from passage_store import get_store
+    get_store()
+
+def _warm_agents():
+    import cpf_assistant  # noqa: F401 - building the module builds the agents
+
+def _warm_pages():
+    from cpf_assistant import fetch_webpage_content, page_cache
+    urls = [url for url in most_requested_urls() if page_cache.get(url) is None]
+    with ThreadPoolExecutor(PAGE_FETCH_WORKERS) as pool:
+        fetched = list(pool.map(functools.partial(fetch_webpage_content, warmup=True), urls))
+    failed = sum(1 for content in fetched if not content)
+    if failed:
+        raise RuntimeError(f"{failed} of {len(urls)} pages could not be fetched")
+
+_STEP_FUNCTIONS = {
+    "tokenizer": _warm_tokenizer,
+    "answer_bank": _warm_answer_bank,
+    "passage_store": _warm_passage_store,
+    "agents": _warm_agents,
+    "pages": _warm_pages,
+}
+
+class Warmup:
+    """Runs the warm-up steps in order and records their progress."""
+
+    def __init__(self, steps=STEPS):
+        self.steps = {name: {"status": "pending", "seconds": None, "error": None} for name in steps}
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self) -> None:
+        """Start the background thread; later calls do nothing."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.run, name="cpf-warmup", daemon=True)
+            self._thread.start()
+
+    def run(self) -> None:
+        self.started = time.time()
+        for name, step in self.steps.items():
+            step["status"] = "running"
+            t0 = time.perf_counter()
+            try:
+                _STEP_FUNCTIONS[name]()
+                step["status"] = "done"
+            except Exception as e:
+                step["status"] = "failed"
+                step["error"] = f"{type(e).__name__}: {e}"
+            step["seconds"] = round(time.perf_counter() - t0, 3)
+        self.finished = time.time()
+
+    def readiness(self) -> Dict[str, object]:
+        """ready (no step pending or running), steps done out of total, and per-step detail."""
+        steps = {name: dict(step) for name, step in self.steps.items()}
+        return {
+            "ready": all(step["status"] in ("done", "failed") for step in steps.values()),
+            "done": sum(step["status"] == "done" for step in steps.values()),
+            "total": len(steps),
+            "started": self.started,
+            "finished": self.finished,
+            "steps": steps,
+        }
+
+# One per server process, shared by every session
+_warmup = Warmup()
+
+def start_warmup() -> None:
+    """Start the process's warm-up worker unless CPF_WARMUP=0."""
+    if WARMUP_ENABLED:
+        _warmup.start()
+
+def readiness() -> Dict[str, object]:
+    return _warmup.readiness()
+
+def main(argv=None):
+    _warmup.run()
+    status = readiness()
+    for name, step in status["steps"].items():
+        detail = f" ({step['error']})" if step["error"] else ""
+        print(f"{name}: {step['status']} in {step['seconds']:.2f}s{detail}")
+    return 0 if status["done"] == status["total"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())